@@ -1,14 +1,17 @@
 
-import pygame
+import os
+import random
 import time
+from datetime import datetime
+import pygame
 import api
-from jugador import Jugador
-from jugadorCPU import JugadorCPU
-from mapa import cargar_mapa, dibujar_mapa
-from pedidos import reubicar_pedidos, asignar_posicion_aleatoria
-from clases import ColaPedidos, Pedido
+from mapa import cargar_datos_mapa, dibujar_mapa
 from clima import SistemaClima
-from persistencia import SistemaPersistencia, HistorialMovimientos
+from persistencia import (SistemaPersistencia, HistorialMovimientos,
+                          GuardadoAutomatico)
+from simulacion import Simulacion, RelojSimulado
+from texto import renderizar_texto
+from repeticion import GrabadorRepeticion, acciones_de_teclas
 
 
 pygame.init()
@@ -67,30 +70,33 @@ imagenes_tiles = {
     "B": edificio_image
 }
 
+# --- Reloj y grabación de la partida ---
+# El reloj avanza con los ms de cada frame, así la partida
+# se puede repetir exactamente desde la grabación.
+reloj = RelojSimulado(time.time())
+semilla_clima = random.randrange(2 ** 31)
+grabador = GrabadorRepeticion()
+api_partida = grabador.envolver_api(api)
+ruta_repeticion = os.path.join(
+    "repeticiones", datetime.now().strftime("partida_%Y%m%d_%H%M%S.cqr"))
+repeticion_guardada = False
+
 # --- Inicializar sistemas ---
-sistema_clima = SistemaClima(api)
+sistema_clima = SistemaClima(api_partida, reloj=reloj, semilla=semilla_clima)
 sistema_persistencia = SistemaPersistencia()
 historial_movimientos = HistorialMovimientos()
 
 # --- Cargar mapa y pedidos ---
-tiles = cargar_mapa(api)
-mapa_data = api.obtener_mapa()["data"]
+ciudad_data = cargar_datos_mapa(api_partida)
+tiles = ciudad_data["tiles"]
 meta_ingresos = 5500
 
-pedidos_data = api.obtener_pedidos()["data"]
-reubicar_pedidos(pedidos_data, tiles)
-cola_pedidos = ColaPedidos(pedidos_data)
-
-# --- Crear jugadores ---
-jugador = Jugador(0, 0)
+pedidos_data = api_partida.obtener_pedidos()["data"]
 map_width, map_height = len(tiles[0]), len(tiles)
 
 # Menú de selección de dificultad
 def seleccionar_dificultad():
     """Muestra menú para seleccionar dificultad del CPU."""
-    font_titulo = pygame.font.SysFont(None, 48)
-    font_opcion = pygame.font.SysFont(None, 32)
-
     seleccionando = True
     dificultad_seleccionada = None
 
@@ -98,8 +104,8 @@ def seleccionar_dificultad():
         screen.fill((30, 30, 50))
 
         # Título
-        titulo = font_titulo.render(
-            "Selecciona Dificultad CPU", True, (255, 255, 255))
+        titulo = renderizar_texto(
+            "Selecciona Dificultad CPU", 48, (255, 255, 255))
         titulo_rect = titulo.get_rect(
             center=(screen.get_width() // 2, 100))
         screen.blit(titulo, titulo_rect)
@@ -116,7 +122,7 @@ def seleccionar_dificultad():
         for texto, dif, y_pos in opciones:
             if texto:
                 color = (100, 255, 100) if dif else (200, 200, 200)
-                opcion = font_opcion.render(texto, True, color)
+                opcion = renderizar_texto(texto, 32, color)
                 opcion_rect = opcion.get_rect(
                     center=(screen.get_width() // 2, y_pos))
                 screen.blit(opcion, opcion_rect)
@@ -128,9 +134,8 @@ def seleccionar_dificultad():
             "Difícil: Usa algoritmos de ruta óptima"
         ]
 
-        font_small = pygame.font.SysFont(None, 20)
         for i, desc in enumerate(descripciones):
-            texto = font_small.render(desc, True, (180, 180, 180))
+            texto = renderizar_texto(desc, 20, (180, 180, 180))
             screen.blit(texto, (50, 550 + i * 25))
 
         pygame.display.flip()
@@ -159,41 +164,39 @@ dificultad_cpu = seleccionar_dificultad()
 
 if dificultad_cpu is None:
     print("Jugando sin CPU")
-    jugador_cpu = None
 else:
-    # Crear CPU en posición opuesta del mapa
-    cpu_x = map_width - 1
-    cpu_y = map_height - 1
-    # Asegurar que no sea edificio
-    while tiles[cpu_y][cpu_x] == 'B':
-        cpu_x -= 1
-        if cpu_x < 0:
-            cpu_x = map_width - 1
-            cpu_y -= 1
-
-    jugador_cpu = JugadorCPU(cpu_x, cpu_y, dificultad=dificultad_cpu)
     print(f"CPU creado con dificultad: {dificultad_cpu}")
 
-# --- Variables de control ---
-ultimo_check = time.time()
-check_interval = 15
-pedidos_activos = []
-pedidos_vistos = set()
-ultimo_limpieza_vistos = time.time()
-intervalo_limpieza = 20
-
-ultimo_liberado = 0
-liberar_interval = 5
-
-tiempo_inicio = time.time()
-duracion = 10 * 60
-
-juego_terminado = False
-ganador = None
-puntaje_calculado_humano = None
-puntaje_calculado_cpu = None
+# --- Crear la partida (jugadores, pedidos y reglas) ---
+semilla = random.randrange(2 ** 31)
+random.seed(semilla)
+grabador.configurar(semilla=semilla, semilla_clima=semilla_clima,
+                    reloj_inicio=reloj(), dificultad_cpu=dificultad_cpu,
+                    meta_ingresos=meta_ingresos)
+
+simulacion = Simulacion(
+    tiles, pedidos_data, sistema_clima,
+    dificultad_cpu=dificultad_cpu,
+    reloj=reloj,
+    sistema_persistencia=sistema_persistencia,
+    meta_ingresos=meta_ingresos,
+    inicio_partida=ciudad_data.get("start_time"))
+
+jugador = simulacion.jugador
+jugador_cpu = simulacion.jugador_cpu
+pedidos_activos = simulacion.pedidos_activos
+duracion = simulacion.duracion
+
+# Los pedidos nuevos se consultan en segundo plano.
+sondeo_api = api.SondeoAPI({"pedidos": simulacion.check_interval})
+sondeo_api.iniciar()
+
+# Guardado automático cada 30 segundos en el slot 5
+guardado_automatico = GuardadoAutomatico(sistema_persistencia)
+guardado_automatico.iniciar()
 
 mostrar_inventario_detallado = False
+hud_cache = {'clave': None, 'superficie': None}
 mostrar_estadisticas = False
 ordendar_inventario = False
 
@@ -201,15 +204,13 @@ ordendar_inventario = False
 def mostrar_pantalla_final(ganador_final, puntaje_humano, puntaje_cpu_info):
     """Muestra pantalla final con resultados de ambos jugadores."""
     screen.fill((0, 0, 0))
-    font_titulo = pygame.font.SysFont(None, 48)
-    font_texto = pygame.font.SysFont(None, 24)
 
     if ganador_final == 'humano':
-        titulo = font_titulo.render("¡VICTORIA HUMANO!", True, (0, 255, 0))
+        titulo = renderizar_texto("¡VICTORIA HUMANO!", 48, (0, 255, 0))
     elif ganador_final == 'cpu':
-        titulo = font_titulo.render("¡VICTORIA CPU!", True, (255, 100, 100))
+        titulo = renderizar_texto("¡VICTORIA CPU!", 48, (255, 100, 100))
     else:
-        titulo = font_titulo.render("JUEGO TERMINADO", True, (255, 255, 0))
+        titulo = renderizar_texto("JUEGO TERMINADO", 48, (255, 255, 0))
 
     titulo_rect = titulo.get_rect(center=(screen.get_width() // 2, 50))
     screen.blit(titulo, titulo_rect)
@@ -226,7 +227,7 @@ def mostrar_pantalla_final(ganador_final, puntaje_humano, puntaje_cpu_info):
     ]
 
     for texto in textos_humano:
-        rendered = font_texto.render(texto, True, (100, 255, 100))
+        rendered = renderizar_texto(texto, 24, (100, 255, 100))
         rendered_rect = rendered.get_rect(
             center=(screen.get_width() // 2, y_offset))
         screen.blit(rendered, rendered_rect)
@@ -244,25 +245,26 @@ def mostrar_pantalla_final(ganador_final, puntaje_humano, puntaje_cpu_info):
         ]
 
         for texto in textos_cpu:
-            rendered = font_texto.render(texto, True, (255, 100, 100))
+            rendered = renderizar_texto(texto, 24, (255, 100, 100))
             rendered_rect = rendered.get_rect(
                 center=(screen.get_width() // 2, y_offset))
             screen.blit(rendered, rendered_rect)
             y_offset += 30
 
     # Mensaje final
-    final_msg = font_texto.render(
-        "Presiona ESC para salir", True, (255, 255, 255))
+    final_msg = renderizar_texto(
+        "Presiona ESC para salir", 24, (255, 255, 255))
     final_rect = final_msg.get_rect(
         center=(screen.get_width() // 2, y_offset + 20))
     screen.blit(final_msg, final_rect)
 
 
 def mostrar_hud_mejorado():
-    """Muestra HUD con información de ambos jugadores."""
-    font = pygame.font.SysFont(None, 22)
-    font_small = pygame.font.SysFont(None, 18)
+    """Muestra HUD con información de ambos jugadores.
 
+    El HUD se vuelve a dibujar solo cuando cambia alguno
+    de los valores que muestra; si no, se reutiliza.
+    """
     # Información del clima
     info_clima = sistema_clima.obtener_info_clima()
     clima_texto = sistema_clima.traducir_clima(info_clima['estado'])
@@ -273,27 +275,49 @@ def mostrar_hud_mejorado():
     elif info_clima['estado'] in ['heat', 'cold']:
         clima_color = (255, 200, 100)
 
-    screen.blit(font.render(
-        f"Clima: {clima_texto}", True, clima_color), (10, 10))
+    clave = (clima_texto, clima_color,
+             jugador.puntaje, jugador.reputacion,
+             jugador.entregas_completadas)
+    if jugador_cpu:
+        clave += (jugador_cpu.puntaje, jugador_cpu.reputacion,
+                  jugador_cpu.entregas_completadas)
+
+    if clave != hud_cache['clave']:
+        lineas = [(renderizar_texto(
+            f"Clima: {clima_texto}", 22, clima_color), (10, 10))]
+
+        # Meta e información del humano
+        y_pos = 40
+        lineas.append((renderizar_texto(
+            f"HUMANO - ${jugador.puntaje}/{meta_ingresos}",
+            22, (100, 255, 100)), (10, y_pos)))
+        lineas.append((renderizar_texto(
+            f"Rep: {jugador.reputacion} | "
+            f"Entregas: {jugador.entregas_completadas}",
+            18, (180, 255, 180)), (10, y_pos + 20)))
+
+        # Información del CPU (si existe)
+        if jugador_cpu:
+            y_pos += 50
+            lineas.append((renderizar_texto(
+                f"CPU ({jugador_cpu.dificultad.upper()}) - "
+                f"${jugador_cpu.puntaje}",
+                22, (255, 100, 100)), (10, y_pos)))
+            lineas.append((renderizar_texto(
+                f"Rep: {jugador_cpu.reputacion} | "
+                f"Entregas: {jugador_cpu.entregas_completadas}",
+                18, (255, 180, 180)), (10, y_pos + 20)))
+
+        # La superficie mide lo que ocupa la última línea.
+        alto = max(pos[1] + texto.get_height() for texto, pos in lineas)
+        hud = pygame.Surface((screen.get_width(), alto), pygame.SRCALPHA)
+        for texto, pos in lineas:
+            hud.blit(texto, pos)
 
-    # Meta e información del humano
-    y_pos = 40
-    screen.blit(font.render(
-        f"HUMANO - ${jugador.puntaje}/{meta_ingresos}",
-        True, (100, 255, 100)), (10, y_pos))
-    screen.blit(font_small.render(
-        f"Rep: {jugador.reputacion} | Entregas: {jugador.entregas_completadas}",
-        True, (180, 255, 180)), (10, y_pos + 20))
+        hud_cache['clave'] = clave
+        hud_cache['superficie'] = hud
 
-    # Información del CPU (si existe)
-    if jugador_cpu:
-        y_pos += 50
-        screen.blit(font.render(
-            f"CPU ({jugador_cpu.dificultad.upper()}) - ${jugador_cpu.puntaje}",
-            True, (255, 100, 100)), (10, y_pos))
-        screen.blit(font_small.render(
-            f"Rep: {jugador_cpu.reputacion} | Entregas: {jugador_cpu.entregas_completadas}",
-            True, (255, 180, 180)), (10, y_pos + 20))
+    screen.blit(hud_cache['superficie'], (0, 0))
 
 
 def mostrar_inventario_detallado_ui():
@@ -306,10 +330,7 @@ def mostrar_inventario_detallado_ui():
     overlay.fill((0, 0, 0))
     screen.blit(overlay, (200, 100))
 
-    font = pygame.font.SysFont(None, 20)
-    font_titulo = pygame.font.SysFont(None, 24)
-
-    titulo = font_titulo.render("INVENTARIO", True, (255, 255, 255))
+    titulo = renderizar_texto("INVENTARIO", 24, (255, 255, 255))
     screen.blit(titulo, (210, 110))
 
     inventario_ordenado = jugador.obtener_inventario_ordenado('prioridad')
@@ -320,201 +341,81 @@ def mostrar_inventario_detallado_ui():
         texto = (f"{i + 1}. Peso:{pedido.weight} "
                  f"Pago:${pedido.payout} Prio:{pedido.priority}")
 
-        tiempo_transcurrido = time.time() - getattr(
-            pedido, 'tiempo_recogido', time.time())
+        ahora = simulacion.reloj()
+        recogido = pedido.tiempo_recogido
+        tiempo_transcurrido = ahora - (
+            recogido if recogido is not None else ahora)
         if tiempo_transcurrido > 20:
             texto += " [TARDE]"
             color = (255, 200, 100)
 
-        rendered = font.render(texto, True, color)
+        rendered = renderizar_texto(texto, 20, color)
         screen.blit(rendered, (210, y_offset + i * 20))
 
 
 # --- Bucle principal ---
 running = True
 while running:
-    ahora = time.time()
-    tiempo_transcurrido = ahora - tiempo_inicio
-
-    # Actualizar sistemas
-    sistema_clima.actualizar()
-    jugador.recuperar()
-
-    # Actualizar CPU
-    if jugador_cpu:
-        clima_mult = sistema_clima.obtener_multiplicador_actual()
-        consumo_clima = sistema_clima.obtener_consumo_resistencia_extra()
-        jugador_cpu.actualizar(
-            pedidos_activos, tiles, clima_mult, consumo_clima)
-
-    # Condiciones de finalización
-    if not juego_terminado:
-        # Victoria por meta
-        if jugador.puntaje >= meta_ingresos:
-            juego_terminado = True
-            ganador = 'humano'
-            tiempo_final = tiempo_transcurrido
-        elif jugador_cpu and jugador_cpu.puntaje >= meta_ingresos:
-            juego_terminado = True
-            ganador = 'cpu'
-            tiempo_final = tiempo_transcurrido
-        # Derrota por tiempo
-        elif tiempo_transcurrido >= duracion:
-            juego_terminado = True
-            # Ganador por más dinero
-            if jugador_cpu:
-                ganador = 'humano' if jugador.puntaje > jugador_cpu.puntaje else 'cpu'
-            else:
-                ganador = 'humano'
-            tiempo_final = duracion
-        # Derrota por reputación
-        elif jugador.reputacion <= 20:
-            juego_terminado = True
-            ganador = 'cpu' if jugador_cpu else None
-            tiempo_final = tiempo_transcurrido
-        elif jugador_cpu and jugador_cpu.reputacion <= 20:
-            juego_terminado = True
-            ganador = 'humano'
-            tiempo_final = tiempo_transcurrido
-
-        # Calcular puntajes finales
-        if juego_terminado and puntaje_calculado_humano is None:
-            puntaje_calculado_humano = sistema_persistencia.calcular_puntaje_final(
-                jugador, tiempo_final, duracion, meta_ingresos)
-
-            if jugador_cpu:
-                puntaje_calculado_cpu = sistema_persistencia.calcular_puntaje_final(
-                    jugador_cpu, tiempo_final, duracion, meta_ingresos)
+    eventos = pygame.event.get()
 
     # Pantalla final
-    if juego_terminado:
+    if simulacion.juego_terminado:
+        simulacion.paso()
         mostrar_pantalla_final(
-            ganador, puntaje_calculado_humano, puntaje_calculado_cpu)
+            simulacion.ganador, simulacion.puntaje_calculado_humano,
+            simulacion.puntaje_calculado_cpu)
         pygame.display.flip()
 
-        for event in pygame.event.get():
+        for event in eventos:
             if (event.type == pygame.QUIT or
                     (event.type == pygame.KEYDOWN and
                      event.key == pygame.K_ESCAPE)):
                 running = False
         continue
 
-    # Limpiar pedidos vistos
-    if ahora - ultimo_limpieza_vistos >= intervalo_limpieza:
-        ids_activos = set()
-        for ped in pedidos_activos:
-            ids_activos.add(getattr(ped, 'id', None))
-        for ped in jugador.inventario:
-            ids_activos.add(getattr(ped, 'id', None))
-        if jugador_cpu:
-            for ped in jugador_cpu.inventario:
-                ids_activos.add(getattr(ped, 'id', None))
-
-        pedidos_vistos = ids_activos
-        ultimo_limpieza_vistos = ahora
-
-    # Chequear nuevos pedidos
-    if ahora - ultimo_check >= check_interval:
-        try:
-            resp = api.obtener_pedidos()
-            nuevos_pedidos_data = (resp.get("data", [])
-                                   if isinstance(resp, dict) else resp)
-        except Exception as e:
-            print("Error al obtener pedidos:", e)
-            nuevos_pedidos_data = []
-
-        for p in nuevos_pedidos_data:
-            pedido_id = p.get("id", f"{p['pickup']}-{p['dropoff']}")
-
-            if pedido_id not in pedidos_vistos:
-                pedidos_vistos.add(pedido_id)
-
-                ocupadas = set()
-                for ped in pedidos_activos:
-                    ocupadas.add(tuple(ped.pickup))
-                    ocupadas.add(tuple(ped.dropoff))
-                for ped in list(jugador.inventario):
-                    ocupadas.add(tuple(ped.pickup))
-                    ocupadas.add(tuple(ped.dropoff))
-                if jugador_cpu:
-                    for ped in list(jugador_cpu.inventario):
-                        ocupadas.add(tuple(ped.pickup))
-                        ocupadas.add(tuple(ped.dropoff))
-
-                ocupadas.add((jugador.x, jugador.y))
-                if jugador_cpu:
-                    ocupadas.add((jugador_cpu.x, jugador_cpu.y))
-
-                pickup_pos = asignar_posicion_aleatoria(
-                    tiles, ocupadas, separacion=4)
-                if pickup_pos:
-                    p["pickup"] = pickup_pos
-                    ocupadas.add(tuple(pickup_pos))
-                else:
-                    continue
-
-                dropoff_pos = asignar_posicion_aleatoria(
-                    tiles, ocupadas, separacion=4)
-                if dropoff_pos:
-                    p["dropoff"] = dropoff_pos
-                else:
-                    continue
-
-                nuevo_pedido = Pedido(
-                    p["pickup"], p["dropoff"],
-                    p.get("weight", 1),
-                    p.get("priority", 0),
-                    p.get("payout", 100))
-                nuevo_pedido.id = pedido_id
-
-                cola_pedidos.agregar_pedido(nuevo_pedido)
-
-        ultimo_check = ahora
-
-    # Liberar pedidos
-    if len(pedidos_activos) < 5 and ahora - ultimo_liberado >= liberar_interval:
-        pedido = cola_pedidos.obtener_siguiente()
-        if pedido:
-            pedidos_activos.append(pedido)
-            ultimo_liberado = ahora
-
     # Eventos del jugador humano
-    for event in pygame.event.get():
+    teclas = []
+    for event in eventos:
         if event.type == pygame.QUIT:
             running = False
         elif event.type == pygame.KEYDOWN:
-            dx = dy = 0
-
             if event.key == pygame.K_LEFT:
-                dx = -1
+                teclas.append('izquierda')
                 direccion_der = False
             elif event.key == pygame.K_RIGHT:
-                dx = 1
+                teclas.append('derecha')
                 direccion_der = True
             elif event.key == pygame.K_UP:
-                dy = -1
+                teclas.append('arriba')
             elif event.key == pygame.K_DOWN:
-                dy = 1
+                teclas.append('abajo')
             elif event.key == pygame.K_q:
-                jugador.cancelar_ultimo_pedido()
+                teclas.append('cancelar')
             elif event.key == pygame.K_i:
+                teclas.append('inventario')
                 mostrar_inventario_detallado = not mostrar_inventario_detallado
             elif event.key == pygame.K_t:
+                teclas.append('estadisticas')
                 mostrar_estadisticas = not mostrar_estadisticas
 
-            if dx != 0 or dy != 0:
-                clima_mult = sistema_clima.obtener_multiplicador_actual()
-                consumo_clima = sistema_clima.obtener_consumo_resistencia_extra()
-                jugador.mover(dx, dy, tiles, clima_mult, consumo_clima)
-
-    # Recoger pedidos (humano)
-    for pedido in list(pedidos_activos):
-        if [jugador.x, jugador.y] == pedido.pickup:
-            if jugador.recoger_pedido(pedido):
-                pedidos_activos.remove(pedido)
-
-    # Entregar pedidos (humano)
-    jugador.entregar_pedido()
+    # Pedidos que llegaron de la API (sin esperar la respuesta)
+    for recurso, datos in sondeo_api.obtener_resultados():
+        if recurso == "pedidos":
+            grabador.api(recurso, datos)
+            simulacion.agregar_pedidos(datos)
+
+    # Actualizar la partida (clima, CPU, pedidos y jugador)
+    clima_antes = (sistema_clima.estado_actual,
+                   sistema_clima.intensidad_actual)
+    simulacion.paso(acciones_de_teclas(teclas))
+    if simulacion.juego_terminado:
+        # El último tick no avanza el reloj.
+        grabador.tick(0, teclas)
+        grabador.guardar(ruta_repeticion)
+        repeticion_guardada = True
+        continue
+    guardado_automatico.actualizar(simulacion.capturar_estado)
+    tiempo_transcurrido = simulacion.tiempo_transcurrido()
 
     # Renderizado
     cam_x = max(0, min(jugador.x - view_width // 2,
@@ -571,7 +472,6 @@ while running:
     mostrar_hud_mejorado()
 
     # Barra de resistencia (humano)
-    font = pygame.font.SysFont(None, 20)
     ancho_barra = 150
     alto_barra = 15
     x_barra = 10
@@ -587,7 +487,7 @@ while running:
                      (x_barra, y_barra, ancho_barra, alto_barra))
     pygame.draw.rect(screen, color_barra,
                      (x_barra, y_barra, ancho_actual, alto_barra))
-    screen.blit(font.render("Resistencia (H)", True, (0, 0, 0)),
+    screen.blit(renderizar_texto("Resistencia (H)", 20, (0, 0, 0)),
                 (x_barra, y_barra - 18))
 
     # Barra de resistencia (CPU)
@@ -604,7 +504,7 @@ while running:
                          (x_barra, y_barra_cpu, ancho_barra, alto_barra))
         pygame.draw.rect(screen, color_barra_cpu,
                          (x_barra, y_barra_cpu, ancho_actual_cpu, alto_barra))
-        screen.blit(font.render("Resistencia (CPU)", True, (0, 0, 0)),
+        screen.blit(renderizar_texto("Resistencia (CPU)", 20, (0, 0, 0)),
                     (x_barra, y_barra_cpu - 18))
 
     # Cronómetro
@@ -612,14 +512,25 @@ while running:
     minutos = tiempo_restante // 60
     segundos = tiempo_restante % 60
     cronometro_texto = f"{minutos:02d}:{segundos:02d}"
-    font_crono = pygame.font.SysFont(None, 36)
     color_tiempo = (255, 0, 0) if tiempo_restante < 60 else (0, 0, 0)
-    screen.blit(font_crono.render(cronometro_texto, True, color_tiempo),
+    screen.blit(renderizar_texto(cronometro_texto, 36, color_tiempo),
                 (screen.get_width() - 120, 10))
 
     mostrar_inventario_detallado_ui()
 
     pygame.display.flip()
-    clock.tick(60)
-
+    ms_frame = clock.tick(60)
+
+    # Grabar el tick y avanzar el reloj de la partida
+    grabador.tick(ms_frame, teclas)
+    if (sistema_clima.estado_actual,
+            sistema_clima.intensidad_actual) != clima_antes:
+        grabador.clima(sistema_clima.estado_actual,
+                       sistema_clima.intensidad_actual)
+    reloj.avanzar(ms_frame / 1000)
+
+if not repeticion_guardada:
+    grabador.guardar(ruta_repeticion)
+sondeo_api.detener()
+guardado_automatico.detener()
 pygame.quit()
\ No newline at end of file
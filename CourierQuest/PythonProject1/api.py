@@ -5,60 +5,244 @@ Se cargan las URL de los API con ayuda de la librería "requests
 y se crean variables con json para que los datos sean posibles
 de utilizar localmente para que el juego sea utilizado en modo offline.
 
+Cada hilo usa su propia sesión de requests (conexiones
+reutilizables; una Session no es segura entre hilos) y las
+respuestas se guardan en data/cache con un tiempo de vida, así al
+volver a abrir el juego no hace falta descargar todo.
+
 Se obtiene el mapa, el clima y los pedidos de la API.
+
+SondeoAPI consulta la API en un hilo aparte y deja los
+resultados en una cola, para que el bucle del juego no
+se congele esperando la respuesta. La URL base se puede
+cambiar con la variable de entorno COURIER_API_URL (por
+ejemplo para usar el servidor de prueba de api_stub.py).
 """
 
+import os
+import queue
+import threading
+import time
 import requests
 import json
 
 # URLs de la API
-URL_MAPA = \
-    ("https://tigerds-api.kindflower-ccaf48b6"
-     ".eastus.azurecontainerapps.io/city/map")
-URL_PEDIDOS = \
-    ("https://tigerds-api.kindflower-ccaf48b6"
-     ".eastus.azurecontainerapps.io/city/jobs")
-URL_CLIMA = \
-    ("https://tigerds-api.kindflower-ccaf48b6"
-     ".eastus.azurecontainerapps.io/city/weather")
+URL_BASE = os.environ.get(
+    "COURIER_API_URL",
+    "https://tigerds-api.kindflower-ccaf48b6.eastus.azurecontainerapps.io")
+URL_MAPA = f"{URL_BASE}/city/map"
+URL_PEDIDOS = f"{URL_BASE}/city/jobs"
+URL_CLIMA = f"{URL_BASE}/city/weather"
 
 
 LOCAL_MAPA = "data/ciudad.json"
 LOCAL_PEDIDOS = "data/pedidos.json"
 LOCAL_CLIMA = "data/clima.json"
 
+# Segundos entre consultas de SondeoAPI por defecto.
+INTERVALOS_SONDEO = {"pedidos": 15}
 
-def obtener_mapa():
-    """Se obtiene el mapa mediante el URL de la API."""
+# Caché en disco de las respuestas, junto a los archivos locales.
+CARPETA_CACHE = "data/cache"
+# Segundos que una respuesta guardada se usa sin volver a consultar;
+# los pedidos duran lo mismo que el intervalo del sondeo.
+TTL_CACHE = {
+    "mapa": 24 * 60 * 60,
+    "pedidos": INTERVALOS_SONDEO["pedidos"],
+    "clima": 60 * 60,
+}
+
+_local = threading.local()
+
+
+def obtener_sesion():
+    """Retorna la sesión HTTP del hilo actual (conexiones reutilizables)."""
+    sesion = getattr(_local, "sesion", None)
+    if sesion is None:
+        sesion = _local.sesion = requests.Session()
+    return sesion
+
+
+def _ruta_cache(recurso):
+    """Retorna la ruta del archivo de caché de un recurso."""
+    return os.path.join(CARPETA_CACHE, f"{recurso}.json")
+
+
+def _leer_cache(recurso, url):
+    """Lee la respuesta guardada de un recurso.
+
+    Returns:
+        dict: La entrada, o None si no hay, está dañada o se
+        guardó desde otra URL (por ejemplo otro COURIER_API_URL)
+    """
     try:
-        resp = requests.get(URL_MAPA, timeout=5)
+        with open(_ruta_cache(recurso), "r", encoding="utf-8") as f:
+            entrada = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if (not isinstance(entrada, dict) or entrada.get("url") != url
+            or not isinstance(entrada.get("guardado"), (int, float))
+            or "datos" not in entrada):
+        return None
+    return entrada
+
+
+def _escribir_cache(recurso, entrada):
+    """Guarda la respuesta de un recurso (escritura atómica)."""
+    try:
+        os.makedirs(CARPETA_CACHE, exist_ok=True)
+        ruta = _ruta_cache(recurso)
+        temporal = f"{ruta}.{threading.get_ident()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(entrada, f)
+        os.replace(temporal, ruta)
+    except OSError as e:
+        print(f"No se pudo guardar la caché de {recurso}: {e}")
+
+
+def _obtener_recurso(recurso, url, archivo_local, mensaje_error):
+    """
+    Obtiene un recurso de la API usando la caché en disco.
+
+    Si la respuesta guardada no ha vencido se usa sin ir a la red;
+    si venció se consulta con If-None-Match / If-Modified-Since y un
+    304 renueva la caché. Si la API falla se usa la última respuesta
+    guardada y, si no hay, el archivo local.
+    """
+    entrada = _leer_cache(recurso, url)
+    ahora = time.time()
+
+    if entrada and ahora - entrada["guardado"] < TTL_CACHE[recurso]:
+        return entrada["datos"]
+
+    encabezados = {}
+    if entrada:
+        if entrada.get("etag"):
+            encabezados["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            encabezados["If-Modified-Since"] = entrada["last_modified"]
+
+    try:
+        resp = obtener_sesion().get(url, headers=encabezados, timeout=5)
+        if resp.status_code == 304 and entrada:
+            entrada["guardado"] = ahora
+            _escribir_cache(recurso, entrada)
+            return entrada["datos"]
         if resp.status_code == 200:
-            return resp.json()
+            datos = resp.json()
+            _escribir_cache(recurso, {
+                "url": url,
+                "guardado": ahora,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "datos": datos
+            })
+            return datos
     except requests.exceptions.RequestException:
-        print("No se pudo conectar a la API. Usando mapa local...")
-    with open(LOCAL_MAPA, "r") as f:
+        print(mensaje_error)
+
+    if entrada:
+        return entrada["datos"]
+    with open(archivo_local, "r") as f:
         return json.load(f)
 
 
+def obtener_mapa():
+    """Se obtiene el mapa mediante el URL de la API."""
+    return _obtener_recurso(
+        "mapa", URL_MAPA, LOCAL_MAPA,
+        "No se pudo conectar a la API. Usando mapa local...")
+
+
 def obtener_pedidos():
     """Se obtienen los pedidos mediante el URL de la API."""
-    try:
-        resp = requests.get(URL_PEDIDOS, timeout=5)
-        if resp.status_code == 200:
-            return resp.json()
-    except requests.exceptions.RequestException:
-        print("No se pudo conectar a la API. Usando pedidos locales...")
-    with open(LOCAL_PEDIDOS, "r") as f:
-        return json.load(f)
+    return _obtener_recurso(
+        "pedidos", URL_PEDIDOS, LOCAL_PEDIDOS,
+        "No se pudo conectar a la API. Usando pedidos locales...")
 
 
 def obtener_clima():
     """Se obtienen el clima mediante el URL de la API."""
-    try:
-        resp = requests.get(URL_CLIMA, timeout=5)
-        if resp.status_code == 200:
-            return resp.json()
-    except requests.exceptions.RequestException:
-        print("No se pudo conectar a la API. Usando clima local...")
-    with open(LOCAL_CLIMA, "r") as f:
-        return json.load(f)
+    return _obtener_recurso(
+        "clima", URL_CLIMA, LOCAL_CLIMA,
+        "No se pudo conectar a la API. Usando clima local...")
+
+
+OBTENEDORES = {
+    "mapa": obtener_mapa,
+    "pedidos": obtener_pedidos,
+    "clima": obtener_clima,
+}
+
+
+class SondeoAPI:
+    """Consulta la API en segundo plano sin bloquear el juego.
+
+    Cada recurso ("mapa", "pedidos" o "clima") se consulta
+    con su propio intervalo en un hilo aparte, y los resultados
+    se dejan en una cola segura entre hilos como tuplas
+    (recurso, datos).
+    """
+
+    def __init__(self, intervalos=None, obtenedores=None):
+        """
+        Construye el sondeo (no lo inicia).
+
+        Args:
+            intervalos (dict): Segundos entre consultas por recurso,
+                por defecto solo pedidos cada 15 segundos
+            obtenedores (dict): Funciones a usar por recurso,
+                por defecto las de este módulo
+        """
+        self.intervalos = intervalos or dict(INTERVALOS_SONDEO)
+        self.obtenedores = obtenedores or OBTENEDORES
+        self.cola = queue.Queue()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        """Inicia el hilo de consultas."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._ejecutar, name="SondeoAPI", daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera=1.0):
+        """Pide al hilo que termine y lo espera un momento."""
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(espera)
+
+    def _ejecutar(self):
+        """Bucle del hilo: consulta cada recurso cuando le toca."""
+        inicio = time.monotonic()
+        proximas = {recurso: inicio + intervalo
+                    for recurso, intervalo in self.intervalos.items()}
+
+        while not self._detener.is_set():
+            for recurso, intervalo in self.intervalos.items():
+                if time.monotonic() < proximas[recurso]:
+                    continue
+                proximas[recurso] = time.monotonic() + intervalo
+                try:
+                    datos = self.obtenedores[recurso]()
+                except Exception as e:
+                    print(f"Error al consultar {recurso}:", e)
+                    continue
+                self.cola.put((recurso, datos))
+
+            espera = max(0.0, min(proximas.values()) - time.monotonic())
+            if self._detener.wait(espera):
+                break
+
+    def obtener_resultados(self):
+        """Retorna (sin esperar) todos los resultados disponibles."""
+        resultados = []
+        while True:
+            try:
+                resultados.append(self.cola.get_nowait())
+            except queue.Empty:
+                return resultados
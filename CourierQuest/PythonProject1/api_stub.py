@@ -0,0 +1,85 @@
+"""
+api_stub.py.
+
+Servidor local de prueba que imita la API del juego
+usando los archivos de data/*.json. Sirve para probar
+el juego sin internet o con una API lenta (--retraso).
+
+Uso:
+    python api_stub.py --puerto 8000 --retraso 3
+    COURIER_API_URL=http://localhost:8000 python Main.py
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RUTAS = {
+    "/city/map": "data/ciudad.json",
+    "/city/jobs": "data/pedidos.json",
+    "/city/weather": "data/clima.json",
+}
+
+
+def crear_manejador(retraso=0.0):
+    """Crea la clase que responde las peticiones con el retraso dado."""
+
+    class ManejadorAPI(BaseHTTPRequestHandler):
+        """Responde las rutas de la API con los archivos locales."""
+
+        def do_GET(self):
+            """Responde una petición GET."""
+            archivo = RUTAS.get(self.path.split("?")[0])
+            if archivo is None:
+                self.send_error(404)
+                return
+
+            if retraso:
+                time.sleep(retraso)
+
+            with open(archivo, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            # La API real envuelve todo en {"data": ...}.
+            if not (isinstance(datos, dict) and "data" in datos):
+                datos = {"data": datos}
+
+            cuerpo = json.dumps(datos).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            """Silencia el registro de cada petición."""
+
+    return ManejadorAPI
+
+
+def crear_servidor(puerto=8000, retraso=0.0):
+    """Crea el servidor (sin iniciarlo) en localhost."""
+    return ThreadingHTTPServer(("127.0.0.1", puerto),
+                               crear_manejador(retraso))
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(description="API local de prueba")
+    parser.add_argument("--puerto", type=int, default=8000)
+    parser.add_argument("--retraso", type=float, default=0.0,
+                        help="segundos a esperar antes de responder")
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.puerto, args.retraso)
+    print(f"API de prueba en http://127.0.0.1:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,50 +3,660 @@ clases.py.
 
 Se crea la clase "Pedido" y se crea la clase
 "ColaPedidos" que será utilizada mediante un
-heap para ordenar los pedidos por prioridad.
+heap indexado para ordenar los pedidos por
+prioridad (y poder quitarlos o cambiarlos por id).
+
+También se crea la clase "Inventario", la cola
+de pedidos que lleva el jugador, que mantiene
+actualizados el peso total, la prioridad máxima
+y un índice por punto de entrega (ordenado por
+prioridad) para saber en O(1) qué se entrega en
+una casilla.
+
+"PedidosActivos" guarda los pedidos que están
+en el mapa indexados por su punto de recogida.
+
+"RegistroVistos" recuerda qué ids de pedidos ya
+llegaron de la API, con memoria acotada.
+
+Por último "PedidoStore" guarda muchos pedidos
+en columnas (arrays) para ocupar poca memoria.
 """
 
-import heapq
+from array import array
+from collections import OrderedDict
+from datetime import datetime
 
 
 class Pedido:
-    """Clase para crear un objeto pedido."""
+    """Clase para crear un objeto pedido.
 
-    def __init__(self, pickup, dropoff, weight=1, priority=0, payout=100):
+    Usa __slots__ (no tiene __dict__), así que todos sus
+    atributos están declarados aquí. Las coordenadas de
+    recogida y entrega son tuplas (x, y) inmutables.
+    """
+
+    __slots__ = ("pickup", "dropoff", "weight", "priority", "payout",
+                 "id", "deadline", "release_time", "tiempo_recogido")
+
+    def __init__(self, pickup, dropoff, weight=1, priority=0, payout=100,
+                 id=None, deadline=None, release_time=0):
         """Construye el objeto Pedido."""
-        self.pickup = pickup
-        self.dropoff = dropoff
+        self.pickup = (pickup[0], pickup[1])
+        self.dropoff = (dropoff[0], dropoff[1])
         self.weight = weight
         self.priority = priority  # entre más alto, más urgente
         self.payout = payout
+        self.id = id
+        self.deadline = deadline
+        self.release_time = release_time
+        self.tiempo_recogido = None  # Se asigna al recogerlo.
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Crea un pedido a partir del dict de la API."""
+        return cls(datos["pickup"], datos["dropoff"],
+                   datos.get("weight", 1),
+                   datos.get("priority", 0),
+                   datos.get("payout", 100),
+                   datos.get("id"),
+                   datos.get("deadline"),
+                   datos.get("release_time", 0))
+
+    def __repr__(self):
+        """Representación para depurar."""
+        return (f"Pedido(id={self.id!r}, pickup={self.pickup},"
+                f" dropoff={self.dropoff}, priority={self.priority})")
 
     def __lt__(self, other):
         """Prioridad más alta primero."""
         return self.priority > other.priority
 
 
+def clave_deadline(deadline):
+    """Convierte un deadline a un número comparable.
+
+    Acepta segundos, texto ISO ("2025-09-01T12:30:00") o None;
+    sin deadline (o si no se entiende) queda al final.
+    """
+    if deadline is None:
+        return float('inf')
+    if isinstance(deadline, (int, float)):
+        return float(deadline)
+    try:
+        return datetime.fromisoformat(str(deadline)).timestamp()
+    except ValueError:
+        return float('inf')
+
+
 class ColaPedidos:
-    """Clase para crear la cola de pedidos del jugador."""
+    """Clase para crear la cola de pedidos del jugador.
+
+    Es un heap indexado: cada pedido tiene la clave
+    (-prioridad, deadline, secuencia), así los empates
+    de prioridad salen por deadline y luego en el orden
+    en que llegaron. Como se guarda la posición de cada
+    pedido en el heap, se puede quitar o cambiar de
+    prioridad un pedido por su id en O(log n).
+    """
 
     def __init__(self, lista_pedidos):
-        """Construye la cola de pedidos hace uso de heapq."""
-        self.cola = []
+        """Construye la cola de pedidos hace uso de un heap."""
+        self.cola = []          # Heap de [clave, pedido].
+        self.posiciones = {}    # id del pedido -> posición en el heap.
+        self.secuencia = 0
         for p in lista_pedidos:
-            pedido = Pedido(
-                p["pickup"],
-                p["dropoff"],
-                p.get("weight", 1),
-                p.get("priority", 0),
-                p.get("payout", 100)
-            )
-            heapq.heappush(self.cola, pedido)
+            self.agregar_pedido(Pedido.desde_dict(p))
+
+    def __len__(self):
+        """Cantidad de pedidos en la cola."""
+        return len(self.cola)
+
+    def __contains__(self, id_pedido):
+        """Indica si hay un pedido con ese id en la cola."""
+        return id_pedido in self.posiciones
+
+    def __iter__(self):
+        """Itera los pedidos (sin orden)."""
+        return (entrada[1] for entrada in self.cola)
+
+    @staticmethod
+    def _id(pedido):
+        """Retorna el id con el que se indexa el pedido."""
+        return pedido.id if pedido.id is not None else ("obj", id(pedido))
+
+    def _clave(self, pedido, secuencia):
+        """Calcula la clave de orden del pedido."""
+        return (-pedido.priority, clave_deadline(pedido.deadline), secuencia)
+
+    def _mover(self, i, entrada):
+        """Pone la entrada en la posición i y actualiza el índice."""
+        self.cola[i] = entrada
+        self.posiciones[self._id(entrada[1])] = i
+
+    def _subir(self, i):
+        """Sube la entrada i mientras sea menor que su padre."""
+        entrada = self.cola[i]
+        while i > 0:
+            padre = (i - 1) // 2
+            if entrada[0] >= self.cola[padre][0]:
+                break
+            self._mover(i, self.cola[padre])
+            i = padre
+        self._mover(i, entrada)
+
+    def _bajar(self, i):
+        """Baja la entrada i mientras algún hijo sea menor."""
+        n = len(self.cola)
+        entrada = self.cola[i]
+        while True:
+            hijo = 2 * i + 1
+            if hijo >= n:
+                break
+            if hijo + 1 < n and self.cola[hijo + 1][0] < self.cola[hijo][0]:
+                hijo += 1
+            if self.cola[hijo][0] >= entrada[0]:
+                break
+            self._mover(i, self.cola[hijo])
+            i = hijo
+        self._mover(i, entrada)
+
+    def _quitar_en(self, i):
+        """Quita y retorna el pedido en la posición i del heap."""
+        entrada = self.cola[i]
+        del self.posiciones[self._id(entrada[1])]
+
+        ultima = self.cola.pop()
+        if i < len(self.cola):
+            self._mover(i, ultima)
+            self._subir(i)
+            self._bajar(self.posiciones[self._id(ultima[1])])
+        return entrada[1]
 
     def agregar_pedido(self, pedido):
-        """Agrega un pedido al heap."""
-        heapq.heappush(self.cola, pedido)
+        """Agrega un pedido al heap.
+
+        Returns:
+            bool: False si ya había un pedido con el mismo id
+        """
+        id_pedido = self._id(pedido)
+        if id_pedido in self.posiciones:
+            return False
+
+        self.secuencia += 1
+        self.cola.append([self._clave(pedido, self.secuencia), pedido])
+        self._subir(len(self.cola) - 1)
+        return True
 
     def obtener_siguiente(self):
         """Obtiene el siguiente elemento en orden de prioridad."""
         if self.cola:
-            return heapq.heappop(self.cola)  # sale el de mayor prioridad
+            return self._quitar_en(0)  # sale el de mayor prioridad
         return None
+
+    def ver_siguiente(self):
+        """Retorna el siguiente pedido sin sacarlo de la cola."""
+        if self.cola:
+            return self.cola[0][1]
+        return None
+
+    def quitar(self, id_pedido):
+        """Quita el pedido con ese id (vencido o duplicado).
+
+        Returns:
+            Pedido quitado o None si no estaba
+        """
+        i = self.posiciones.get(id_pedido)
+        if i is None:
+            return None
+        return self._quitar_en(i)
+
+    def quitar_pedido(self, pedido):
+        """Quita justo este objeto pedido (no otro con el mismo id).
+
+        Returns:
+            Pedido quitado o None si ese objeto no estaba
+        """
+        i = self.posiciones.get(self._id(pedido))
+        if i is None or self.cola[i][1] is not pedido:
+            return None
+        return self._quitar_en(i)
+
+    def cambiar_prioridad(self, id_pedido, prioridad):
+        """Cambia la prioridad de un pedido sin reconstruir el heap.
+
+        Returns:
+            bool: False si el pedido no está en la cola
+        """
+        i = self.posiciones.get(id_pedido)
+        if i is None:
+            return False
+
+        entrada = self.cola[i]
+        pedido = entrada[1]
+        pedido.priority = prioridad
+        entrada[0] = self._clave(pedido, entrada[0][2])
+        self._subir(i)
+        self._bajar(self.posiciones[id_pedido])
+        return True
+
+
+class Inventario:
+    """Cola de pedidos del jugador con totales siempre actualizados.
+
+    Si cambios es una lista (la pone HistorialMovimientos), cada
+    cambio se anota ahí para poder deshacerlo con deshacer_cambio.
+    """
+
+    def __init__(self, pedidos=()):
+        """Construye el inventario con los pedidos dados (en orden)."""
+        # Diccionario id -> pedido: mantiene el orden y quita en O(1).
+        self.pedidos = {}
+        self.peso_total = 0
+        self.conteo_prioridades = {}
+        self.prioridad_maxima = None
+        self.por_dropoff = {}
+        self.cambios = None
+        for pedido in pedidos:
+            self.append(pedido)
+
+    def __len__(self):
+        """Cantidad de pedidos en el inventario."""
+        return len(self.pedidos)
+
+    def __iter__(self):
+        """Itera los pedidos en el orden en que se recogieron."""
+        return iter(self.pedidos.values())
+
+    def __contains__(self, pedido):
+        """Indica si el pedido está en el inventario."""
+        return id(pedido) in self.pedidos
+
+    def __repr__(self):
+        """Representación para depurar."""
+        return f"Inventario({list(self.pedidos.values())!r})"
+
+    def _registrar(self, pedido):
+        """Suma el pedido a los totales e índices."""
+        self.peso_total += pedido.weight
+
+        prioridad = pedido.priority
+        self.conteo_prioridades[prioridad] = \
+            self.conteo_prioridades.get(prioridad, 0) + 1
+        if self.prioridad_maxima is None or prioridad > self.prioridad_maxima:
+            self.prioridad_maxima = prioridad
+
+        # Cada casilla guarda sus pedidos de mayor a menor prioridad
+        # (los de igual prioridad en el orden en que se recogieron).
+        en_dropoff = self.por_dropoff.setdefault(pedido.dropoff, [])
+        i = len(en_dropoff)
+        while i > 0 and en_dropoff[i - 1].priority < prioridad:
+            i -= 1
+        en_dropoff.insert(i, pedido)
+
+    def _desregistrar(self, pedido):
+        """Resta el pedido de los totales e índices."""
+        self.peso_total -= pedido.weight
+
+        prioridad = pedido.priority
+        restantes = self.conteo_prioridades[prioridad] - 1
+        if restantes:
+            self.conteo_prioridades[prioridad] = restantes
+        else:
+            del self.conteo_prioridades[prioridad]
+            if prioridad == self.prioridad_maxima:
+                # Solo hay unas pocas prioridades distintas.
+                self.prioridad_maxima = max(self.conteo_prioridades,
+                                            default=None)
+
+        en_dropoff = self.por_dropoff[pedido.dropoff]
+        en_dropoff.remove(pedido)
+        if not en_dropoff:
+            del self.por_dropoff[pedido.dropoff]
+
+    def append(self, pedido):
+        """Agrega un pedido al final (si ya estaba no hace nada)."""
+        if id(pedido) in self.pedidos:
+            return
+        self.pedidos[id(pedido)] = pedido
+        self._registrar(pedido)
+        if self.cambios is not None:
+            self.cambios.append(('+', pedido))
+
+    def extend(self, pedidos):
+        """Agrega varios pedidos al final."""
+        for pedido in pedidos:
+            self.append(pedido)
+
+    def remove(self, pedido):
+        """Quita un pedido del inventario (ValueError si no está)."""
+        if id(pedido) not in self.pedidos:
+            raise ValueError("el pedido no está en el inventario")
+        if self.cambios is not None:
+            # Buscar la posición es O(n), solo mientras se anota.
+            posicion = list(self.pedidos).index(id(pedido))
+            self.cambios.append(('-', posicion, pedido))
+        del self.pedidos[id(pedido)]
+        self._desregistrar(pedido)
+
+    def pop(self):
+        """Quita y retorna el último pedido recogido."""
+        if not self.pedidos:
+            raise IndexError("pop de un inventario vacío")
+        _, pedido = self.pedidos.popitem()
+        self._desregistrar(pedido)
+        if self.cambios is not None:
+            self.cambios.append(('-', len(self.pedidos), pedido))
+        return pedido
+
+    def deshacer_cambio(self, cambio):
+        """Revierte un cambio anotado en cambios (sin anotarlo)."""
+        cambios, self.cambios = self.cambios, None
+        if cambio[0] == '+':
+            self.remove(cambio[1])
+        elif cambio[0] == '-':
+            _, posicion, pedido = cambio
+            pedidos = list(self.pedidos.values())
+            pedidos.insert(posicion, pedido)
+            self.clear()
+            self.extend(pedidos)
+        else:
+            self.clear()
+            self.extend(cambio[1])
+        self.cambios = cambios
+
+    def clear(self):
+        """Vacía el inventario."""
+        if self.cambios is not None and self.pedidos:
+            self.cambios.append(('*', list(self.pedidos.values())))
+        self.pedidos.clear()
+        self.peso_total = 0
+        self.conteo_prioridades.clear()
+        self.prioridad_maxima = None
+        self.por_dropoff.clear()
+
+    def copy(self):
+        """Retorna una copia del inventario (con los mismos pedidos)."""
+        return Inventario(self.pedidos.values())
+
+    def pedidos_en(self, pos):
+        """Retorna los pedidos a entregar en pos (mayor prioridad primero)."""
+        return self.por_dropoff.get(tuple(pos), [])
+
+    def entregable_en(self, pos):
+        """
+        Retorna el pedido que se puede entregar en la casilla pos.
+
+        Solo se puede entregar un pedido de la prioridad
+        máxima del inventario, así que basta revisar el
+        primero de la casilla.
+
+        Returns:
+            Pedido o None si no hay nada que entregar ahí
+        """
+        en_dropoff = self.por_dropoff.get(pos)
+        if en_dropoff and en_dropoff[0].priority == self.prioridad_maxima:
+            return en_dropoff[0]
+        return None
+
+
+class PedidosActivos:
+    """Pedidos en el mapa, indexados por la casilla de recogida.
+
+    Buscar, agregar y quitar son O(1), así que revisar si un
+    jugador está sobre un pedido no depende de cuántos haya.
+    Igual que en Inventario, si cambios es una lista cada
+    cambio se anota ahí para poder deshacerlo.
+    """
+
+    def __init__(self, pedidos=()):
+        """Construye la colección con los pedidos dados."""
+        self.pedidos = []        # Lista para iterar y elegir al azar.
+        self.posiciones = {}     # id(pedido) -> posición en la lista.
+        self.por_pickup = {}     # (x, y) -> pedidos que se recogen ahí.
+        self.cambios = None
+        for pedido in pedidos:
+            self.append(pedido)
+
+    def __len__(self):
+        """Cantidad de pedidos activos."""
+        return len(self.pedidos)
+
+    def __iter__(self):
+        """Itera sobre los pedidos activos."""
+        return iter(self.pedidos)
+
+    def __getitem__(self, i):
+        """Retorna el pedido en la posición i (para random.choice)."""
+        return self.pedidos[i]
+
+    def __contains__(self, pedido):
+        """Indica si el pedido está activo."""
+        return id(pedido) in self.posiciones
+
+    def __repr__(self):
+        """Representación para depurar."""
+        return f"PedidosActivos({self.pedidos!r})"
+
+    def append(self, pedido):
+        """Agrega un pedido al mapa."""
+        self.posiciones[id(pedido)] = len(self.pedidos)
+        self.pedidos.append(pedido)
+        self.por_pickup.setdefault(pedido.pickup, []).append(pedido)
+        if self.cambios is not None:
+            self.cambios.append(('+', pedido))
+
+    def extend(self, pedidos):
+        """Agrega varios pedidos."""
+        for pedido in pedidos:
+            self.append(pedido)
+
+    def remove(self, pedido):
+        """Quita un pedido (ValueError si no está)."""
+        i = self.posiciones.pop(id(pedido), None)
+        if i is None:
+            raise ValueError("el pedido no está activo")
+
+        # Se cambia por el último para no mover toda la lista.
+        ultimo = self.pedidos.pop()
+        if ultimo is not pedido:
+            self.pedidos[i] = ultimo
+            self.posiciones[id(ultimo)] = i
+
+        en_pickup = self.por_pickup[pedido.pickup]
+        en_pickup.remove(pedido)
+        if not en_pickup:
+            del self.por_pickup[pedido.pickup]
+        if self.cambios is not None:
+            self.cambios.append(('-', i, pedido))
+
+    def deshacer_cambio(self, cambio):
+        """Revierte un cambio anotado en cambios (sin anotarlo)."""
+        cambios, self.cambios = self.cambios, None
+        if cambio[0] == '+':
+            self.remove(cambio[1])
+        elif cambio[0] == '-':
+            # El pedido vuelve a su posición y el que ocupó su
+            # lugar vuelve al final, como estaba antes de quitarlo.
+            _, posicion, pedido = cambio
+            self.append(pedido)
+            if posicion < len(self.pedidos) - 1:
+                movido = self.pedidos[posicion]
+                self.pedidos[posicion] = pedido
+                self.pedidos[-1] = movido
+                self.posiciones[id(pedido)] = posicion
+                self.posiciones[id(movido)] = len(self.pedidos) - 1
+        else:
+            self.clear()
+            self.extend(cambio[1])
+        self.cambios = cambios
+
+    def clear(self):
+        """Quita todos los pedidos."""
+        if self.cambios is not None and self.pedidos:
+            self.cambios.append(('*', list(self.pedidos)))
+        self.pedidos.clear()
+        self.posiciones.clear()
+        self.por_pickup.clear()
+
+    def copy(self):
+        """Retorna una copia (con los mismos pedidos)."""
+        return PedidosActivos(self.pedidos)
+
+    def pedidos_en(self, pos):
+        """Retorna los pedidos que se recogen en la casilla pos."""
+        return self.por_pickup.get(tuple(pos), [])
+
+
+class RegistroVistos:
+    """Ids de pedidos ya recibidos, para no aceptarlos dos veces.
+
+    Un id queda bloqueado mientras su pedido está en juego
+    (cola, mapa o inventario) y, cuando termina (entregado,
+    cancelado o vencido), hasta que el LRU de max_ids lo saca:
+    la API y la fuente de pedidos del torneo vuelven a mandar
+    los mismos trabajos, y no se deben aceptar otra vez.
+
+    Los ids descartados sin entrar al juego (por ejemplo, sin
+    casilla libre) solo se recuerdan ttl segundos, para volver
+    a intentarlos después. Se guardan en un OrderedDict ordenado
+    por vencimiento, así que purgar es O(vencidos).
+    """
+
+    def __init__(self, ttl=20, max_ids=4096):
+        """
+        Construye el registro vacío.
+
+        Args:
+            ttl (float): Segundos que se recuerda un id descartado
+            max_ids (int): Máximo de ids terminados (y de descartados)
+                que se guardan
+        """
+        self.ttl = ttl
+        self.max_ids = max_ids
+        self.en_juego = set()
+        self.terminados = OrderedDict()  # id -> None, en orden LRU.
+        self.recientes = OrderedDict()   # id -> tiempo en que se olvida.
+
+    def __len__(self):
+        """Cantidad de ids recordados."""
+        return (len(self.en_juego) + len(self.terminados) +
+                len(self.recientes))
+
+    def _purgar(self, ahora):
+        """Olvida los ids descartados cuyo ttl ya pasó."""
+        recientes = self.recientes
+        while recientes:
+            if next(iter(recientes.values())) > ahora:
+                break
+            recientes.popitem(last=False)
+
+    def _recordar(self, id_pedido, ahora):
+        """Recuerda un id descartado hasta ahora + ttl."""
+        self.recientes[id_pedido] = ahora + self.ttl
+        self.recientes.move_to_end(id_pedido)
+        if len(self.recientes) > self.max_ids:
+            self.recientes.popitem(last=False)  # Sale el más viejo.
+
+    def visto(self, id_pedido, ahora):
+        """Indica si el id está en juego, terminado o descartado hace poco."""
+        if id_pedido in self.en_juego:
+            return True
+        if id_pedido in self.terminados:
+            self.terminados.move_to_end(id_pedido)
+            return True
+        self._purgar(ahora)
+        return id_pedido in self.recientes
+
+    def marcar(self, id_pedido, ahora, en_juego=True):
+        """
+        Registra un id recibido.
+
+        Args:
+            id_pedido: Id del pedido
+            ahora (float): Tiempo actual
+            en_juego (bool): False si el pedido se descartó (por
+                ejemplo, sin casilla libre); solo se recuerda el ttl
+        """
+        if en_juego:
+            self.recientes.pop(id_pedido, None)
+            self.terminados.pop(id_pedido, None)
+            self.en_juego.add(id_pedido)
+        else:
+            self._recordar(id_pedido, ahora)
+
+    def terminar(self, id_pedido, ahora):
+        """El pedido salió del juego; se recuerda hasta que salga del LRU."""
+        if id_pedido in self.en_juego:
+            self.en_juego.discard(id_pedido)
+            self.terminados[id_pedido] = None
+            self.terminados.move_to_end(id_pedido)
+            if len(self.terminados) > self.max_ids:
+                self.terminados.popitem(last=False)  # Sale el más viejo.
+
+
+class PedidoStore:
+    """Conjunto grande de pedidos guardado en columnas.
+
+    Cada campo es un array compacto en vez de un objeto
+    por pedido; los Pedido se crean solo cuando se piden.
+    """
+
+    def __init__(self, pedidos=()):
+        """Construye el almacén con los pedidos (dicts o Pedido) dados."""
+        self.pickup_x = array("i")
+        self.pickup_y = array("i")
+        self.dropoff_x = array("i")
+        self.dropoff_y = array("i")
+        self.weight = array("d")
+        self.priority = array("i")
+        self.payout = array("d")
+        self.release_time = array("d")
+        self.ids = []
+        self.deadlines = []
+        for pedido in pedidos:
+            self.agregar(pedido)
+
+    def __len__(self):
+        """Cantidad de pedidos guardados."""
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        """Crea el Pedido guardado en la posición i."""
+        return self.obtener(i)
+
+    def __iter__(self):
+        """Itera creando cada Pedido."""
+        for i in range(len(self.ids)):
+            yield self.obtener(i)
+
+    def agregar(self, pedido):
+        """Agrega un pedido (dict de la API o Pedido) y retorna su índice."""
+        if isinstance(pedido, dict):
+            pedido = Pedido.desde_dict(pedido)
+
+        self.pickup_x.append(pedido.pickup[0])
+        self.pickup_y.append(pedido.pickup[1])
+        self.dropoff_x.append(pedido.dropoff[0])
+        self.dropoff_y.append(pedido.dropoff[1])
+        self.weight.append(pedido.weight)
+        self.priority.append(pedido.priority)
+        self.payout.append(pedido.payout)
+        self.release_time.append(pedido.release_time or 0)
+        self.ids.append(pedido.id)
+        self.deadlines.append(pedido.deadline)
+        return len(self.ids) - 1
+
+    def obtener(self, i):
+        """Crea el Pedido guardado en la posición i."""
+        peso = self.weight[i]
+        pago = self.payout[i]
+        return Pedido(
+            (self.pickup_x[i], self.pickup_y[i]),
+            (self.dropoff_x[i], self.dropoff_y[i]),
+            int(peso) if peso.is_integer() else peso,
+            self.priority[i],
+            int(pago) if pago.is_integer() else pago,
+            self.ids[i],
+            self.deadlines[i],
+            self.release_time[i])
@@ -4,12 +4,40 @@ clima.py.
 Aquí se maneja el sistema de clima del juego
 con ayuda de la API, también maneja
 los efectos del clima sobre el jugador.
+
+El clima avanza por ticks: en cada actualizar()
+se calculan una sola vez el multiplicador y el
+consumo de resistencia, y los demás métodos solo
+leen esos valores. Las probabilidades acumuladas
+de la cadena de Markov se calculan al cargar la
+configuración, y con la misma semilla el clima
+cambia siempre igual.
+
+Si numpy está instalado también hay un análisis
+de la cadena de Markov (distribución estacionaria,
+pronósticos y muestreo de muchas trayectorias a
+la vez), que sirve para balancear la meta de
+ingresos sin simular partidas una por una.
 """
 
+import bisect
+import itertools
 import random
 import time
 import json
 
+try:
+    import numpy as np
+except ImportError:  # numpy solo se necesita para el análisis.
+    np = None
+
+# Rango en segundos entre cambios de clima (randint, inclusivo).
+DURACION_MIN_CLIMA = 45
+DURACION_MAX_CLIMA = 90
+# Rango de la intensidad de un clima nuevo (uniform).
+INTENSIDAD_MIN = 0.2
+INTENSIDAD_MAX = 1.0
+
 
 class SistemaClima:
     """Crea el sistema de clima.
@@ -20,13 +48,17 @@ class SistemaClima:
     aplica los efectos del clima al jugador.
     """
 
-    def __init__(self, api_module=None):
+    def __init__(self, api_module=None, reloj=time.time, semilla=None):
         """Construye el sistema.
 
         Carga la configuración del clima de la API y
         configura que siempre inicie con "clear".
+        El reloj es la función que da el tiempo actual
+        y la semilla fija los cambios de clima.
         """
         self.api = api_module
+        self.reloj = reloj
+        self.rng = random.Random(semilla)
 
         # Multiplicadores de velocidad para cada clima
         self.multiplicadores = {
@@ -60,7 +92,8 @@ class SistemaClima:
         self.estado_actual = 'clear'
         self.intensidad_actual = 0.0
         self.tiempo_cambio = (
-                time.time() + random.randint(45, 90))
+                self.reloj() + self.rng.randint(DURACION_MIN_CLIMA,
+                                                DURACION_MAX_CLIMA))
         # 45-90 segundos
 
         # Variables de transición suave
@@ -70,8 +103,14 @@ class SistemaClima:
         self.tiempo_inicio_transicion = 0
         self.duracion_transicion = 3.0  # 3 segundos de transición
 
+        # Valores del tick actual (los calcula actualizar).
+        self.tiempo_tick = self.reloj()
+        self.multiplicador_tick = 1.0
+        self.consumo_tick = 0.0
+
         # Cargar configuración del clima desde API
         self.cargar_configuracion_clima()
+        self._calcular_efectos(self.tiempo_tick)
 
     def cargar_configuracion_clima(self):
         """Carga la configuración del clima de la API o archivo local."""
@@ -144,7 +183,9 @@ class SistemaClima:
 
                     matriz_procesada[estado_origen] = {
                         'estados': estados_destino,
-                        'probabilidades': probabilidades
+                        'probabilidades': probabilidades,
+                        'acumuladas': list(
+                            itertools.accumulate(probabilidades))
                     }
 
         return matriz_procesada
@@ -178,80 +219,95 @@ class SistemaClima:
                      'probabilidades': [0.5, 0.3, 0.2]}
         }
 
+        for transicion in self.matriz_transicion.values():
+            transicion['acumuladas'] = list(
+                itertools.accumulate(transicion['probabilidades']))
+
         print("Usando configuración de clima por defecto")
 
-    def obtener_multiplicador_actual(self):
-        """Retorna el multiplicador de velocidad.
+    def _calcular_efectos(self, ahora):
+        """Calcula el multiplicador y el consumo para el tick actual.
 
-        Retorna el actual (con transición suave).
+        Durante una transición interpola linealmente entre
+        el clima anterior y el nuevo.
         """
-        if not self.en_transicion:
-            base_mult = self.multiplicadores.get(self.estado_actual, 1.0)
-            # Aplicar intensidad: a mayor intensidad, mayor efecto.
-            return base_mult * (
-                    1.0 - 0.5 * self.intensidad_actual * (1.0 - base_mult))
-
-        # Durante transición, interpolar entre estados.
-        tiempo_transcurrido = time.time() - self.tiempo_inicio_transicion
-        progreso = min(1.0, tiempo_transcurrido / self.duracion_transicion)
-
-        mult_anterior = self.multiplicadores.get(self.estado_anterior, 1.0)
         mult_nuevo = self.multiplicadores.get(self.estado_actual, 1.0)
+        # Aplicar intensidad: a mayor intensidad, mayor efecto.
         mult_nuevo *= (1.0 - 0.5 * self.intensidad_actual * (1.0 - mult_nuevo))
+        consumo_nuevo = (self.consumo_resistencia.get(self.estado_actual, 0.0)
+                         * (1.0 + self.intensidad_actual))
+
+        if self.en_transicion:
+            tiempo_transcurrido = ahora - self.tiempo_inicio_transicion
+            progreso = min(1.0,
+                           tiempo_transcurrido / self.duracion_transicion)
+
+            mult_anterior = self.multiplicadores.get(
+                self.estado_anterior, 1.0)
+            consumo_anterior = self.consumo_resistencia.get(
+                self.estado_anterior, 0.0)
+
+            # Interpolación linear.
+            self.multiplicador_tick = (
+                mult_anterior + (mult_nuevo - mult_anterior) * progreso)
+            self.consumo_tick = (
+                consumo_anterior
+                + (consumo_nuevo - consumo_anterior) * progreso)
+
+            # Finalizar transición.
+            if progreso >= 1.0:
+                self.en_transicion = False
+        else:
+            self.multiplicador_tick = mult_nuevo
+            self.consumo_tick = consumo_nuevo
 
-        # Interpolación linear.
-        multiplicador = mult_anterior + (mult_nuevo - mult_anterior) * progreso
+        self.tiempo_tick = ahora
 
-        # Finalizar transición.
-        if progreso >= 1.0:
-            self.en_transicion = False
+    def obtener_multiplicador_actual(self):
+        """Retorna el multiplicador de velocidad.
 
-        return multiplicador
+        Retorna el del tick actual (con transición suave).
+        """
+        return self.multiplicador_tick
 
     def obtener_consumo_resistencia_extra(self):
         """Retorna el consumo extra de resistencia por el clima actual."""
-        consumo_base = self.consumo_resistencia.get(self.estado_actual, 0.0)
-
-        if not self.en_transicion:
-            return consumo_base * (1.0 + self.intensidad_actual)
+        return self.consumo_tick
 
-        # Durante transición, interpolar.
-        tiempo_transcurrido = time.time() - self.tiempo_inicio_transicion
-        progreso = min(1.0, tiempo_transcurrido / self.duracion_transicion)
-
-        consumo_anterior = self.consumo_resistencia.get(
-            self.estado_anterior, 0.0)
-        consumo_nuevo = consumo_base * (1.0 + self.intensidad_actual)
-
-        return consumo_anterior + (consumo_nuevo - consumo_anterior) * progreso
-
-    def actualizar(self):
+    def actualizar(self, ahora=None):
         """Actualiza el estado del clima.
 
-        Lo actualiza según el tiempo y la cadena de Markov.
+        Lo actualiza según el tiempo y la cadena de Markov,
+        y calcula los efectos del tick. Si no se indica
+        ahora se usa el reloj.
         """
-        ahora = time.time()
+        if ahora is None:
+            ahora = self.reloj()
 
         # Verificar si es hora de cambiar el clima.
         if ahora >= self.tiempo_cambio:
-            self._cambiar_clima()
+            self._cambiar_clima(ahora)
+
+        self._calcular_efectos(ahora)
 
-    def _cambiar_clima(self):
+    def _cambiar_clima(self, ahora):
         """Cambia el clima usando la matriz de Markov cargada desde la API."""
         if self.estado_actual not in self.matriz_transicion:
             print(f"Estado {self.estado_actual} no encontrado en matriz,"
                   f" usando aleatorio")
-            nuevo_estado = random.choice(self.estados_disponibles)
+            nuevo_estado = self.rng.choice(self.estados_disponibles)
         else:
             transicion = self.matriz_transicion[self.estado_actual]
             estados = transicion['estados']
-            probabilidades = transicion['probabilidades']
+            acumuladas = transicion['acumuladas']
 
             # Seleccionar siguiente estado basado en probabilidades.
-            nuevo_estado = random.choices(estados, weights=probabilidades)[0]
+            i = bisect.bisect_right(acumuladas,
+                                    self.rng.random() * acumuladas[-1])
+            nuevo_estado = estados[min(i, len(estados) - 1)]
 
         # Generar nueva intensidad (0.0 a 1.0).
-        nueva_intensidad = random.uniform(0.2, 1.0)
+        nueva_intensidad = self.rng.uniform(INTENSIDAD_MIN, INTENSIDAD_MAX)
 
         # Iniciar transición suave.
         self.estado_anterior = self.estado_actual
@@ -259,10 +315,11 @@ class SistemaClima:
         self.intensidad_actual = nueva_intensidad
 
         self.en_transicion = True
-        self.tiempo_inicio_transicion = time.time()
+        self.tiempo_inicio_transicion = ahora
 
         # Programar próximo cambio (45-90 segundos según especificación).
-        self.tiempo_cambio = time.time() + random.randint(45, 90)
+        self.tiempo_cambio = ahora + self.rng.randint(DURACION_MIN_CLIMA,
+                                                      DURACION_MAX_CLIMA)
 
         print(f"Clima: {self.estado_anterior} → {self.estado_actual}"
               f" (intensidad: {self.intensidad_actual:.2f})")
@@ -274,7 +331,8 @@ class SistemaClima:
             'intensidad': self.intensidad_actual,
             'multiplicador': self.obtener_multiplicador_actual(),
             'en_transicion': self.en_transicion,
-            'tiempo_hasta_cambio': max(0, self.tiempo_cambio - time.time()),
+            'tiempo_hasta_cambio': max(0,
+                                       self.tiempo_cambio - self.tiempo_tick),
             'consumo_extra': self.obtener_consumo_resistencia_extra()
         }
 
@@ -318,3 +376,233 @@ class SistemaClima:
                      .get('estados', [])),
             'api_conectada': self.api is not None
         }
+
+    # --- Análisis con numpy ---
+
+    def _requerir_numpy(self):
+        """Lanza ImportError si numpy no está instalado."""
+        if np is None:
+            raise ImportError("El análisis del clima requiere numpy")
+
+    def matriz_densa(self):
+        """
+        Retorna la matriz de transición como arreglo de numpy.
+
+        Los estados sin fila en la matriz cambian a cualquier
+        estado con la misma probabilidad, igual que en
+        _cambiar_clima.
+
+        Returns:
+            tuple: (lista de estados, matriz n x n donde la fila i
+            es la distribución del siguiente clima desde el estado i)
+        """
+        self._requerir_numpy()
+        estados = list(self.estados_disponibles)
+        indices = {estado: i for i, estado in enumerate(estados)}
+        n = len(estados)
+        matriz = np.zeros((n, n))
+
+        for i, estado in enumerate(estados):
+            transicion = self.matriz_transicion.get(estado)
+            if transicion is None:
+                matriz[i, :] = 1.0 / n
+                continue
+            for destino, prob in zip(transicion['estados'],
+                                     transicion['probabilidades']):
+                matriz[i, indices[destino]] += prob
+
+        return estados, matriz
+
+    def _distribucion_inicial(self, estados, estado_inicial=None):
+        """Vector con probabilidad 1 en el estado inicial."""
+        if estado_inicial is None:
+            estado_inicial = self.estado_actual
+        inicial = np.zeros(len(estados))
+        inicial[estados.index(estado_inicial)] = 1.0
+        return inicial
+
+    def distribucion_estacionaria(self):
+        """
+        Retorna la distribución estacionaria de la cadena.
+
+        Resuelve pi P = pi con sum(pi) = 1 por mínimos cuadrados.
+
+        Returns:
+            dict: Estado -> probabilidad a largo plazo
+        """
+        estados, matriz = self.matriz_densa()
+        n = len(estados)
+        sistema = np.vstack([matriz.T - np.eye(n), np.ones(n)])
+        objetivo = np.zeros(n + 1)
+        objetivo[-1] = 1.0
+        pi = np.linalg.lstsq(sistema, objetivo, rcond=None)[0]
+        pi = np.clip(pi, 0.0, None)
+        pi /= pi.sum()
+        return dict(zip(estados, pi.tolist()))
+
+    def pronosticar(self, pasos, estado_inicial=None):
+        """
+        Pronostica la distribución del clima en los próximos cambios.
+
+        Args:
+            pasos (int): Cantidad de cambios de clima a pronosticar
+            estado_inicial (str): Estado de partida (el actual si es None)
+
+        Returns:
+            tuple: (lista de estados, matriz (pasos + 1) x n donde la
+            fila k es la distribución después de k cambios)
+        """
+        estados, matriz = self.matriz_densa()
+        distribuciones = np.empty((pasos + 1, len(estados)))
+        distribuciones[0] = self._distribucion_inicial(estados,
+                                                       estado_inicial)
+        for k in range(1, pasos + 1):
+            distribuciones[k] = distribuciones[k - 1] @ matriz
+        return estados, distribuciones
+
+    def _multiplicadores_efectivos(self, estados, intensidad):
+        """Multiplicador de cada estado con la intensidad dada."""
+        base = np.array([self.multiplicadores.get(e, 1.0) for e in estados])
+        return base * (1.0 - 0.5 * intensidad * (1.0 - base))
+
+    def _pesos_segmentos(self, duracion, primer_cambio):
+        """
+        Fracción de cada segundo de la partida que cae en cada clima.
+
+        El clima k empieza en el k-ésimo cambio; los cambios
+        ocurren en primer_cambio y luego cada 45-90 segundos.
+
+        Returns:
+            numpy.ndarray: Matriz (climas x segundos) donde la fila k
+            es la probabilidad de estar en el clima k en cada segundo
+        """
+        duracion = int(duracion)
+        segundos = np.arange(duracion)
+        duraciones = np.arange(DURACION_MIN_CLIMA, DURACION_MAX_CLIMA + 1)
+        prob_duracion = np.full(len(duraciones), 1.0 / len(duraciones))
+
+        # inicio_k[t]: probabilidad de que el cambio k sea en el segundo t.
+        inicio = np.zeros(duracion + 1)
+        inicio[min(max(int(primer_cambio), 0), duracion)] = 1.0
+        acumuladas = [np.ones(duracion)]  # El clima 0 empieza en 0.
+        while inicio[:duracion].sum() > 1e-12:
+            acumuladas.append(np.cumsum(inicio)[segundos])
+            siguiente = np.zeros(duracion + 1)
+            for d, p in zip(duraciones, prob_duracion):
+                siguiente[d:] += p * inicio[:duracion + 1 - d]
+            siguiente[duracion] += inicio[duracion]  # Fuera de la partida.
+            inicio = siguiente
+        acumuladas.append(np.zeros(duracion))
+
+        # Estar en el clima k: ya ocurrió el cambio k y no el k + 1.
+        return np.array([acumuladas[k] - acumuladas[k + 1]
+                         for k in range(len(acumuladas) - 1)])
+
+    def tiempo_esperado_por_estado(self, duracion=10 * 60,
+                                   estado_inicial=None):
+        """
+        Segundos esperados en cada clima durante una partida.
+
+        Args:
+            duracion (int): Duración de la partida en segundos
+            estado_inicial (str): Clima al inicio (el actual si es None)
+
+        Returns:
+            dict: Estado -> segundos esperados
+        """
+        primer_cambio = self.tiempo_cambio - self.tiempo_tick
+        pesos = self._pesos_segmentos(duracion, primer_cambio)
+        estados, distribuciones = self.pronosticar(len(pesos) - 1,
+                                                   estado_inicial)
+        tiempos = pesos.sum(axis=1) @ distribuciones
+        return dict(zip(estados, tiempos.tolist()))
+
+    def multiplicador_esperado(self, duracion=10 * 60, estado_inicial=None):
+        """
+        Multiplicador de velocidad promedio esperado en una partida.
+
+        El primer clima usa la intensidad actual y los siguientes
+        la intensidad promedio (es lineal en la intensidad).
+        No toma en cuenta los 3 segundos de transición suave.
+        """
+        primer_cambio = self.tiempo_cambio - self.tiempo_tick
+        pesos = self._pesos_segmentos(duracion, primer_cambio)
+        estados, distribuciones = self.pronosticar(len(pesos) - 1,
+                                                   estado_inicial)
+
+        intensidad_media = (INTENSIDAD_MIN + INTENSIDAD_MAX) / 2
+        mult_inicial = self._multiplicadores_efectivos(
+            estados, self.intensidad_actual)
+        mult_medio = self._multiplicadores_efectivos(
+            estados, intensidad_media)
+
+        esperado_por_clima = distribuciones @ mult_medio
+        esperado_por_clima[0] = distribuciones[0] @ mult_inicial
+        return float(pesos.sum(axis=1) @ esperado_por_clima) / duracion
+
+    def muestrear_trayectorias(self, cantidad, pasos, estado_inicial=None,
+                               semilla=None):
+        """
+        Muestrea muchas secuencias de climas a la vez.
+
+        Args:
+            cantidad (int): Cantidad de trayectorias
+            pasos (int): Cambios de clima por trayectoria
+            estado_inicial (str): Clima inicial (el actual si es None)
+            semilla (int): Semilla del generador de numpy
+
+        Returns:
+            tuple: (lista de estados, matriz de índices de estados
+            de forma cantidad x (pasos + 1))
+        """
+        estados, matriz = self.matriz_densa()
+        generador = np.random.default_rng(semilla)
+        acumuladas = np.cumsum(matriz, axis=1)
+        acumuladas[:, -1] = 1.0  # Evita errores de redondeo.
+
+        if estado_inicial is None:
+            estado_inicial = self.estado_actual
+        trayectorias = np.empty((cantidad, pasos + 1), dtype=np.int64)
+        trayectorias[:, 0] = estados.index(estado_inicial)
+
+        for k in range(1, pasos + 1):
+            azar = generador.random(cantidad)
+            filas = acumuladas[trayectorias[:, k - 1]]
+            trayectorias[:, k] = (azar[:, None] >= filas).sum(axis=1)
+
+        return estados, trayectorias
+
+    def muestrear_multiplicador_promedio(self, cantidad, duracion=10 * 60,
+                                         semilla=None):
+        """
+        Multiplicador promedio de muchas partidas simuladas a la vez.
+
+        Muestrea los climas, sus duraciones (45-90 s) y sus
+        intensidades igual que el juego.
+
+        Returns:
+            numpy.ndarray: Multiplicador promedio de cada partida
+        """
+        generador = np.random.default_rng(semilla)
+        primer_cambio = max(0.0, self.tiempo_cambio - self.tiempo_tick)
+        pasos = int(max(0.0, duracion - primer_cambio)
+                    // DURACION_MIN_CLIMA) + 1
+        estados, trayectorias = self.muestrear_trayectorias(
+            cantidad, pasos, semilla=generador.integers(2 ** 32))
+
+        duraciones = generador.integers(
+            DURACION_MIN_CLIMA, DURACION_MAX_CLIMA + 1,
+            size=(cantidad, pasos + 1)).astype(float)
+        duraciones[:, 0] = primer_cambio
+        finales = np.minimum(np.cumsum(duraciones, axis=1), duracion)
+        iniciales = np.concatenate(
+            [np.zeros((cantidad, 1)), finales[:, :-1]], axis=1)
+
+        intensidades = generador.uniform(
+            INTENSIDAD_MIN, INTENSIDAD_MAX, size=(cantidad, pasos + 1))
+        intensidades[:, 0] = self.intensidad_actual
+        base = np.array([self.multiplicadores.get(e, 1.0) for e in estados])
+        base = base[trayectorias]
+        multiplicadores = base * (1.0 - 0.5 * intensidades * (1.0 - base))
+
+        return (multiplicadores * (finales - iniciales)).sum(axis=1) / duracion
@@ -0,0 +1,208 @@
+"""
+distancias.py.
+
+Oráculo de distancias reales (caminando) sobre
+la matriz de tiles de la ciudad, tomando en cuenta
+los edificios ("B") que no se pueden atravesar.
+
+La Simulacion lo construye una vez por partida, la
+primera vez que un CPU pide una distancia (los CPU
+fáciles nunca lo hacen). En mapas pequeños se guarda
+la tabla completa de distancias entre todas las
+casillas (consulta O(1)), y en mapas grandes se usan "landmarks" (ALT) con
+BFS desde unas pocas casillas, lo que da una cota
+inferior de la distancia real en O(k). Para moverse
+hacia un objetivo la cota no basta, así que
+distancia_exacta hace un BFS desde ese destino y lo
+guarda (pocos destinos, en orden LRU).
+"""
+
+from array import array
+from collections import OrderedDict, deque
+
+# Máximo de casillas para guardar la tabla completa (n^2 enteros);
+# con 1024 casillas tardaba más de medio segundo en construirse.
+MAX_CELDAS_TABLA = 256
+# Cantidad de landmarks para mapas grandes.
+NUM_LANDMARKS = 8
+# BFS por destino que se guardan para distancia_exacta.
+MAX_DESTINOS = 16
+
+SIN_CAMINO = -1
+
+
+class OraculoDistancias:
+    """Responde distancias reales entre casillas del mapa."""
+
+    def __init__(self, tiles, max_celdas_tabla=MAX_CELDAS_TABLA,
+                 num_landmarks=NUM_LANDMARKS):
+        """
+        Construye el oráculo recorriendo el mapa con BFS.
+
+        Args:
+            tiles (list): Matriz del mapa
+            max_celdas_tabla (int): Límite de casillas para la tabla completa
+            num_landmarks (int): Landmarks a usar en mapas grandes
+        """
+        self.ancho = len(tiles[0]) if tiles else 0
+        self.alto = len(tiles)
+        self.caminable = [tiles[y][x] != "B"
+                          for y in range(self.alto)
+                          for x in range(self.ancho)]
+        self.total_caminables = sum(self.caminable)
+
+        self.tabla = None
+        self.landmarks = []
+        self.distancias_landmarks = []
+        self.por_destino = OrderedDict()  # casilla -> BFS desde ella.
+
+        if self.total_caminables <= max_celdas_tabla:
+            self._construir_tabla_completa()
+        else:
+            self._construir_landmarks(num_landmarks)
+
+    @property
+    def es_exacto(self):
+        """Indica si las distancias retornadas son exactas."""
+        return self.tabla is not None
+
+    def _bfs(self, origen):
+        """Retorna un array con la distancia desde origen a cada casilla."""
+        ancho, alto = self.ancho, self.alto
+        caminable = self.caminable
+        dist = array("i", [SIN_CAMINO]) * (ancho * alto)
+        dist[origen] = 0
+        cola = deque([origen])
+
+        while cola:
+            actual = cola.popleft()
+            siguiente = dist[actual] + 1
+            x = actual % ancho
+
+            if x > 0:
+                vecino = actual - 1
+                if caminable[vecino] and dist[vecino] == SIN_CAMINO:
+                    dist[vecino] = siguiente
+                    cola.append(vecino)
+            if x < ancho - 1:
+                vecino = actual + 1
+                if caminable[vecino] and dist[vecino] == SIN_CAMINO:
+                    dist[vecino] = siguiente
+                    cola.append(vecino)
+            if actual >= ancho:
+                vecino = actual - ancho
+                if caminable[vecino] and dist[vecino] == SIN_CAMINO:
+                    dist[vecino] = siguiente
+                    cola.append(vecino)
+            if actual < ancho * (alto - 1):
+                vecino = actual + ancho
+                if caminable[vecino] and dist[vecino] == SIN_CAMINO:
+                    dist[vecino] = siguiente
+                    cola.append(vecino)
+
+        return dist
+
+    def _construir_tabla_completa(self):
+        """Hace un BFS desde cada casilla caminable (todas las parejas)."""
+        self.tabla = [self._bfs(i) if self.caminable[i] else None
+                      for i in range(self.ancho * self.alto)]
+
+    def _construir_landmarks(self, num_landmarks):
+        """Elige landmarks alejados entre sí y guarda sus BFS."""
+        inicial = next(
+            (i for i, libre in enumerate(self.caminable) if libre), None)
+        if inicial is None:
+            return
+
+        # Se toma como primer landmark la casilla más lejana a la inicial.
+        lejanias = self._bfs(inicial)
+        candidato = max(range(len(lejanias)), key=lejanias.__getitem__)
+
+        for _ in range(num_landmarks):
+            dist = self._bfs(candidato)
+            if not self.landmarks:
+                lejanias = array("i", dist)
+            else:
+                # Distancia al landmark más cercano, actualizada con el
+                # nuevo BFS (O(N) por landmark en vez de O(k*N)).
+                for i, d in enumerate(dist):
+                    if d < lejanias[i]:
+                        lejanias[i] = d
+            self.landmarks.append(candidato)
+            self.distancias_landmarks.append(dist)
+
+            # Siguiente landmark: la casilla más lejana a los ya elegidos.
+            candidato = max(range(len(lejanias)), key=lejanias.__getitem__)
+            if lejanias[candidato] <= 0:
+                break
+
+    def distancia(self, origen, destino):
+        """
+        Retorna la distancia caminando entre dos casillas.
+
+        Args:
+            origen (tuple): Posición (x, y)
+            destino (tuple): Posición (x, y)
+
+        Returns:
+            float: Distancia exacta (tabla), cota inferior (landmarks),
+            Manhattan si alguna casilla es edificio o está fuera del
+            mapa, o inf si no hay camino entre ellas
+        """
+        x1, y1 = origen
+        x2, y2 = destino
+        manhattan = abs(x1 - x2) + abs(y1 - y2)
+
+        if not (0 <= x1 < self.ancho and 0 <= y1 < self.alto and
+                0 <= x2 < self.ancho and 0 <= y2 < self.alto):
+            return manhattan
+
+        i = y1 * self.ancho + x1
+        j = y2 * self.ancho + x2
+        if not (self.caminable[i] and self.caminable[j]):
+            return manhattan
+
+        if self.tabla is not None:
+            d = self.tabla[i][j]
+            return float('inf') if d == SIN_CAMINO else d
+
+        desde_destino = self.por_destino.get(j)
+        if desde_destino is not None:
+            d = desde_destino[i]
+            return float('inf') if d == SIN_CAMINO else d
+
+        mejor = manhattan
+        for dist in self.distancias_landmarks:
+            di, dj = dist[i], dist[j]
+            if (di == SIN_CAMINO) != (dj == SIN_CAMINO):
+                return float('inf')  # Componentes distintas.
+            if di != SIN_CAMINO:
+                cota = abs(di - dj)
+                if cota > mejor:
+                    mejor = cota
+        return mejor
+
+    def distancia_exacta(self, origen, destino):
+        """
+        Igual que distancia, pero sin cotas en mapas grandes.
+
+        Sin tabla completa hace un BFS desde el destino (O(N))
+        la primera vez y lo guarda; las consultas siguientes
+        hacia ese destino son O(1).
+        """
+        x2, y2 = destino
+        if (self.tabla is None and 0 <= x2 < self.ancho and
+                0 <= y2 < self.alto):
+            j = y2 * self.ancho + x2
+            if j in self.por_destino:
+                self.por_destino.move_to_end(j)
+            elif self.caminable[j]:
+                self.por_destino[j] = self._bfs(j)
+                if len(self.por_destino) > MAX_DESTINOS:
+                    self.por_destino.popitem(last=False)
+        return self.distancia(origen, destino)
+
+
+def construir_oraculo(tiles, **kwargs):
+    """Construye el oráculo de distancias de un mapa."""
+    return OraculoDistancias(tiles, **kwargs)
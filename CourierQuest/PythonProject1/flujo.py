@@ -0,0 +1,178 @@
+"""
+flujo.py.
+
+Campos de flujo compartidos para los jugadores CPU.
+
+En vez de que cada CPU haga su propio A* hacia el
+mismo destino, se hace un solo Dijkstra "al revés"
+desde el destino y se guarda, para cada casilla, el
+siguiente paso del camino más corto. Así cualquier
+cantidad de CPU lee su siguiente paso en O(1).
+
+Los campos se calculan cuando un pedido aparece en
+el mapa (para su recogida y su entrega) y se sueltan
+cuando el pedido termina. El clima multiplica el
+costo de todas las casillas por igual, así que no
+cambia los caminos y no hace falta recalcular.
+
+Cada Simulacion tiene su propio servicio y se lo
+pasa a sus CPU; al terminar la partida se libera
+junto con ella.
+"""
+
+from array import array
+from collections import OrderedDict
+from heapq import heappush, heappop
+
+# Costo de entrar a cada tipo de casilla (igual que en el A* del CPU).
+COSTOS = {'C': 1.0, 'P': 0.95}
+# Máximo de campos sin pedidos activos que se guardan.
+MAX_CAMPOS_LIBRES = 64
+
+SIN_PASO = -1
+
+
+class CampoFlujo:
+    """Siguiente paso hacia un destino desde cada casilla del mapa."""
+
+    def __init__(self, tiles, destino):
+        """
+        Construye el campo con un Dijkstra desde el destino.
+
+        Args:
+            tiles (list): Matriz del mapa
+            destino (tuple): Posición (x, y) del destino
+        """
+        self.ancho = len(tiles[0]) if tiles else 0
+        self.alto = len(tiles)
+        self.destino = (destino[0], destino[1])
+        self.siguiente = array("i", [SIN_PASO]) * (self.ancho * self.alto)
+        self.distancia = array("d", [float('inf')]) * (self.ancho * self.alto)
+
+        x, y = self.destino
+        if not (0 <= x < self.ancho and 0 <= y < self.alto):
+            return
+        if tiles[y][x] == "B":
+            return
+        self._dijkstra(tiles, y * self.ancho + x)
+
+    def _dijkstra(self, tiles, origen):
+        """Recorre el mapa desde el destino guardando el siguiente paso."""
+        ancho, alto = self.ancho, self.alto
+        costos = [None if celda == "B" else COSTOS.get(celda, 1.0)
+                  for fila in tiles for celda in fila]
+        distancia, siguiente = self.distancia, self.siguiente
+        distancia[origen] = 0.0
+        frontera = [(0.0, origen)]
+
+        while frontera:
+            dist, actual = heappop(frontera)
+            if dist > distancia[actual]:
+                continue
+
+            # Desde un vecino, entrar a "actual" cuesta costos[actual].
+            nueva = dist + costos[actual]
+            x = actual % ancho
+            vecinos = []
+            if x > 0:
+                vecinos.append(actual - 1)
+            if x < ancho - 1:
+                vecinos.append(actual + 1)
+            if actual >= ancho:
+                vecinos.append(actual - ancho)
+            if actual < ancho * (alto - 1):
+                vecinos.append(actual + ancho)
+
+            for vecino in vecinos:
+                if costos[vecino] is not None and nueva < distancia[vecino]:
+                    distancia[vecino] = nueva
+                    siguiente[vecino] = actual
+                    heappush(frontera, (nueva, vecino))
+
+    def siguiente_paso(self, pos):
+        """
+        Retorna la casilla (x, y) a la que hay que moverse desde pos.
+
+        Returns:
+            tuple: Siguiente casilla, o None si pos es el destino,
+            está fuera del mapa o no tiene camino
+        """
+        x, y = pos
+        if not (0 <= x < self.ancho and 0 <= y < self.alto):
+            return None
+        paso = self.siguiente[y * self.ancho + x]
+        if paso == SIN_PASO:
+            return None
+        return paso % self.ancho, paso // self.ancho
+
+
+class ServicioCamposFlujo:
+    """Guarda los campos de flujo de los destinos activos de un mapa.
+
+    Cada destino lleva la cuenta de cuántos pedidos lo usan;
+    mientras sea mayor que cero el campo no se descarta. Los
+    campos sin pedidos se guardan en orden LRU hasta
+    max_campos_libres por si se vuelven a pedir.
+    """
+
+    def __init__(self, tiles, max_campos_libres=MAX_CAMPOS_LIBRES):
+        """Construye el servicio vacío para el mapa dado."""
+        self.tiles = tiles
+        self.max_campos_libres = max_campos_libres
+        self.campos = {}             # destino -> CampoFlujo en uso.
+        self.referencias = {}        # destino -> pedidos que lo usan.
+        self.libres = OrderedDict()  # destino -> CampoFlujo sin uso.
+
+    def __len__(self):
+        """Cantidad de campos guardados."""
+        return len(self.campos) + len(self.libres)
+
+    def obtener(self, destino):
+        """Retorna el campo hacia destino, calculándolo si no existe."""
+        destino = (destino[0], destino[1])
+        campo = self.campos.get(destino)
+        if campo is not None:
+            return campo
+
+        campo = self.libres.get(destino)
+        if campo is not None:
+            self.libres.move_to_end(destino)
+            return campo
+
+        campo = CampoFlujo(self.tiles, destino)
+        self._guardar_libre(destino, campo)
+        return campo
+
+    def reservar(self, destino):
+        """Un pedido empieza a usar el destino: se calcula su campo."""
+        destino = (destino[0], destino[1])
+        if destino not in self.campos:
+            campo = self.libres.pop(destino, None)
+            if campo is None:
+                campo = CampoFlujo(self.tiles, destino)
+            self.campos[destino] = campo
+        self.referencias[destino] = self.referencias.get(destino, 0) + 1
+
+    def soltar(self, destino):
+        """Un pedido dejó de usar el destino."""
+        destino = (destino[0], destino[1])
+        cantidad = self.referencias.get(destino, 0) - 1
+        if cantidad > 0:
+            self.referencias[destino] = cantidad
+            return
+
+        self.referencias.pop(destino, None)
+        campo = self.campos.pop(destino, None)
+        if campo is not None:
+            self._guardar_libre(destino, campo)
+
+    def _guardar_libre(self, destino, campo):
+        """Guarda un campo sin uso, sacando el más viejo si hay muchos."""
+        self.libres[destino] = campo
+        self.libres.move_to_end(destino)
+        while len(self.libres) > self.max_campos_libres:
+            self.libres.popitem(last=False)
+
+    def siguiente_paso(self, pos, destino):
+        """Atajo para obtener(destino).siguiente_paso(pos)."""
+        return self.obtener(destino).siguiente_paso(pos)
@@ -9,17 +9,22 @@ entregar, entre otros).
 """
 
 import time
-from collections import deque  # Para utilizar colas
+from clases import Inventario  # Cola con peso y prioridad máxima.
 
 
 class Jugador:
     """Clase para crear un objeto Jugador."""
 
-    def __init__(self, x, y, capacidad=10):
-        """Construye el objeto jugador con su direccion (x,y) y variables."""
+    def __init__(self, x, y, capacidad=10, reloj=time.time):
+        """Construye el objeto jugador con su direccion (x,y) y variables.
+
+        El reloj es la función que da el tiempo actual en segundos,
+        se puede cambiar por un reloj simulado.
+        """
+        self.reloj = reloj
         self.x = x           # Ubicación del personaje.
         self.y = y
-        self.inventario = deque()   # Inventario en cola.
+        self.inventario = Inventario()   # Inventario en cola.
         self.resistencia = 100
         self.max_resistencia = 100
         self.puntaje = 0
@@ -28,7 +33,7 @@ class Jugador:
         self.ticks_sin_mover = 0
         self.capacidad = capacidad
         self.bloqueado = False
-        self.ultimo_recupero = time.time()
+        self.ultimo_recupero = self.reloj()
         self.mensaje = ""
         self.mensaje_tiempo = 0
         # Entregas
@@ -36,10 +41,15 @@ class Jugador:
         self.cancelaciones = 0
         self.entregas_tempranas = 0
         self.entregas_tardias = 0
+        # Funciones opcionales que se llaman con cada pedido que
+        # entra al inventario y con cada uno que sale de él
+        # (entregado o cancelado).
+        self.al_recoger_pedido = None
+        self.al_finalizar_pedido = None
 
     def peso_total(self):
-        """Calcula el peso total actual del jugador."""
-        return sum(p.weight for p in self.inventario)
+        """Retorna el peso total actual del jugador (se lleva en O(1))."""
+        return self.inventario.peso_total
 
     def calcular_multiplicador_velocidad(self, clima_mult, mapa_tiles):
         """Calcula el multiplicador de velocidad usando la fórmula completa.
@@ -116,13 +126,13 @@ class Jugador:
         # Bloquear si se queda sin resistencia.
         if self.resistencia <= 0:
             self.bloqueado = True
-            self.ultimo_recupero = time.time()
+            self.ultimo_recupero = self.reloj()
 
         return True
 
     def recuperar(self):
         """Maneja la recuperación de la resistencia del jugador."""
-        ahora = time.time()
+        ahora = self.reloj()
         if ahora - self.ultimo_recupero >= 1:  # Cada segundo
             puntos_recuperacion = 5  # 5 puntos por segundo según PDF
             self.resistencia = min(
@@ -135,17 +145,19 @@ class Jugador:
 
     def recoger_pedido(self, pedido):
         """Recoge pedidos en el inventario si hay capacidad."""
-        pedido.tiempo_recogido = time.time()
+        pedido.tiempo_recogido = self.reloj()
 
         if self.peso_total() + pedido.weight <= self.capacidad:
             self.inventario.append(pedido)
             self.mensaje = f"Pedido recogido (Peso: {pedido.weight})"
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = self.reloj()
+            if self.al_recoger_pedido:
+                self.al_recoger_pedido(pedido)
             return True
         else:
             self.mensaje = \
                 f"Capacidad insuficiente (Peso necesario: {pedido.weight})"
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = self.reloj()
             return False
 
     def cancelar_ultimo_pedido(self):
@@ -157,11 +169,13 @@ class Jugador:
             self.mensaje = \
                 (f"Pedido cancelado (-4 reputación)"
                  f" Peso liberado: {pedido_cancelado.weight}")
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = self.reloj()
+            if self.al_finalizar_pedido:
+                self.al_finalizar_pedido(pedido_cancelado)
             return pedido_cancelado
         else:
             self.mensaje = "No hay pedidos para cancelar"
-            self.mensaje_tiempo = time.time()
+            self.mensaje_tiempo = self.reloj()
             return None
 
     def entregar_pedido(self):
@@ -169,78 +183,77 @@ class Jugador:
         if not self.inventario:
             return None
 
-        # Encuentra el pedido de mayor prioridad disponible para entregar.
-        max_priority = max(p.priority for p in self.inventario)
-        pedidos_prioridad_max =\
-            [p for p in self.inventario if p.priority == max_priority]
-
-        # Revisar si el jugador está en el dropoff.
-        # De algún pedido de mayor prioridad.
-        for p in pedidos_prioridad_max:
-            if [self.x, self.y] == p.dropoff:
-                self.inventario.remove(p)
-
-                # Calcular tiempo de entrega.
-                tiempo_transcurrido =\
-                    time.time() - getattr(p, "tiempo_recogido", time.time())
-
-                # Sistema de reputación mejorado con bonos.
-                if tiempo_transcurrido <= 20:  # Entrega puntual (≤20s).
-                    if (tiempo_transcurrido
-                            <= 16):  # Entrega temprana (≥20% antes de 20s).
-                        self.reputacion = min(100, self.reputacion + 5)
-                        self.entregas_tempranas += 1
-                        self.mensaje = "Entrega TEMPRANA! +5 reputación"
-                    else:
-                        self.reputacion = min(100, self.reputacion + 3)
-                        self.mensaje = "Entrega puntual +3 reputación"
+        # Revisar si el jugador está en el dropoff
+        # de algún pedido de mayor prioridad (búsqueda en el índice).
+        p = self.inventario.entregable_en((self.x, self.y))
+        if p is not None:
+            self.inventario.remove(p)
+
+            # Calcular tiempo de entrega.
+            ahora = self.reloj()
+            recogido = p.tiempo_recogido
+            tiempo_transcurrido = \
+                ahora - (recogido if recogido is not None else ahora)
+
+            # Sistema de reputación mejorado con bonos.
+            if tiempo_transcurrido <= 20:  # Entrega puntual (≤20s).
+                if (tiempo_transcurrido
+                        <= 16):  # Entrega temprana (≥20% antes de 20s).
+                    self.reputacion = min(100, self.reputacion + 5)
+                    self.entregas_tempranas += 1
+                    self.mensaje = "Entrega TEMPRANA! +5 reputación"
                 else:
-                    # Entregas tardías con penalizaciones escaladas.
-                    if (tiempo_transcurrido <= 50):
-                        # 21-50s (Equivalente a ≤30s en escala real).
-                        self.reputacion = max(0, self.reputacion - 2)
-                        self.mensaje =\
-                            "Entrega ligeramente tardía -2 reputación"
-                    elif (tiempo_transcurrido
-                          <= 140):  # 51-140s (equivalente a 31-120s).
-                        self.reputacion = max(0, self.reputacion - 5)
-                        self.mensaje = "Entrega tardía -5 reputación"
-                    else:  # >140s (equivalente a >120s).
-                        self.reputacion = max(0, self.reputacion - 10)
-                        self.mensaje = "Entrega MUY tardía -10 reputación"
-
-                    self.entregas_tardias += 1
-
-                # Aplicar pago base.
-                pago_base = p.payout
-                self.puntaje += pago_base
-
-                # Bonus de 5% si reputación >= 90.
-                bonus = 0
-                if self.reputacion >= 90:
-                    bonus = int(pago_base * 0.05)
-                    self.puntaje += bonus
-                    self.mensaje += f" +{bonus} bonus reputación"
-
-                self.entregas_completadas += 1
-                self.mensaje_tiempo = time.time()
-
-                # Sistema de rachas.
-                # (bonus cada 3 entregas puntuales consecutivas).
-                if hasattr(self, 'racha_entregas_puntuales'):
-                    if tiempo_transcurrido <= 20:
-                        self.racha_entregas_puntuales += 1
-                        if self.racha_entregas_puntuales >= 3:
-                            self.reputacion = min(100, self.reputacion + 2)
-                            self.mensaje += " +2 bonus racha!"
-                            self.racha_entregas_puntuales = 0
-                    else:
+                    self.reputacion = min(100, self.reputacion + 3)
+                    self.mensaje = "Entrega puntual +3 reputación"
+            else:
+                # Entregas tardías con penalizaciones escaladas.
+                if (tiempo_transcurrido <= 50):
+                    # 21-50s (Equivalente a ≤30s en escala real).
+                    self.reputacion = max(0, self.reputacion - 2)
+                    self.mensaje =\
+                        "Entrega ligeramente tardía -2 reputación"
+                elif (tiempo_transcurrido
+                      <= 140):  # 51-140s (equivalente a 31-120s).
+                    self.reputacion = max(0, self.reputacion - 5)
+                    self.mensaje = "Entrega tardía -5 reputación"
+                else:  # >140s (equivalente a >120s).
+                    self.reputacion = max(0, self.reputacion - 10)
+                    self.mensaje = "Entrega MUY tardía -10 reputación"
+
+                self.entregas_tardias += 1
+
+            # Aplicar pago base.
+            pago_base = p.payout
+            self.puntaje += pago_base
+
+            # Bonus de 5% si reputación >= 90.
+            bonus = 0
+            if self.reputacion >= 90:
+                bonus = int(pago_base * 0.05)
+                self.puntaje += bonus
+                self.mensaje += f" +{bonus} bonus reputación"
+
+            self.entregas_completadas += 1
+            self.mensaje_tiempo = self.reloj()
+
+            # Sistema de rachas.
+            # (bonus cada 3 entregas puntuales consecutivas).
+            if hasattr(self, 'racha_entregas_puntuales'):
+                if tiempo_transcurrido <= 20:
+                    self.racha_entregas_puntuales += 1
+                    if self.racha_entregas_puntuales >= 3:
+                        self.reputacion = min(100, self.reputacion + 2)
+                        self.mensaje += " +2 bonus racha!"
                         self.racha_entregas_puntuales = 0
                 else:
-                    self.racha_entregas_puntuales =\
-                        1 if tiempo_transcurrido <= 20 else 0
+                    self.racha_entregas_puntuales = 0
+            else:
+                self.racha_entregas_puntuales =\
+                    1 if tiempo_transcurrido <= 20 else 0
 
-                return p
+            if self.al_finalizar_pedido:
+                self.al_finalizar_pedido(p)
+            return p
 
         # No se puede entregar porque hay pedido de mayor prioridad.
         return None
@@ -264,7 +277,7 @@ class Jugador:
                 lista[j + 1] = lista[j]
                 j -= 1
             lista[j + 1] = actual
-        self.inventario = deque(lista)  # Convierte nuevamente a queue.
+        self.inventario = Inventario(lista)  # Convierte nuevamente a cola.
         return list(self.inventario)
 
     def obtener_estadisticas(self):
@@ -15,7 +15,8 @@ from jugador import Jugador
 class JugadorCPU(Jugador):
     """Clase para jugadores controlados por IA."""
 
-    def __init__(self, x, y, dificultad='facil', capacidad=10):
+    def __init__(self, x, y, dificultad='facil', capacidad=10,
+                 reloj=time.time):
         """
         Construye un jugador CPU.
 
@@ -24,13 +25,14 @@ class JugadorCPU(Jugador):
             y (int): Posición inicial Y
             dificultad (str): 'facil', 'medio', o 'dificil'
             capacidad (int): Capacidad de carga máxima
+            reloj (callable): Función que retorna el tiempo actual
         """
-        super().__init__(x, y, capacidad)
+        super().__init__(x, y, capacidad, reloj)
         self.dificultad = dificultad
         self.es_cpu = True
         self.objetivo_actual = None
         self.tipo_objetivo = None
-        self.ultimo_cambio_objetivo = time.time()
+        self.ultimo_cambio_objetivo = self.reloj()
         self.tiempo_cambio_objetivo = 5
 
         # CORRECCIÓN: Iniciar con tiempo negativo para moverse inmediatamente
@@ -44,6 +46,20 @@ class JugadorCPU(Jugador):
         else:  # dificil
             self.intervalo_movimiento = 0.1
 
+        # Ruta A* en caché: se sigue mientras siga siendo válida.
+        self.ruta_actual = None
+        self.indices_ruta = {}
+        self.ruta_objetivo = None
+        self.ruta_clima_mult = None
+        self.umbral_clima_ruta = 0.05
+
+        # Oráculo de distancias reales. La Simulacion asigna
+        # obtener_oraculo, que lo construye solo cuando se usa.
+        self.oraculo = None
+        self.obtener_oraculo = None
+        # Campos de flujo compartidos; los asigna la Simulacion.
+        self.flujo = None
+
         print(f"CPU creado: dif={dificultad}, pos=({x},{y}), intervalo={self.intervalo_movimiento}s")
 
     def actualizar(self, pedidos_activos, mapa, clima_mult, consumo_clima):
@@ -51,12 +67,12 @@ class JugadorCPU(Jugador):
         Actualiza el estado del CPU y ejecuta su lógica de decisión.
 
         Args:
-            pedidos_activos (list): Lista de pedidos disponibles
+            pedidos_activos (PedidosActivos): Pedidos disponibles en el mapa
             mapa (list): Matriz del mapa
             clima_mult (float): Multiplicador del clima
             consumo_clima (float): Consumo extra por clima
         """
-        ahora = time.time()
+        ahora = self.reloj()
 
         # Recuperar resistencia
         self.recuperar()
@@ -98,7 +114,7 @@ class JugadorCPU(Jugador):
         Returns:
             bool: True si se realizó algún movimiento
         """
-        ahora = time.time()
+        ahora = self.reloj()
 
         # Verificar recolección automática
         self._verificar_recoleccion(pedidos_activos)
@@ -192,12 +208,12 @@ class JugadorCPU(Jugador):
         if self.inventario and random.random() < 0.7:
             # 70% prioridad a entregar si tiene pedidos
             pedido = random.choice(list(self.inventario))
-            self.objetivo_actual = tuple(pedido.dropoff)
+            self.objetivo_actual = pedido.dropoff
             self.tipo_objetivo = 'dropoff'
         elif pedidos_activos and len(self.inventario) < self.capacidad:
             # Recoger nuevo pedido
             pedido = random.choice(pedidos_activos)
-            self.objetivo_actual = tuple(pedido.pickup)
+            self.objetivo_actual = pedido.pickup
             self.tipo_objetivo = 'pickup'
         else:
             self.objetivo_actual = None
@@ -219,7 +235,7 @@ class JugadorCPU(Jugador):
 
             if score > mejor_score:
                 mejor_score = score
-                mejor_objetivo = tuple(pedido.dropoff)
+                mejor_objetivo = pedido.dropoff
                 mejor_tipo = 'dropoff'
 
         # Evaluar pedidos disponibles (si hay espacio)
@@ -232,7 +248,7 @@ class JugadorCPU(Jugador):
 
                     if score > mejor_score:
                         mejor_score = score
-                        mejor_objetivo = tuple(pedido.pickup)
+                        mejor_objetivo = pedido.pickup
                         mejor_tipo = 'pickup'
 
         self.objetivo_actual = mejor_objetivo
@@ -253,7 +269,7 @@ class JugadorCPU(Jugador):
             mejor_pedido = self._evaluar_mejor_pedido(
                 pedidos_activos, mapa, clima_mult)
             if mejor_pedido:
-                self.objetivo_actual = tuple(mejor_pedido.pickup)
+                self.objetivo_actual = mejor_pedido.pickup
                 self.tipo_objetivo = 'pickup'
 
     def _evaluar_mejor_movimiento(self, mapa):
@@ -279,7 +295,8 @@ class JugadorCPU(Jugador):
 
             distancia = self._calcular_distancia(
                 nueva_x, nueva_y,
-                self.objetivo_actual[0], self.objetivo_actual[1])
+                self.objetivo_actual[0], self.objetivo_actual[1],
+                exacta=True)
 
             if distancia < menor_distancia:
                 menor_distancia = distancia
@@ -291,19 +308,82 @@ class JugadorCPU(Jugador):
         """
         Calcula el siguiente paso usando algoritmo A*.
 
+        Si el mapa tiene servicio de campos de flujo, el paso se
+        lee del campo compartido del objetivo en O(1). La ruta
+        guardada en caché solo se usa sin campos de flujo (un CPU
+        usado fuera de una Simulacion) o si el campo no tiene
+        camino: se sigue y solo se vuelve a planificar si cambió
+        el objetivo, el CPU se salió de la ruta, la siguiente
+        casilla quedó bloqueada o el clima cambió más que el
+        umbral.
+
         Returns:
             tuple: (x, y) del siguiente paso o None
         """
         if not self.objetivo_actual:
             return None
 
+        if self.flujo is not None:
+            siguiente = self.flujo.siguiente_paso(
+                (self.x, self.y), self.objetivo_actual)
+            if siguiente:
+                return siguiente
+
+        siguiente = self._siguiente_paso_en_cache(mapa, clima_mult)
+        if siguiente:
+            return siguiente
+
         ruta = self._astar(
             (self.x, self.y), self.objetivo_actual, mapa, clima_mult)
+        self._guardar_ruta(ruta, clima_mult)
 
         if ruta and len(ruta) > 1:
             return ruta[1]  # Retornar el siguiente paso
         return None
 
+    def _siguiente_paso_en_cache(self, mapa, clima_mult):
+        """
+        Retorna el siguiente paso de la ruta guardada si sigue siendo válida.
+
+        Returns:
+            tuple: (x, y) del siguiente paso o None si hay que replanificar
+        """
+        if not self.ruta_actual or self.ruta_objetivo != self.objetivo_actual:
+            return None
+
+        if abs(clima_mult - self.ruta_clima_mult) > self.umbral_clima_ruta:
+            return None
+
+        indice = self.indices_ruta.get((self.x, self.y))
+        if indice is None or indice + 1 >= len(self.ruta_actual):
+            return None
+
+        nx, ny = self.ruta_actual[indice + 1]
+        if not (0 <= nx < len(mapa[0]) and 0 <= ny < len(mapa)):
+            return None
+        if mapa[ny][nx] == 'B':
+            return None
+
+        return nx, ny
+
+    def _guardar_ruta(self, ruta, clima_mult):
+        """Guarda la ruta calculada junto con la clave con la que se obtuvo."""
+        if not ruta:
+            self.invalidar_ruta()
+            return
+
+        self.ruta_actual = ruta
+        self.indices_ruta = {pos: i for i, pos in enumerate(ruta)}
+        self.ruta_objetivo = self.objetivo_actual
+        self.ruta_clima_mult = clima_mult
+
+    def invalidar_ruta(self):
+        """Descarta la ruta guardada para forzar una nueva búsqueda."""
+        self.ruta_actual = None
+        self.indices_ruta = {}
+        self.ruta_objetivo = None
+        self.ruta_clima_mult = None
+
     def _astar(self, inicio, objetivo, mapa, clima_mult):
         """
         Implementa algoritmo A* para encontrar ruta óptima.
@@ -386,7 +466,7 @@ class JugadorCPU(Jugador):
             return []
 
         secuencia = []
-        pendientes = [tuple(p.dropoff) for p in self.inventario]
+        pendientes = [p.dropoff for p in self.inventario]
         actual = (self.x, self.y)
 
         while pendientes:
@@ -456,13 +536,12 @@ class JugadorCPU(Jugador):
 
     def _verificar_recoleccion(self, pedidos_activos):
         """Verifica y recoge pedidos automáticamente."""
-        for pedido in list(pedidos_activos):
-            if [self.x, self.y] == pedido.pickup:
-                if self.recoger_pedido(pedido):
-                    pedidos_activos.remove(pedido)
-                    self.objetivo_actual = tuple(pedido.dropoff)
-                    self.tipo_objetivo = 'dropoff'
-                    print(f"CPU recogió pedido en ({self.x},{self.y})")
+        for pedido in list(pedidos_activos.pedidos_en((self.x, self.y))):
+            if self.recoger_pedido(pedido):
+                pedidos_activos.remove(pedido)
+                self.objetivo_actual = pedido.dropoff
+                self.tipo_objetivo = 'dropoff'
+                print(f"CPU recogió pedido en ({self.x},{self.y})")
 
     def _verificar_entrega(self):
         """Verifica y entrega pedidos automáticamente."""
@@ -472,6 +551,18 @@ class JugadorCPU(Jugador):
             self.tipo_objetivo = None
             print(f"CPU entregó pedido en ({self.x},{self.y}) - ${self.puntaje}")
 
-    def _calcular_distancia(self, x1, y1, x2, y2):
-        """Calcula distancia Manhattan entre dos puntos."""
+    def _calcular_distancia(self, x1, y1, x2, y2, exacta=False):
+        """
+        Calcula la distancia caminando entre dos puntos.
+
+        Usa el oráculo de distancias del mapa si existe,
+        si no, la distancia Manhattan. Con exacta=True no se
+        usan cotas (para elegir el paso hacia el objetivo).
+        """
+        if self.oraculo is None and self.obtener_oraculo is not None:
+            self.oraculo = self.obtener_oraculo()
+        if self.oraculo is not None:
+            if exacta:
+                return self.oraculo.distancia_exacta((x1, y1), (x2, y2))
+            return self.oraculo.distancia((x1, y1), (x2, y2))
         return abs(x1 - x2) + abs(y1 - y2)
\ No newline at end of file
@@ -3,31 +3,153 @@ mapa.py.
 
 Se encarga de cargar el mapa directamente
 de la API, y dibujarlo en la pantalla.
+
+El mapa se dibuja una sola vez en una superficie
+fuera de pantalla y cada frame se copia solo la parte
+visible. En mapas muy grandes se mantiene un búfer del
+tamaño de la vista y, al mover la cámara, solo se dibuja
+la franja nueva que queda expuesta.
 """
 
 import pygame
 
+# Tamaño máximo (en píxeles) de la superficie con el mapa completo.
+MAX_PIXELES_SUPERFICIE = 4096 * 4096
+
+_renderizador = None
+
+
+def cargar_datos_mapa(api):
+    """Retorna todos los datos del mapa de la API (tiles, start_time...)."""
+    return api.obtener_mapa()["data"]
+
 
 def cargar_mapa(api):
     """Recibe el mapa de la api por parámetro."""
-    ciudad_data = api.obtener_mapa()["data"]
-    return ciudad_data["tiles"]
+    return cargar_datos_mapa(api)["tiles"]
+
+
+class RenderizadorMapa:
+    """Guarda el mapa pre-dibujado para no dibujar tile por tile."""
+
+    def __init__(self, tiles, colors, tile_size, imagenes=None,
+                 max_pixeles=MAX_PIXELES_SUPERFICIE):
+        """Construye el renderizador y pre-dibuja el mapa si cabe."""
+        self.tiles = tiles
+        self.colors = colors
+        self.tile_size = tile_size
+        self.imagenes = imagenes
+
+        ancho_px = len(tiles[0]) * tile_size
+        alto_px = len(tiles) * tile_size
+
+        # Modo superficie completa.
+        self.superficie = None
+        # Modo búfer de vista (mapas muy grandes).
+        self.vista = None
+        self.vista_cam = None
+
+        if ancho_px * alto_px <= max_pixeles:
+            self.superficie = pygame.Surface((ancho_px, alto_px))
+            self._dibujar_region(self.superficie, 0, 0,
+                                 0, 0, len(tiles[0]), len(tiles))
+
+    def _dibujar_tile(self, destino, tile, screen_x, screen_y):
+        """Dibuja un tile en la superficie destino."""
+        if self.imagenes and tile in self.imagenes:
+            destino.blit(self.imagenes[tile], (screen_x, screen_y))
+        else:
+            pygame.draw.rect(
+                destino, self.colors.get(tile, (255, 0, 0)),
+                (screen_x, screen_y, self.tile_size, self.tile_size))
+
+    def _dibujar_region(self, destino, origen_x, origen_y,
+                        x0, y0, ancho, alto):
+        """Dibuja los tiles de una región del mapa.
+
+        (x0, y0) es la esquina de la región en tiles y
+        (origen_x, origen_y) el tile que corresponde a la
+        esquina superior izquierda de la superficie destino.
+        """
+        for y in range(y0, y0 + alto):
+            for x in range(x0, x0 + ancho):
+                self._dibujar_tile(
+                    destino, self.tiles[y][x],
+                    (x - origen_x) * self.tile_size,
+                    (y - origen_y) * self.tile_size)
+
+    def _actualizar_vista(self, cam_x, cam_y, view_width, view_height):
+        """Actualiza el búfer de vista dibujando solo lo que cambió."""
+        tamano = (view_width * self.tile_size, view_height * self.tile_size)
+
+        if self.vista is None or self.vista.get_size() != tamano:
+            self.vista = pygame.Surface(tamano)
+            self.vista_cam = None
+
+        if self.vista_cam == (cam_x, cam_y):
+            return
+
+        if self.vista_cam is None:
+            dx, dy = view_width, view_height
+        else:
+            dx = cam_x - self.vista_cam[0]
+            dy = cam_y - self.vista_cam[1]
+
+        if abs(dx) >= view_width or abs(dy) >= view_height:
+            self._dibujar_region(self.vista, cam_x, cam_y,
+                                 cam_x, cam_y, view_width, view_height)
+        else:
+            self.vista.scroll(-dx * self.tile_size, -dy * self.tile_size)
+
+            # Columnas nuevas (izquierda o derecha).
+            if dx > 0:
+                self._dibujar_region(self.vista, cam_x, cam_y,
+                                     cam_x + view_width - dx, cam_y,
+                                     dx, view_height)
+            elif dx < 0:
+                self._dibujar_region(self.vista, cam_x, cam_y,
+                                     cam_x, cam_y, -dx, view_height)
+
+            # Filas nuevas (arriba o abajo).
+            if dy > 0:
+                self._dibujar_region(self.vista, cam_x, cam_y,
+                                     cam_x, cam_y + view_height - dy,
+                                     view_width, dy)
+            elif dy < 0:
+                self._dibujar_region(self.vista, cam_x, cam_y,
+                                     cam_x, cam_y, view_width, -dy)
+
+        self.vista_cam = (cam_x, cam_y)
+
+    def dibujar(self, screen, cam_x, cam_y, view_width, view_height):
+        """Copia la parte visible del mapa a la pantalla."""
+        if self.superficie is not None:
+            area = pygame.Rect(cam_x * self.tile_size,
+                               cam_y * self.tile_size,
+                               view_width * self.tile_size,
+                               view_height * self.tile_size)
+            screen.blit(self.superficie, (0, 0), area)
+            return
+
+        self._actualizar_vista(cam_x, cam_y, view_width, view_height)
+        screen.blit(self.vista, (0, 0))
+
+
+def obtener_renderizador(tiles, colors, tile_size, imagenes=None):
+    """Retorna el renderizador del mapa, creándolo si cambió algo."""
+    global _renderizador
+
+    r = _renderizador
+    if (r is None or r.tiles is not tiles or r.colors is not colors
+            or r.tile_size != tile_size or r.imagenes is not imagenes):
+        _renderizador = RenderizadorMapa(tiles, colors, tile_size, imagenes)
+
+    return _renderizador
 
 
 def dibujar_mapa(screen, tiles, colors, cam_x,
                  cam_y, tile_size, view_width,
                  view_height, imagenes=None):
     """Dibuja el mapa en la pantalla."""
-    for y in range(cam_y, cam_y + view_height):
-        for x in range(cam_x, cam_x + view_width):
-            tile = tiles[y][x]
-
-            screen_x = (x - cam_x) * tile_size
-            screen_y = (y - cam_y) * tile_size
-
-            if imagenes and tile in imagenes:
-                screen.blit(imagenes[tile], (screen_x, screen_y))
-            else:
-                pygame.draw.rect(
-                    screen, colors.get(tile, (255, 0, 0)),
-                    (screen_x, screen_y, tile_size, tile_size))
+    renderizador = obtener_renderizador(tiles, colors, tile_size, imagenes)
+    renderizador.dibujar(screen, cam_x, cam_y, view_width, view_height)
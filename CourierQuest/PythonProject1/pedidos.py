@@ -3,9 +3,14 @@ pedidos.py.
 
 Se encarga de la aparición de los pedidos
 en el mapa del juego.
+
+IndiceOcupacion mantiene las casillas ocupadas y,
+para cada casilla, cuántas ocupadas tiene alrededor
+(dentro de la separación mínima). Así se sabe en O(1)
+si una casilla es válida y se puede elegir una al azar
+sin recorrer todo el mapa en cada pedido nuevo.
 """
 
-from collections import deque
 from clases import Pedido
 import random
 
@@ -27,12 +32,140 @@ def obtener_casillas_libres(mapa, ocupadas=None):
     return casillas_libres
 
 
+class IndiceOcupacion:
+    """Índice de casillas ocupadas que se actualiza incrementalmente.
+
+    Se puede usar donde se usaba el set de ocupadas
+    (soporta "in", add e iteración).
+    """
+
+    def __init__(self, mapa, separacion=4, ocupadas=()):
+        """
+        Construye el índice.
+
+        Args:
+            mapa (list): Matriz del mapa
+            separacion (int): Casillas alrededor que deben estar libres
+            ocupadas (iterable): Casillas (x, y) ocupadas al inicio
+        """
+        self.mapa = mapa
+        self.ancho = len(mapa[0])
+        self.alto = len(mapa)
+        self.separacion = separacion
+
+        # Veces que se ocupó cada casilla (varios pedidos pueden compartirla).
+        self.conteo = {}
+        # Casillas ocupadas dentro de la ventana de separación de cada una.
+        self.cercanas = [0] * (self.ancho * self.alto)
+
+        # Casillas válidas en una lista (para elegir al azar en O(1))
+        # y su posición en la lista (para quitarlas en O(1)).
+        self.validas = []
+        self.indice_validas = {}
+        for y in range(self.alto):
+            for x in range(self.ancho):
+                if mapa[y][x] != "B":
+                    self._agregar_valida((x, y))
+
+        for pos in ocupadas:
+            self.ocupar(pos)
+
+    def __contains__(self, pos):
+        """Indica si la casilla está ocupada."""
+        return tuple(pos) in self.conteo
+
+    def __iter__(self):
+        """Itera sobre las casillas ocupadas."""
+        return iter(self.conteo)
+
+    def __len__(self):
+        """Cantidad de casillas ocupadas."""
+        return len(self.conteo)
+
+    def _agregar_valida(self, pos):
+        """Agrega la casilla a las válidas."""
+        self.indice_validas[pos] = len(self.validas)
+        self.validas.append(pos)
+
+    def _quitar_valida(self, pos):
+        """Quita la casilla de las válidas (cambiándola por la última)."""
+        i = self.indice_validas.pop(pos, None)
+        if i is None:
+            return
+        ultima = self.validas.pop()
+        if ultima != pos:
+            self.validas[i] = ultima
+            self.indice_validas[ultima] = i
+
+    def _ventana(self, pos):
+        """Retorna las casillas dentro de la separación de pos."""
+        x0, y0 = pos
+        sep = self.separacion
+        for y in range(max(0, y0 - sep), min(self.alto, y0 + sep + 1)):
+            for x in range(max(0, x0 - sep), min(self.ancho, x0 + sep + 1)):
+                yield x, y
+
+    def ocupar(self, pos):
+        """Marca la casilla como ocupada."""
+        pos = tuple(pos)
+        if pos in self.conteo:
+            self.conteo[pos] += 1
+            return
+        self.conteo[pos] = 1
+
+        for x, y in self._ventana(pos):
+            i = y * self.ancho + x
+            self.cercanas[i] += 1
+            if self.cercanas[i] == 1:
+                self._quitar_valida((x, y))
+
+    add = ocupar
+
+    def liberar(self, pos):
+        """Libera la casilla (si se ocupó varias veces, resta una)."""
+        pos = tuple(pos)
+        veces = self.conteo.get(pos)
+        if not veces:
+            return
+        if veces > 1:
+            self.conteo[pos] = veces - 1
+            return
+        del self.conteo[pos]
+
+        for x, y in self._ventana(pos):
+            i = y * self.ancho + x
+            self.cercanas[i] -= 1
+            if self.cercanas[i] == 0 and self.mapa[y][x] != "B":
+                self._agregar_valida((x, y))
+
+    def es_valida(self, pos):
+        """Indica si la casilla es libre y respeta la separación."""
+        return tuple(pos) in self.indice_validas
+
+    def posicion_aleatoria(self):
+        """Retorna una casilla válida al azar o None si no hay."""
+        if not self.validas:
+            return None
+        return random.choice(self.validas)
+
+
 def asignar_posicion_aleatoria(mapa, ocupadas, separacion=4):
     """Asigna una posición aleatoria libre respetando la separación mínima.
 
+    Si ocupadas es un IndiceOcupacion con la misma separación,
+    la posición se obtiene del índice sin recorrer el mapa.
+
     Returns:
         [x, y] si encuentra posición, None si no hay espacio
     """
+    if (isinstance(ocupadas, IndiceOcupacion)
+            and ocupadas.separacion == separacion):
+        pos = ocupadas.posicion_aleatoria()
+        if pos is None:
+            return None
+        ocupadas.ocupar(pos)
+        return [pos[0], pos[1]]
+
     casillas_libres = obtener_casillas_libres(mapa, ocupadas)
     random.shuffle(casillas_libres)
     # Mezclar para obtener posiciones aleatorias.
@@ -56,90 +189,88 @@ def asignar_posicion_aleatoria(mapa, ocupadas, separacion=4):
     return None
 
 
+def _buscar_valida_cercana(indice, x0, y0):
+    """Busca la casilla válida más cercana a (x0, y0).
+
+    Recorre anillos de distancia Manhattan creciente y se detiene
+    en el primero que tenga una casilla válida; cada revisión es
+    O(1) gracias al índice.
+
+    Returns:
+        tuple: (x, y) de la casilla o None si no hay ninguna válida
+    """
+    if not indice.validas:
+        return None
+
+    for d in range(1, indice.ancho + indice.alto + 1):
+        for dx in range(-d, d + 1):
+            resto = d - abs(dx)
+            for dy in ((resto, -resto) if resto else (0,)):
+                pos = (x0 + dx, y0 + dy)
+                if indice.es_valida(pos):
+                    return pos
+    return None
+
+
 def reubicar_pedidos(pedidos, mapa, ocupadas=None, separacion=4):
     """Reubica los pedidos.
 
         Al hacerlo evita casillas bloqueadas u ocupadas,
         con separación mínima de 4.
 
+        Las casillas ocupadas se llevan en un IndiceOcupacion
+        (que sabe cuántas ocupadas tiene cada casilla alrededor),
+        así cada reubicación es una sola búsqueda hacia afuera
+        que termina en la primera casilla válida.
+
         Args:
         pedidos (list): Lista de dicts con claves "pickup" y "dropoff".
         mapa (list): Matriz del mapa.
-        ocupadas (set): Conjunto de tuplas (x, y) de casillas ocupadas.
+        ocupadas (set | IndiceOcupacion): Casillas (x, y) ocupadas.
         separacion (int): Número mínimo de
         casillas alrededor que deben estar libres.
         """
-    if ocupadas is None:
-        ocupadas = set()
+    if (isinstance(ocupadas, IndiceOcupacion)
+            and ocupadas.separacion == separacion):
+        indice = ocupadas
+        externas = None
+    else:
+        if ocupadas is None:
+            ocupadas = set()
+        indice = IndiceOcupacion(mapa, separacion, ocupadas)
+        externas = ocupadas  # Se mantiene actualizado el set recibido.
+
+    def marcar(pos):
+        indice.ocupar(pos)
+        if externas is not None:
+            externas.add(pos)
 
     for p in pedidos:
         for punto in ["pickup", "dropoff"]:
             x0, y0 = p[punto]
 
-            if mapa[y0][x0] == "B" or (x0, y0) in ocupadas:
-                visitados = set()
-                cola = deque([(x0, y0)])
-                encontrado = False
-                intentos = 0
-                max_intentos = len(mapa) * len(mapa[0])
-
-                while cola and not encontrado and intentos < max_intentos:
-                    intentos += 1
-                    x, y = cola.popleft()
-
-                    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < len(mapa[0]) and 0 <= ny < len(mapa):
-                            if (nx, ny) not in visitados:
-                                visitados.add((nx, ny))
-
-                                libre = (
-                                        mapa[ny][nx] != "B"
-                                        and (nx, ny) not in ocupadas
-                                )
-
-                                if libre and separacion > 0:
-                                    for sx in range(
-                                            -separacion, separacion + 1):
-                                        for sy in range(
-                                                -separacion, separacion + 1):
-                                            tx, ty = nx + sx, ny + sy
-                                            if (0 <= tx < len(mapa[0])
-                                                    and 0 <= ty < len(mapa)):
-                                                if (tx, ty) in ocupadas:
-                                                    libre = False
-                                                    break
-                                        if not libre:
-                                            break
-
-                                if libre:
-                                    p[punto] = [nx, ny]
-                                    ocupadas.add((nx, ny))
-                                    encontrado = True
-                                    break
-                                else:
-                                    cola.append((nx, ny))
+            if mapa[y0][x0] == "B" or (x0, y0) in indice:
+                nueva = _buscar_valida_cercana(indice, x0, y0)
 
                 # Si no se encontró lugar, mover a casilla libre cercana
-                if not encontrado:
+                if nueva is None:
                     for dx in range(-3, 4):
                         for dy in range(-3, 4):
                             nx, ny = x0 + dx, y0 + dy
                             if 0 <= nx < len(mapa[0]) and 0 <= ny < len(mapa):
                                 if mapa[ny][nx] != "B":
-                                    p[punto] = [nx, ny]
-                                    ocupadas.add((nx, ny))
-                                    encontrado = True
+                                    nueva = (nx, ny)
                                     break
-                        if encontrado:
+                        if nueva is not None:
                             break
+
+                if nueva is not None:
+                    p[punto] = [nueva[0], nueva[1]]
+                    marcar(nueva)
             else:
-                ocupadas.add((x0, y0))
+                marcar((x0, y0))
 
 
 def crear_objetos_pedidos(pedidos_data):
     """Crea y retorna los pedidos tomándolos de la API."""
-    return [Pedido(p["pickup"], p["dropoff"],
-                   p.get("weight", 1), p.get("priority", 0),
-                   p.get("payout", 100)) for p in
-            pedidos_data]
+    return [Pedido.desde_dict(p) for p in pedidos_data]
@@ -5,13 +5,171 @@ Maneja la persistencia del juego para
 guardar y cargar datos y también maneja
 un registro de los movimientos del jugador
 para volver a un estado anterior.
+
+Las partidas se guardan en un formato binario
+propio (no pickle): un encabezado fijo con los
+metadatos y luego el estado codificado con struct,
+opcionalmente comprimido con zlib. Para listar
+los guardados basta con leer los encabezados.
+
+Los puntajes se agregan a una base SQLite (nunca se
+borran) con índices para el top y el mejor puntaje
+de cada jugador; SQLite se encarga de que varios
+procesos puedan guardar a la vez sin dañar el archivo.
+
+"GuardadoAutomatico" guarda la partida cada cierto
+tiempo en un hilo aparte, para que escribir el archivo
+no detenga el juego.
 """
 
-import pickle
 import json
 import os
+import queue
+import sqlite3
+import struct
+import threading
 import time
+import zlib
 from datetime import datetime
+from clases import Pedido
+
+# Encabezado: firma, versión, banderas, timestamp, fecha ISO,
+# largo del contenido y CRC32 del contenido.
+FIRMA_GUARDADO = b"CQSV"
+VERSION_GUARDADO = 2
+ENCABEZADO = struct.Struct("<4sHHd32sII")
+BANDERA_ZLIB = 1
+
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_LARGO = struct.Struct("<I")
+_CAMPOS_PEDIDO = Pedido.__slots__
+
+
+def _codificar(valor, partes):
+    """Agrega a partes los bytes del valor (una etiqueta + datos)."""
+    if valor is None:
+        partes.append(b"N")
+    elif valor is True:
+        partes.append(b"T")
+    elif valor is False:
+        partes.append(b"F")
+    elif isinstance(valor, int):
+        partes.append(b"i" + _INT.pack(valor))
+    elif isinstance(valor, float):
+        partes.append(b"d" + _FLOAT.pack(valor))
+    elif isinstance(valor, str):
+        datos = valor.encode("utf-8")
+        partes.append(b"s" + _LARGO.pack(len(datos)))
+        partes.append(datos)
+    elif isinstance(valor, Pedido):
+        partes.append(b"P")
+        for campo in _CAMPOS_PEDIDO:
+            _codificar(getattr(valor, campo), partes)
+    elif isinstance(valor, dict):
+        partes.append(b"m" + _LARGO.pack(len(valor)))
+        for clave, elemento in valor.items():
+            _codificar(clave, partes)
+            _codificar(elemento, partes)
+    elif isinstance(valor, (list, tuple)):
+        etiqueta = b"t" if isinstance(valor, tuple) else b"l"
+        partes.append(etiqueta + _LARGO.pack(len(valor)))
+        for elemento in valor:
+            _codificar(elemento, partes)
+    else:
+        raise TypeError(f"No se puede guardar {type(valor).__name__}")
+
+
+def _decodificar(datos, pos=0):
+    """Lee un valor desde pos; retorna (valor, nueva posición)."""
+    etiqueta = datos[pos:pos + 1]
+    pos += 1
+    if etiqueta == b"N":
+        return None, pos
+    if etiqueta == b"T":
+        return True, pos
+    if etiqueta == b"F":
+        return False, pos
+    if etiqueta == b"i":
+        return _INT.unpack_from(datos, pos)[0], pos + _INT.size
+    if etiqueta == b"d":
+        return _FLOAT.unpack_from(datos, pos)[0], pos + _FLOAT.size
+    if etiqueta == b"P":
+        valores = []
+        for _ in _CAMPOS_PEDIDO:
+            valor, pos = _decodificar(datos, pos)
+            valores.append(valor)
+        pedido = Pedido.__new__(Pedido)
+        for campo, valor in zip(_CAMPOS_PEDIDO, valores):
+            setattr(pedido, campo, valor)
+        return pedido, pos
+
+    largo = _LARGO.unpack_from(datos, pos)[0]
+    pos += _LARGO.size
+    if etiqueta == b"s":
+        return datos[pos:pos + largo].decode("utf-8"), pos + largo
+    if etiqueta == b"m":
+        resultado = {}
+        for _ in range(largo):
+            clave, pos = _decodificar(datos, pos)
+            resultado[clave], pos = _decodificar(datos, pos)
+        return resultado, pos
+    if etiqueta in (b"l", b"t"):
+        elementos = []
+        for _ in range(largo):
+            elemento, pos = _decodificar(datos, pos)
+            elementos.append(elemento)
+        if etiqueta == b"t":
+            return tuple(elementos), pos
+        return elementos, pos
+    raise ValueError(f"Etiqueta desconocida {etiqueta!r}")
+
+
+def codificar_estado(estado):
+    """Convierte el estado del juego (dicts, listas, Pedido...) a bytes."""
+    partes = []
+    _codificar(estado, partes)
+    return b"".join(partes)
+
+
+def decodificar_estado(datos):
+    """Operación inversa de codificar_estado."""
+    estado, pos = _decodificar(datos)
+    if pos != len(datos):
+        raise ValueError("Datos sobrantes en el guardado")
+    return estado
+
+
+def leer_encabezado(f):
+    """
+    Lee el encabezado de un guardado abierto en modo binario.
+
+    Returns:
+        dict: version, comprimido, timestamp, fecha_guardado,
+        largo y crc del contenido
+
+    Raises:
+        ValueError: Si el archivo no es un guardado válido
+    """
+    datos = f.read(ENCABEZADO.size)
+    if len(datos) < ENCABEZADO.size:
+        raise ValueError("Encabezado incompleto")
+
+    firma, version, banderas, timestamp, fecha, largo, crc = \
+        ENCABEZADO.unpack(datos)
+    if firma != FIRMA_GUARDADO:
+        raise ValueError("No es un archivo de guardado")
+    if version > VERSION_GUARDADO:
+        raise ValueError(f"Versión de guardado no soportada: {version}")
+
+    return {
+        'version': version,
+        'comprimido': bool(banderas & BANDERA_ZLIB),
+        'timestamp': timestamp,
+        'fecha_guardado': fecha.rstrip(b"\0").decode("ascii"),
+        'largo': largo,
+        'crc': crc,
+    }
 
 
 class SistemaPersistencia:
@@ -29,7 +187,9 @@ class SistemaPersistencia:
         """
         self.carpeta_saves = "saves"
         self.carpeta_data = "data"
-        self.archivo_puntajes = "data/puntajes.json"
+        self.archivo_puntajes = "data/puntajes.json"  # Formato anterior.
+        self.archivo_base_puntajes = "data/puntajes.db"
+        self._conexion = None
         self.crear_carpetas()
 
     def crear_carpetas(self):
@@ -38,20 +198,40 @@ class SistemaPersistencia:
             if not os.path.exists(carpeta):
                 os.makedirs(carpeta)
 
-    def guardar_juego(self, estado_juego, slot=1):
-        """Guarda el estado del juego en un archivo."""
+    def guardar_juego(self, estado_juego, slot=1, comprimir=True):
+        """
+        Guarda el estado del juego en un archivo.
+
+        Args:
+            estado_juego (dict): Estado a guardar (dicts, listas,
+                números, textos y Pedido)
+            slot (int): Espacio de guardado (1-5)
+            comprimir (bool): Comprimir el contenido con zlib
+        """
         archivo = f"{self.carpeta_saves}/slot{slot}.sav"
 
         try:
-            datos_guardado = {
-                'timestamp': time.time(),
-                'fecha_guardado': datetime.now().isoformat(),
-                'version': '1.0',
-                'estado_juego': estado_juego
-            }
-
-            with open(archivo, 'wb') as f:
-                pickle.dump(datos_guardado, f)
+            contenido = codificar_estado(estado_juego)
+            banderas = 0
+            if comprimir:
+                contenido = zlib.compress(contenido, 1)
+                banderas |= BANDERA_ZLIB
+
+            fecha = datetime.now().isoformat(timespec="seconds")
+            encabezado = ENCABEZADO.pack(
+                FIRMA_GUARDADO, VERSION_GUARDADO, banderas, time.time(),
+                fecha.encode("ascii"), len(contenido),
+                zlib.crc32(contenido))
+
+            # Se escribe en un temporal y se reemplaza el slot al final,
+            # así un cierre inesperado nunca deja el guardado a medias.
+            temporal = archivo + ".tmp"
+            with open(temporal, 'wb') as f:
+                f.write(encabezado)
+                f.write(contenido)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, archivo)
 
             print(f"Juego guardado exitosamente en {archivo}")
             return True
@@ -70,11 +250,18 @@ class SistemaPersistencia:
 
         try:
             with open(archivo, 'rb') as f:
-                datos = pickle.load(f)
+                encabezado = leer_encabezado(f)
+                contenido = f.read(encabezado['largo'])
+
+            if (len(contenido) != encabezado['largo'] or
+                    zlib.crc32(contenido) != encabezado['crc']):
+                raise ValueError("El guardado está dañado")
+            if encabezado['comprimido']:
+                contenido = zlib.decompress(contenido)
 
             print(f"Juego cargado desde {archivo}")
-            print(f"Guardado el: {datos['fecha_guardado']}")
-            return datos['estado_juego']
+            print(f"Guardado el: {encabezado['fecha_guardado']}")
+            return decodificar_estado(contenido)
 
         except Exception as e:
             print(f"Error al cargar juego: {e}")
@@ -89,23 +276,107 @@ class SistemaPersistencia:
             if os.path.exists(archivo):
                 try:
                     with open(archivo, 'rb') as f:
-                        datos = pickle.load(f)
+                        encabezado = leer_encabezado(f)
 
                     guardados.append({
                         'slot': i,
-                        'fecha': datos['fecha_guardado'],
-                        'timestamp': datos['timestamp']
+                        'fecha': encabezado['fecha_guardado'],
+                        'timestamp': encabezado['timestamp']
                     })
-                except (pickle.UnpicklingError, EOFError, OSError) as e:
+                except (ValueError, OSError) as e:
                     print(f"Error al leer {archivo}: {e}")
                     continue
 
         return guardados
 
+    def _base_puntajes(self):
+        """Abre (una sola vez) la base de puntajes y la prepara."""
+        if self._conexion is not None:
+            return self._conexion
+
+        conexion = sqlite3.connect(self.archivo_base_puntajes, timeout=10)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute("PRAGMA journal_mode=WAL")
+        with conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS puntajes ("
+                " id INTEGER PRIMARY KEY,"
+                " nombre TEXT NOT NULL,"
+                " puntaje INTEGER NOT NULL,"
+                " fecha TEXT NOT NULL,"
+                " timestamp REAL NOT NULL,"
+                " datos_extra TEXT)")
+            conexion.execute(
+                "CREATE INDEX IF NOT EXISTS idx_puntajes_top"
+                " ON puntajes (puntaje DESC, timestamp)")
+            conexion.execute(
+                "CREATE INDEX IF NOT EXISTS idx_puntajes_jugador"
+                " ON puntajes (nombre, puntaje DESC)")
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS meta ("
+                " clave TEXT PRIMARY KEY, valor TEXT)")
+
+        self._conexion = conexion
+        self._migrar_puntajes_json()
+        return conexion
+
+    def _migrar_puntajes_json(self):
+        """Pasa a la base los puntajes de puntajes.json (una sola vez)."""
+        conexion = self._conexion
+        with conexion:
+            # BEGIN IMMEDIATE: solo un proceso hace la migración.
+            conexion.execute("BEGIN IMMEDIATE")
+            migrado = conexion.execute(
+                "SELECT valor FROM meta WHERE clave = 'migrado_json'"
+            ).fetchone()
+            if migrado is not None:
+                return
+
+            puntajes = []
+            if os.path.exists(self.archivo_puntajes):
+                try:
+                    with open(self.archivo_puntajes, 'r',
+                              encoding='utf-8') as f:
+                        puntajes = json.load(f)
+                except Exception as e:
+                    print(f"Error al migrar puntajes: {e}")
+
+            for puntaje in puntajes:
+                self._insertar_puntaje(conexion, dict(puntaje))
+            conexion.execute(
+                "INSERT INTO meta (clave, valor) VALUES ('migrado_json', ?)",
+                (str(len(puntajes)),))
+
+    @staticmethod
+    def _insertar_puntaje(conexion, puntaje):
+        """Inserta un dict de puntaje (nombre, puntaje, fecha...)."""
+        nombre = puntaje.pop('nombre')
+        valor = puntaje.pop('puntaje')
+        fecha = puntaje.pop('fecha', datetime.now().isoformat())
+        timestamp = puntaje.pop('timestamp', time.time())
+        conexion.execute(
+            "INSERT INTO puntajes (nombre, puntaje, fecha, timestamp,"
+            " datos_extra) VALUES (?, ?, ?, ?, ?)",
+            (nombre, valor, fecha, timestamp,
+             json.dumps(puntaje, ensure_ascii=False) if puntaje else None))
+
+    @staticmethod
+    def _fila_a_puntaje(fila):
+        """Convierte una fila de la base al dict de siempre."""
+        puntaje = {
+            'nombre': fila['nombre'],
+            'puntaje': fila['puntaje'],
+            'fecha': fila['fecha'],
+            'timestamp': fila['timestamp']
+        }
+        if fila['datos_extra']:
+            puntaje.update(json.loads(fila['datos_extra']))
+        return puntaje
+
     def guardar_puntaje(
             self, nombre_jugador, puntaje_final,
             datos_extra=None):
-        """Guarda un puntaje al archivo .json."""
+        """Agrega un puntaje a la base (en una transacción)."""
         nuevo_puntaje = {
             'nombre': nombre_jugador,
             'puntaje': puntaje_final,
@@ -116,17 +387,10 @@ class SistemaPersistencia:
         if datos_extra:
             nuevo_puntaje.update(datos_extra)
 
-        puntajes = self.cargar_puntajes()
-
-        puntajes.append(nuevo_puntaje)
-
-        puntajes.sort(key=lambda x: x['puntaje'], reverse=True)
-
-        puntajes = puntajes[:10]
-
         try:
-            with open(self.archivo_puntajes, 'w', encoding='utf-8') as f:
-                json.dump(puntajes, f, indent=2, ensure_ascii=False)
+            conexion = self._base_puntajes()
+            with conexion:
+                self._insertar_puntaje(conexion, nuevo_puntaje)
 
             print(f"Puntaje guardado: {puntaje_final} puntos")
             return True
@@ -135,24 +399,46 @@ class SistemaPersistencia:
             print(f"Error al guardar puntaje: {e}")
             return False
 
-    def cargar_puntajes(self):
-        """Lee puntajes.json y devuelve puntajes guardados."""
-        if not os.path.exists(self.archivo_puntajes):
-            return []
+    def cargar_puntajes(self, limite=10, nombre=None):
+        """
+        Devuelve los mejores puntajes, de mayor a menor.
 
+        Args:
+            limite (int): Cantidad máxima de puntajes
+            nombre (str): Si se indica, solo los de ese jugador
+        """
         try:
-            with open(self.archivo_puntajes, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            conexion = self._base_puntajes()
+            if nombre is None:
+                filas = conexion.execute(
+                    "SELECT * FROM puntajes"
+                    " ORDER BY puntaje DESC, timestamp LIMIT ?",
+                    (limite,))
+            else:
+                filas = conexion.execute(
+                    "SELECT * FROM puntajes WHERE nombre = ?"
+                    " ORDER BY puntaje DESC LIMIT ?",
+                    (nombre, limite))
+            return [self._fila_a_puntaje(fila) for fila in filas]
         except Exception as e:
             print(f"Error al cargar puntajes: {e}")
             return []
 
-    def obtener_mejor_puntaje(self):
-        """Devuelve el puntaje más alto en el archivo."""
-        puntajes = self.cargar_puntajes()
-        if puntajes:
-            return puntajes[0]['puntaje']
-        return 0
+    def obtener_mejor_puntaje(self, nombre=None):
+        """Devuelve el puntaje más alto (de todos o de un jugador)."""
+        try:
+            conexion = self._base_puntajes()
+            if nombre is None:
+                fila = conexion.execute(
+                    "SELECT MAX(puntaje) FROM puntajes").fetchone()
+            else:
+                fila = conexion.execute(
+                    "SELECT MAX(puntaje) FROM puntajes WHERE nombre = ?",
+                    (nombre,)).fetchone()
+        except Exception as e:
+            print(f"Error al cargar puntajes: {e}")
+            return 0
+        return fila[0] if fila[0] is not None else 0
 
     def calcular_puntaje_final(self, jugador, tiempo_total,
                                duracion_objetivo, meta_ingresos):
@@ -187,54 +473,208 @@ class SistemaPersistencia:
         }
 
 
+class GuardadoAutomatico:
+    """Guarda la partida cada cierto tiempo en segundo plano.
+
+    El bucle principal solo toma una foto del estado
+    (Simulacion.capturar_estado, que no comparte objetos con
+    la partida) y la deja en una cola de un solo lugar; el
+    hilo la codifica y la escribe. Si llega una foto nueva
+    antes de escribir la anterior, solo se guarda la nueva.
+    """
+
+    def __init__(self, persistencia, slot=5, intervalo=30,
+                 reloj=time.monotonic):
+        """
+        Construye el guardado automático (no lo inicia).
+
+        Args:
+            persistencia (SistemaPersistencia): Quién escribe el archivo
+            slot (int): Slot donde se guarda
+            intervalo (float): Segundos entre guardados
+            reloj (callable): Función que retorna el tiempo actual
+        """
+        self.persistencia = persistencia
+        self.slot = slot
+        self.intervalo = intervalo
+        self.reloj = reloj
+        self.proximo = reloj() + intervalo
+        self.pendientes = queue.Queue(maxsize=1)
+        self._hilo = None
+
+    def iniciar(self):
+        """Inicia el hilo que escribe los guardados."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._hilo = threading.Thread(
+            target=self._ejecutar, name="GuardadoAutomatico", daemon=True)
+        self._hilo.start()
+
+    def detener(self, espera=5.0):
+        """Termina el hilo después de escribir lo que esté pendiente."""
+        if self._hilo is None:
+            return
+        try:
+            # None indica que termine; se encola después del pendiente.
+            self.pendientes.put(None, timeout=espera)
+        except queue.Full:
+            pass
+        self._hilo.join(espera)
+        self._hilo = None
+
+    def _reemplazar_pendiente(self, elemento):
+        """Deja el elemento en la cola, descartando uno sin escribir."""
+        while True:
+            try:
+                self.pendientes.put_nowait(elemento)
+                return
+            except queue.Full:
+                try:
+                    self.pendientes.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def solicitar(self, estado):
+        """Pide guardar el estado (no espera a que se escriba)."""
+        self._reemplazar_pendiente(estado)
+
+    def actualizar(self, capturar_estado):
+        """
+        Si ya toca, captura el estado y pide guardarlo.
+
+        Args:
+            capturar_estado (callable): Retorna la foto del estado;
+                solo se llama cuando toca guardar
+
+        Returns:
+            bool: True si se pidió un guardado
+        """
+        ahora = self.reloj()
+        if ahora < self.proximo:
+            return False
+        self.proximo = ahora + self.intervalo
+        self.solicitar(capturar_estado())
+        return True
+
+    def _ejecutar(self):
+        """Bucle del hilo: escribe cada estado que llega."""
+        while True:
+            estado = self.pendientes.get()
+            if estado is None:
+                return
+            self.persistencia.guardar_juego(estado, self.slot)
+
+
 class HistorialMovimientos:
-    """Maneja un registro de los movimientos del jugador."""
+    """Maneja un registro de los movimientos del jugador.
+
+    Los estados se guardan en un buffer circular de tamaño
+    fijo (quitar el más viejo es O(1)). Cada entrada guarda
+    solo lo que cambió respecto al paso anterior: los valores
+    anteriores de los campos y los cambios que el inventario
+    y los pedidos activos anotaron al hacerse (agregados y
+    quitados con su posición), así que guardar un paso cuesta
+    O(cambios) y no copia nada. Deshacer revierte esos cambios
+    sobre los mismos objetos, en orden inverso.
+    """
+
+    CAMPOS = ('x', 'y', 'resistencia', 'puntaje', 'reputacion')
 
-    def __init__(self, max_pasos=50):
+    def __init__(self, max_pasos=2000):
         """Construye un historial vacío."""
-        self.historial = []
         self.max_pasos = max_pasos
+        self.entradas = [None] * max_pasos
+        self.siguiente = 0   # Posición donde se escribe la próxima.
+        self.cantidad = 0
+        self.campos = None   # Campos del último paso guardado.
+        self.inventario = None        # Colecciones que anotan cambios.
+        self.pedidos_activos = None
+
+    def __len__(self):
+        """Cantidad de estados guardados."""
+        return self.cantidad
+
+    @staticmethod
+    def _seguir(coleccion):
+        """Empieza a anotar los cambios de la colección."""
+        coleccion.cambios = []
+        return coleccion
+
+    @staticmethod
+    def _revertir(coleccion):
+        """Deshace los cambios anotados desde el último paso."""
+        cambios = coleccion.cambios
+        while cambios:
+            coleccion.deshacer_cambio(cambios.pop())
 
     def guardar_estado(
             self, jugador, pedidos_activos, tiempo):
         """Guarda el estado actual del jugador."""
-        estado = {
-            'jugador_x': jugador.x,
-            'jugador_y': jugador.y,
-            'resistencia': jugador.resistencia,
-            'puntaje': jugador.puntaje,
-            'reputacion': jugador.reputacion,
-            'inventario': list(jugador.inventario),
-            'pedidos_activos': pedidos_activos.copy(),
-            'timestamp': tiempo
-        }
+        campos = {campo: getattr(jugador, campo) for campo in self.CAMPOS}
+        campos['timestamp'] = tiempo
+
+        delta = None
+        if self.campos is not None:
+            # Si se cambió el objeto (por ejemplo, al ordenar el
+            # inventario), deshacer vuelve al objeto anterior.
+            delta = {
+                'campos': {campo: valor for campo, valor
+                           in self.campos.items()
+                           if campos[campo] != valor},
+                'inventario': (self.inventario,
+                               self.inventario.cambios),
+                'pedidos_activos': (self.pedidos_activos,
+                                    self.pedidos_activos.cambios)
+            }
+            if jugador.inventario is not self.inventario:
+                self.inventario.cambios = None
+            if pedidos_activos is not self.pedidos_activos:
+                self.pedidos_activos.cambios = None
 
-        self.historial.append(estado)
+        self.inventario = self._seguir(jugador.inventario)
+        self.pedidos_activos = self._seguir(pedidos_activos)
 
-        if len(self.historial) > self.max_pasos:
-            self.historial.pop(0)
+        # Si el buffer está lleno se sobrescribe la entrada más vieja.
+        self.entradas[self.siguiente] = delta
+        self.siguiente = (self.siguiente + 1) % self.max_pasos
+        self.cantidad = min(self.cantidad + 1, self.max_pasos)
+        self.campos = campos
 
     def deshacer(self, jugador, pedidos_activos):
         """Revierte al estado anterior si hay al menos 2."""
-        if len(self.historial) < 2:
+        if self.cantidad < 2:
             return False
 
-        self.historial.pop()
-        estado_anterior = self.historial[-1]
-
-        jugador.x = estado_anterior['jugador_x']
-        jugador.y = estado_anterior['jugador_y']
-        jugador.resistencia = estado_anterior['resistencia']
-        jugador.puntaje = estado_anterior['puntaje']
-        jugador.reputacion = estado_anterior['reputacion']
-        jugador.inventario = estado_anterior['inventario'].copy()
-
-        pedidos_activos.clear()
-        pedidos_activos.extend(estado_anterior['pedidos_activos'])
+        # Primero se deshace lo que cambió después del último paso.
+        self._revertir(self.inventario)
+        self._revertir(self.pedidos_activos)
+
+        self.siguiente = (self.siguiente - 1) % self.max_pasos
+        delta = self.entradas[self.siguiente]
+        self.entradas[self.siguiente] = None
+        self.cantidad -= 1
+
+        self.campos.update(delta['campos'])
+        for campo in self.CAMPOS:
+            setattr(jugador, campo, self.campos[campo])
+
+        for clave in ('inventario', 'pedidos_activos'):
+            coleccion, cambios = delta[clave]
+            getattr(self, clave).cambios = None
+            coleccion.cambios = cambios
+            self._revertir(coleccion)
+            setattr(self, clave, coleccion)
+        jugador.inventario = self.inventario
+
+        if pedidos_activos is not self.pedidos_activos:
+            pedidos_activos.clear()
+            pedidos_activos.extend(self.pedidos_activos)
+            self.pedidos_activos.cambios = None
+            self.pedidos_activos = self._seguir(pedidos_activos)
 
         print("Movimiento deshecho")
         return True
 
     def puede_deshacer(self):
         """Devuelve true si hay 2 estados guardados."""
-        return len(self.historial) >= 2
+        return self.cantidad >= 2
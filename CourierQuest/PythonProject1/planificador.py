@@ -0,0 +1,81 @@
+"""
+planificador.py.
+
+Cola de eventos con tiempo para los pedidos: cuándo
+un pedido queda disponible (release_time) y cuándo
+vence (deadline). Los eventos se guardan en un heap
+ordenado por tiempo, así en cada tick solo se sacan
+los que ya tocaron, sin revisar todos los pedidos.
+"""
+
+import heapq
+from datetime import datetime
+
+
+class PlanificadorPedidos:
+    """Cola de eventos (tiempo, tipo, pedido) ordenada por tiempo."""
+
+    def __init__(self):
+        """Construye el planificador vacío."""
+        self.eventos = []
+        self.secuencia = 0  # Desempata eventos con el mismo tiempo.
+
+    def __len__(self):
+        """Cantidad de eventos pendientes."""
+        return len(self.eventos)
+
+    def programar(self, tiempo, tipo, pedido):
+        """Agrega un evento para el tiempo dado."""
+        self.secuencia += 1
+        heapq.heappush(self.eventos, (tiempo, self.secuencia, tipo, pedido))
+
+    def proximo_tiempo(self):
+        """Retorna el tiempo del próximo evento o None si no hay."""
+        if self.eventos:
+            return self.eventos[0][0]
+        return None
+
+    def eventos_hasta(self, ahora):
+        """Saca y retorna, en orden, los eventos con tiempo <= ahora.
+
+        Returns:
+            list: Tuplas (tipo, pedido)
+        """
+        vencidos = []
+        while self.eventos and self.eventos[0][0] <= ahora:
+            _, _, tipo, pedido = heapq.heappop(self.eventos)
+            vencidos.append((tipo, pedido))
+        return vencidos
+
+
+def _a_fecha(valor):
+    """Convierte texto ISO o datetime a datetime sin zona horaria."""
+    if isinstance(valor, datetime):
+        fecha = valor
+    else:
+        fecha = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    return fecha.replace(tzinfo=None)
+
+
+def segundos_desde_inicio(valor, inicio_partida=None):
+    """
+    Convierte un release_time o deadline a segundos desde el inicio.
+
+    Args:
+        valor: Segundos (número) o fecha ISO
+        inicio_partida: Fecha (ISO o datetime) en que inicia la
+            partida, necesaria para convertir fechas
+
+    Returns:
+        float o None si no se puede convertir
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if inicio_partida is None:
+        return None
+    try:
+        return (_a_fecha(valor) - _a_fecha(inicio_partida)).total_seconds()
+    except (TypeError, ValueError):
+        return None
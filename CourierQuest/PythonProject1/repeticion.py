@@ -0,0 +1,389 @@
+"""
+repeticion.py.
+
+Graba y reproduce partidas completas. Se guardan
+las semillas, las respuestas de la API y las teclas
+de cada tick (flechas, q, i, t) junto con los ms que
+duró, además de los cambios de clima para verificar
+la reproducción. Todo va en un formato binario
+comprimido con zlib que ocupa pocos KB.
+
+Como la Simulacion lee el tiempo de un reloj y el
+azar de semillas, al repetir las mismas entradas
+se obtiene exactamente la misma partida, sin
+pantalla y tan rápido como se quiera.
+
+Uso:
+    python repeticion.py repeticiones/partida.cqr
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import struct
+import time
+import zlib
+from collections import deque
+
+from clima import SistemaClima
+from simulacion import Simulacion, RelojSimulado
+
+FIRMA_REPETICION = b"CQRP"
+VERSION_REPETICION = 1
+ENCABEZADO = struct.Struct("<4sHH")
+BANDERA_ZLIB = 1
+
+_FLOAT = struct.Struct("<d")
+
+# Código de cada tecla en el archivo.
+TECLAS = {
+    'izquierda': 1,
+    'derecha': 2,
+    'arriba': 3,
+    'abajo': 4,
+    'cancelar': 5,
+    'inventario': 6,
+    'estadisticas': 7,
+}
+_NOMBRES_TECLAS = {codigo: nombre for nombre, codigo in TECLAS.items()}
+
+# Acción de la Simulacion para cada tecla (inventario y
+# estadísticas solo cambian lo que se dibuja).
+ACCIONES_TECLAS = {
+    'izquierda': ('mover', -1, 0),
+    'derecha': ('mover', 1, 0),
+    'arriba': ('mover', 0, -1),
+    'abajo': ('mover', 0, 1),
+    'cancelar': ('cancelar',),
+}
+
+
+def acciones_de_teclas(teclas):
+    """Convierte las teclas de un tick en acciones para Simulacion.paso."""
+    return [ACCIONES_TECLAS[t] for t in teclas if t in ACCIONES_TECLAS]
+
+
+def _escribir_varint(salida, valor):
+    """Escribe un entero no negativo en 7 bits por byte."""
+    while valor >= 0x80:
+        salida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    salida.append(valor)
+
+
+def _leer_varint(datos, pos):
+    """Lee un varint; retorna (valor, nueva posición)."""
+    valor = 0
+    desplazamiento = 0
+    while True:
+        byte = datos[pos]
+        pos += 1
+        valor |= (byte & 0x7F) << desplazamiento
+        if byte < 0x80:
+            return valor, pos
+        desplazamiento += 7
+
+
+def _escribir_bytes(salida, datos):
+    """Escribe el largo (varint) y luego los bytes."""
+    _escribir_varint(salida, len(datos))
+    salida += datos
+
+
+def _leer_bytes(datos, pos):
+    """Lee bytes precedidos por su largo."""
+    largo, pos = _leer_varint(datos, pos)
+    return bytes(datos[pos:pos + largo]), pos + largo
+
+
+class _ApiGrabada:
+    """Envuelve el módulo api y graba cada respuesta que entrega."""
+
+    def __init__(self, api, grabador):
+        """Construye el envoltorio."""
+        self.api = api
+        self.grabador = grabador
+
+    def obtener_mapa(self):
+        """Igual que api.obtener_mapa, grabando la respuesta."""
+        return self.grabador.api("mapa", self.api.obtener_mapa())
+
+    def obtener_pedidos(self):
+        """Igual que api.obtener_pedidos, grabando la respuesta."""
+        return self.grabador.api("pedidos", self.api.obtener_pedidos())
+
+    def obtener_clima(self):
+        """Igual que api.obtener_clima, grabando la respuesta."""
+        return self.grabador.api("clima", self.api.obtener_clima())
+
+
+class GrabadorRepeticion:
+    """Graba en memoria una partida y la guarda al final."""
+
+    def __init__(self):
+        """Construye el grabador vacío."""
+        self.configuracion = {}
+        self.registros = bytearray()
+        self.ticks = 0
+
+    def envolver_api(self, api):
+        """Retorna un objeto como el módulo api que graba sus respuestas."""
+        return _ApiGrabada(api, self)
+
+    def configurar(self, **configuracion):
+        """Guarda semillas y parámetros de la partida (dificultad...)."""
+        self.configuracion.update(configuracion)
+
+    def api(self, recurso, datos):
+        """Graba una respuesta de la API y la retorna sin cambios."""
+        self.registros += b"A"
+        _escribir_bytes(self.registros, recurso.encode("utf-8"))
+        _escribir_bytes(self.registros,
+                        json.dumps(datos, separators=(",", ":"))
+                        .encode("utf-8"))
+        return datos
+
+    def tick(self, ms, teclas=()):
+        """Graba un tick: cuántos ms duró y qué teclas se presionaron."""
+        self.registros += b"T"
+        _escribir_varint(self.registros, int(ms))
+        _escribir_varint(self.registros, len(teclas))
+        self.registros += bytes(TECLAS[t] for t in teclas)
+        self.ticks += 1
+
+    def clima(self, estado, intensidad):
+        """Graba un cambio de clima (ocurrido en el último tick)."""
+        self.registros += b"C"
+        _escribir_bytes(self.registros, estado.encode("utf-8"))
+        self.registros += _FLOAT.pack(intensidad)
+
+    def guardar(self, ruta):
+        """Escribe la repetición comprimida (reemplazo atómico)."""
+        carpeta = os.path.dirname(ruta)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+
+        cuerpo = bytearray(b"I")
+        _escribir_bytes(cuerpo, json.dumps(self.configuracion)
+                        .encode("utf-8"))
+        cuerpo += self.registros
+
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as f:
+            f.write(ENCABEZADO.pack(FIRMA_REPETICION, VERSION_REPETICION,
+                                    BANDERA_ZLIB))
+            f.write(zlib.compress(bytes(cuerpo), 9))
+        os.replace(temporal, ruta)
+
+
+def leer_repeticion(ruta):
+    """
+    Lee un archivo de repetición.
+
+    Returns:
+        tuple: (configuración, lista de registros). Cada registro
+        es ('api', recurso, datos), ('tick', ms, teclas) o
+        ('clima', estado, intensidad)
+
+    Raises:
+        ValueError: Si el archivo no es una repetición válida
+    """
+    with open(ruta, "rb") as f:
+        encabezado = f.read(ENCABEZADO.size)
+        cuerpo = f.read()
+
+    if len(encabezado) < ENCABEZADO.size:
+        raise ValueError("Encabezado incompleto")
+    firma, version, banderas = ENCABEZADO.unpack(encabezado)
+    if firma != FIRMA_REPETICION:
+        raise ValueError("No es un archivo de repetición")
+    if version > VERSION_REPETICION:
+        raise ValueError(f"Versión de repetición no soportada: {version}")
+    if banderas & BANDERA_ZLIB:
+        cuerpo = zlib.decompress(cuerpo)
+
+    configuracion = {}
+    registros = []
+    pos = 0
+    while pos < len(cuerpo):
+        etiqueta = cuerpo[pos:pos + 1]
+        pos += 1
+        if etiqueta == b"I":
+            datos, pos = _leer_bytes(cuerpo, pos)
+            configuracion = json.loads(datos)
+        elif etiqueta == b"A":
+            recurso, pos = _leer_bytes(cuerpo, pos)
+            datos, pos = _leer_bytes(cuerpo, pos)
+            registros.append(('api', recurso.decode("utf-8"),
+                              json.loads(datos)))
+        elif etiqueta == b"T":
+            ms, pos = _leer_varint(cuerpo, pos)
+            cantidad, pos = _leer_varint(cuerpo, pos)
+            teclas = [_NOMBRES_TECLAS[c] for c in cuerpo[pos:pos + cantidad]]
+            pos += cantidad
+            registros.append(('tick', ms, teclas))
+        elif etiqueta == b"C":
+            estado, pos = _leer_bytes(cuerpo, pos)
+            intensidad = _FLOAT.unpack_from(cuerpo, pos)[0]
+            pos += _FLOAT.size
+            registros.append(('clima', estado.decode("utf-8"), intensidad))
+        else:
+            raise ValueError(f"Registro desconocido {etiqueta!r}")
+
+    return configuracion, registros
+
+
+class _ApiRepeticion:
+    """Entrega las respuestas iniciales grabadas, como el módulo api.
+
+    Cada consulta de un recurso entrega la siguiente respuesta
+    grabada de ese recurso, en el mismo orden que en la partida.
+    """
+
+    def __init__(self, registros):
+        """Construye con los registros ('api', recurso, datos)."""
+        self.respuestas = {}  # recurso -> deque de (orden, datos).
+        for orden, (_, recurso, datos) in enumerate(registros):
+            self.respuestas.setdefault(recurso, deque()).append(
+                (orden, datos))
+
+    def _obtener(self, recurso):
+        """Retorna una copia de la siguiente respuesta grabada."""
+        respuestas = self.respuestas.get(recurso)
+        if not respuestas:
+            raise ValueError(
+                f"La repetición no tiene respuesta de {recurso!r}")
+        _, datos = respuestas.popleft()
+        return json.loads(json.dumps(datos))
+
+    def sin_usar(self):
+        """Registros ('api', recurso, datos) que nadie pidió, en orden."""
+        restantes = sorted((orden, recurso, datos)
+                           for recurso, respuestas in self.respuestas.items()
+                           for orden, datos in respuestas)
+        return [('api', recurso, datos) for _, recurso, datos in restantes]
+
+    def obtener_mapa(self):
+        """Respuesta grabada del mapa."""
+        return self._obtener("mapa")
+
+    def obtener_pedidos(self):
+        """Respuesta grabada de los pedidos."""
+        return self._obtener("pedidos")
+
+    def obtener_clima(self):
+        """Respuesta grabada del clima."""
+        return self._obtener("clima")
+
+
+def reproducir(ruta, velocidad=None, hasta_tick=None, al_tick=None):
+    """
+    Reproduce una partida grabada sin pantalla.
+
+    Args:
+        ruta (str): Archivo de repetición
+        velocidad (float): Veces el tiempo real (None para ir lo
+            más rápido posible)
+        hasta_tick (int): Detenerse en este tick (para adelantar a
+            un momento de la partida)
+        al_tick (callable): Se llama como al_tick(simulacion, tick,
+            teclas) después de cada tick, por ejemplo para dibujar
+
+    Returns:
+        dict: Simulación final, ticks, divergencias de clima y
+        segundos reales que tomó
+    """
+    configuracion, registros = leer_repeticion(ruta)
+
+    # Las respuestas antes del primer tick se entregan en orden a la
+    # carga inicial; las que sobran (por ejemplo, el primer sondeo de
+    # pedidos) se aplican en el primer tick, como en la partida.
+    indice = 0
+    while indice < len(registros) and registros[indice][0] == 'api':
+        indice += 1
+    api_repeticion = _ApiRepeticion(registros[:indice])
+
+    reloj = RelojSimulado(configuracion["reloj_inicio"])
+    inicio_real = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        sistema_clima = SistemaClima(
+            api_repeticion, reloj=reloj,
+            semilla=configuracion["semilla_clima"])
+        ciudad_data = api_repeticion.obtener_mapa()["data"]
+        pedidos_data = api_repeticion.obtener_pedidos()["data"]
+
+        random.seed(configuracion["semilla"])
+        simulacion = Simulacion(
+            ciudad_data["tiles"], pedidos_data, sistema_clima,
+            dificultad_cpu=configuracion.get("dificultad_cpu"),
+            reloj=reloj,
+            meta_ingresos=configuracion.get("meta_ingresos", 5500),
+            inicio_partida=ciudad_data.get("start_time"))
+
+    pendientes = api_repeticion.sin_usar()
+    tick = 0
+    divergencias = 0
+    for registro in registros[indice:]:
+        if registro[0] == 'api':
+            pendientes.append(registro)
+            continue
+        if registro[0] == 'clima':
+            clima = simulacion.sistema_clima
+            if (clima.estado_actual, clima.intensidad_actual) != \
+                    registro[1:]:
+                divergencias += 1
+            continue
+
+        if hasta_tick is not None and tick >= hasta_tick:
+            break
+        _, ms, teclas = registro
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _, recurso, datos in pendientes:
+                if recurso == "pedidos":
+                    simulacion.agregar_pedidos(datos)
+            pendientes.clear()
+            simulacion.paso(acciones_de_teclas(teclas))
+
+        if al_tick is not None:
+            al_tick(simulacion, tick, teclas)
+        if velocidad:
+            time.sleep(ms / 1000 / velocidad)
+        reloj.avanzar(ms / 1000)
+        tick += 1
+
+    return {
+        'simulacion': simulacion,
+        'ticks': tick,
+        'divergencias_clima': divergencias,
+        'segundos_reales': time.perf_counter() - inicio_real,
+    }
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Reproduce una partida grabada de Courier Quest")
+    parser.add_argument("archivo", help="archivo .cqr de la repetición")
+    parser.add_argument("--velocidad", type=float, default=None,
+                        help="veces el tiempo real (por defecto, máxima)")
+    parser.add_argument("--hasta", type=int, default=None,
+                        help="tick en el que detenerse")
+    args = parser.parse_args()
+
+    resultado = reproducir(args.archivo, args.velocidad, args.hasta)
+    simulacion = resultado['simulacion']
+    print(f"Ticks: {resultado['ticks']}"
+          f" en {resultado['segundos_reales']:.2f} s")
+    print(f"Ganador: {simulacion.ganador}")
+    print(f"Dinero humano: {simulacion.jugador.puntaje}")
+    if simulacion.jugador_cpu:
+        print(f"Dinero CPU: {simulacion.jugador_cpu.puntaje}")
+    print(f"Divergencias de clima: {resultado['divergencias_clima']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,639 @@
+"""
+simulacion.py.
+
+Motor del juego sin pygame: maneja la aparición y
+liberación de pedidos, el clima, ambos jugadores y
+las condiciones de finalización.
+
+Todo el tiempo se lee de un reloj inyectable, así que
+con un RelojSimulado se pueden correr partidas completas
+en pasos fijos, mucho más rápido que en tiempo real.
+Main.py solo dibuja el estado y envía las acciones
+del jugador humano.
+
+Cada pedido aparece en el mapa en su release_time y
+sale del juego en su deadline (si todavía no se recogió);
+ambos momentos se manejan como eventos del planificador.
+Si el mapa ya tiene max_pedidos_activos pedidos (5 por
+defecto), los liberados esperan en la cola por prioridad
+y entran apenas se recoge o vence alguno.
+
+capturar_estado() y restaurar_estado() convierten la
+partida en datos simples (sin referencias repetidas a
+un mismo pedido) que persistencia guarda en binario.
+"""
+
+import time
+from collections import OrderedDict
+from jugador import Jugador
+from jugadorCPU import JugadorCPU
+from pedidos import (asignar_posicion_aleatoria, reubicar_pedidos,
+                     IndiceOcupacion)
+from clases import (ColaPedidos, Inventario, Pedido, PedidosActivos,
+                    RegistroVistos)
+from clima import SistemaClima
+from persistencia import SistemaPersistencia
+from planificador import PlanificadorPedidos, segundos_desde_inicio
+from distancias import construir_oraculo
+from flujo import ServicioCamposFlujo
+
+
+class RelojSimulado:
+    """Reloj que solo avanza cuando se le indica."""
+
+    def __init__(self, inicio=0.0):
+        """Construye el reloj en el tiempo inicial dado (segundos)."""
+        self.tiempo = inicio
+
+    def __call__(self):
+        """Retorna el tiempo actual, igual que time.time()."""
+        return self.tiempo
+
+    def avanzar(self, segundos):
+        """Adelanta el reloj la cantidad de segundos dada."""
+        self.tiempo += segundos
+
+
+class Simulacion:
+    """Estado y reglas de una partida, independiente del renderizado."""
+
+    def __init__(self, tiles, pedidos_data, sistema_clima=None,
+                 dificultad_cpu=None, reloj=time.time,
+                 fuente_pedidos=None, sistema_persistencia=None,
+                 meta_ingresos=5500, duracion=10 * 60,
+                 dificultad_jugador=None, inicio_partida=None,
+                 semilla_clima=None, oraculo=None,
+                 max_pedidos_activos=5):
+        """
+        Construye la partida.
+
+        Args:
+            tiles (list): Matriz del mapa
+            pedidos_data (list): Pedidos iniciales (dicts de la API)
+            sistema_clima (SistemaClima): Clima; si es None se crea uno
+                con la configuración local y el mismo reloj
+            dificultad_cpu (str): Dificultad del CPU o None para no tener CPU
+            reloj (callable): Función que retorna el tiempo actual
+            fuente_pedidos (callable): Función que retorna nuevos pedidos
+                de la API cada check_interval; si es None no se buscan
+                (por ejemplo cuando llegan por agregar_pedidos desde un
+                SondeoAPI en segundo plano)
+            sistema_persistencia (SistemaPersistencia): Para los puntajes
+            meta_ingresos (int): Dinero necesario para ganar
+            duracion (int): Duración de la partida en segundos
+            dificultad_jugador (str): Si se indica, el jugador principal
+                también es un CPU con esa dificultad (partidas sin humano)
+            inicio_partida (str): Fecha ISO que corresponde al inicio de la
+                partida ("start_time" del mapa); se usa para convertir los
+                deadline con fecha. Sin ella esos pedidos no vencen.
+            semilla_clima (int): Semilla del clima que se crea cuando
+                no se indica sistema_clima
+            oraculo (OraculoDistancias): Distancias del mapa para los CPU;
+                si es None se construye la primera vez que un CPU lo
+                usa (se puede compartir entre partidas del mismo mapa)
+            max_pedidos_activos (int): Máximo de pedidos en el mapa; los
+                demás esperan en la cola. None quita el límite
+        """
+        self.reloj = reloj
+        self.tiles = tiles
+        self.map_width, self.map_height = len(tiles[0]), len(tiles)
+        self.meta_ingresos = meta_ingresos
+        self.duracion = duracion
+        self.fuente_pedidos = fuente_pedidos
+        self.inicio_partida = inicio_partida
+        self.tiempo_inicio = reloj()
+
+        self.sistema_clima = (sistema_clima if sistema_clima is not None
+                              else SistemaClima(reloj=reloj,
+                                                semilla=semilla_clima))
+        self.sistema_persistencia = (
+            sistema_persistencia if sistema_persistencia is not None
+            else SistemaPersistencia())
+
+        # --- Pedidos ---
+        reubicar_pedidos(pedidos_data, tiles)
+        self.cola_pedidos = ColaPedidos([])
+        self.planificador = PlanificadorPedidos()
+        self.por_liberar = set()  # id() de pedidos aún no disponibles.
+        self.pedidos_vencidos = 0
+        # Ids ya recibidos: en juego, terminados o descartados
+        # hace menos de 20 s.
+        self.pedidos_vistos = RegistroVistos(ttl=20)
+        for p in pedidos_data:
+            pedido = Pedido.desde_dict(p)
+            if pedido.id is not None:
+                self.pedidos_vistos.marcar(pedido.id, self.tiempo_inicio)
+            self._programar_pedido(pedido)
+        self.pedidos_activos = PedidosActivos()
+        # Casillas de los pedidos en el mapa y en los inventarios.
+        self.indice_ocupacion = IndiceOcupacion(tiles, separacion=4)
+        self.oraculo = oraculo
+
+        # --- Jugadores ---
+        if dificultad_jugador is None:
+            self.jugador = Jugador(0, 0, reloj=reloj)
+        else:
+            self.jugador = JugadorCPU(
+                0, 0, dificultad=dificultad_jugador, reloj=reloj)
+
+        self.jugador_cpu = None
+        if dificultad_cpu is not None:
+            cpu_x, cpu_y = self._posicion_inicial_cpu()
+            self.jugador_cpu = JugadorCPU(
+                cpu_x, cpu_y, dificultad=dificultad_cpu, reloj=reloj)
+
+        for j in (self.jugador, self.jugador_cpu):
+            if j is not None:
+                j.al_recoger_pedido = self._pedido_recogido
+                j.al_finalizar_pedido = self._finalizar_pedido
+        # Campos de flujo hacia esas casillas, compartidos por los CPU.
+        self.flujo = self._crear_flujo()
+        self._compartir_con_cpus()
+
+        # --- Variables de control ---
+        ahora = self.tiempo_inicio
+        self.ultimo_check = ahora
+        self.check_interval = 15
+        # Límite de pedidos en el mapa (None: sin límite). Los que
+        # se liberan con el mapa lleno esperan en cola_pedidos.
+        self.max_pedidos_activos = max_pedidos_activos
+
+        self.juego_terminado = False
+        self.ganador = None
+        self.tiempo_final = None
+        self.puntaje_calculado_humano = None
+        self.puntaje_calculado_cpu = None
+
+    def _crear_flujo(self):
+        """Crea los campos de flujo si algún CPU difícil los va a leer."""
+        for j in (self.jugador, self.jugador_cpu):
+            if isinstance(j, JugadorCPU) and j.dificultad == 'dificil':
+                return ServicioCamposFlujo(self.tiles)
+        return None
+
+    def _compartir_con_cpus(self):
+        """Pasa a los CPU el oráculo y los campos de flujo del mapa."""
+        for j in (self.jugador, self.jugador_cpu):
+            if isinstance(j, JugadorCPU):
+                j.oraculo = self.oraculo
+                j.obtener_oraculo = self.obtener_oraculo
+                j.flujo = self.flujo
+
+    def obtener_oraculo(self):
+        """Retorna el oráculo del mapa, construyéndolo la primera vez."""
+        if self.oraculo is None:
+            self.oraculo = construir_oraculo(self.tiles)
+        return self.oraculo
+
+    def _posicion_inicial_cpu(self):
+        """Retorna la casilla libre más cercana a la esquina opuesta."""
+        cpu_x = self.map_width - 1
+        cpu_y = self.map_height - 1
+        # Asegurar que no sea edificio
+        while self.tiles[cpu_y][cpu_x] == 'B':
+            cpu_x -= 1
+            if cpu_x < 0:
+                cpu_x = self.map_width - 1
+                cpu_y -= 1
+        return cpu_x, cpu_y
+
+    def tiempo_transcurrido(self):
+        """Retorna los segundos desde que inició la partida."""
+        return self.reloj() - self.tiempo_inicio
+
+    def tiempo_restante(self):
+        """Retorna los segundos que le quedan a la partida."""
+        return max(0, self.duracion - self.tiempo_transcurrido())
+
+    def paso(self, acciones=()):
+        """
+        Avanza la partida un tick.
+
+        Args:
+            acciones (iterable): Acciones del jugador principal en este
+                tick: ('mover', dx, dy) o ('cancelar',)
+        """
+        ahora = self.reloj()
+        tiempo_transcurrido = ahora - self.tiempo_inicio
+
+        # Actualizar sistemas
+        self.sistema_clima.actualizar(ahora)
+        self._actualizar_cpus()
+
+        # Condiciones de finalización
+        if not self.juego_terminado:
+            self._verificar_fin(tiempo_transcurrido)
+        if self.juego_terminado:
+            return
+
+        if ahora - self.ultimo_check >= self.check_interval:
+            self._buscar_nuevos_pedidos()
+            self.ultimo_check = ahora
+        self._procesar_eventos(ahora)
+        self._liberar_pedidos()
+
+        # Acciones del jugador principal
+        for accion in acciones:
+            if accion[0] == 'mover':
+                self.mover_jugador(accion[1], accion[2])
+            elif accion[0] == 'cancelar':
+                self.jugador.cancelar_ultimo_pedido()
+
+        # Recoger y entregar pedidos (jugador principal)
+        if not isinstance(self.jugador, JugadorCPU):
+            self._recoger_pedidos_jugador()
+            self.jugador.entregar_pedido()
+
+    def ejecutar(self, dt=1 / 60, max_pasos=None):
+        """
+        Corre la partida sin interfaz hasta que termine.
+
+        Requiere que el reloj sea un RelojSimulado.
+
+        Args:
+            dt (float): Segundos simulados por tick
+            max_pasos (int): Límite de ticks (None para no tener límite)
+
+        Returns:
+            str: Ganador de la partida ('humano', 'cpu' o None)
+        """
+        pasos = 0
+        while not self.juego_terminado:
+            if max_pasos is not None and pasos >= max_pasos:
+                break
+            self.paso()
+            self.reloj.avanzar(dt)
+            pasos += 1
+        return self.ganador
+
+    # Campos de los jugadores que se guardan y restauran.
+    CAMPOS_JUGADOR = ('x', 'y', 'resistencia', 'puntaje', 'reputacion',
+                      'bloqueado', 'entregas_completadas', 'cancelaciones',
+                      'entregas_tempranas', 'entregas_tardias')
+
+    def capturar_estado(self):
+        """
+        Retorna una copia del estado de la partida en datos simples.
+
+        Cada pedido aparece una sola vez en la lista "pedidos";
+        la cola, el mapa, los inventarios y los eventos guardan
+        su índice. Los tiempos se guardan relativos a ahora.
+
+        Returns:
+            dict: Estado listo para SistemaPersistencia.guardar_juego
+        """
+        ahora = self.reloj()
+        pedidos = []
+        indices = {}
+        por_liberar = []
+
+        def indice(pedido):
+            i = indices.get(id(pedido))
+            if i is None:
+                i = indices[id(pedido)] = len(pedidos)
+                copia = Pedido(pedido.pickup, pedido.dropoff,
+                               pedido.weight, pedido.priority,
+                               pedido.payout, pedido.id, pedido.deadline,
+                               pedido.release_time)
+                if pedido.tiempo_recogido is not None:
+                    copia.tiempo_recogido = pedido.tiempo_recogido - ahora
+                pedidos.append(copia)
+                # Se revisa el original: la copia tiene otro id().
+                if id(pedido) in self.por_liberar:
+                    por_liberar.append(i)
+            return i
+
+        def capturar_jugador(jugador):
+            if jugador is None:
+                return None
+            datos = {campo: getattr(jugador, campo)
+                     for campo in self.CAMPOS_JUGADOR}
+            datos['inventario'] = [indice(p) for p in jugador.inventario]
+            return datos
+
+        clima = self.sistema_clima
+        return {
+            'tiempo_transcurrido': ahora - self.tiempo_inicio,
+            'jugador': capturar_jugador(self.jugador),
+            'jugador_cpu': capturar_jugador(self.jugador_cpu),
+            'cola_pedidos': [indice(p) for p in self.cola_pedidos],
+            'pedidos_activos': [indice(p) for p in self.pedidos_activos],
+            'eventos': [(tiempo - ahora, tipo, indice(p))
+                        for tiempo, _, tipo, p in
+                        sorted(self.planificador.eventos)],
+            'por_liberar': por_liberar,
+            'pedidos_vencidos': self.pedidos_vencidos,
+            'pedidos_vistos': {
+                'en_juego': sorted(self.pedidos_vistos.en_juego, key=str),
+                'terminados': list(self.pedidos_vistos.terminados),
+                'recientes': [(id_pedido, vence - ahora) for id_pedido, vence
+                              in self.pedidos_vistos.recientes.items()]},
+            'clima': {
+                'estado': clima.estado_actual,
+                'intensidad': clima.intensidad_actual,
+                'tiempo_hasta_cambio': clima.tiempo_cambio - ahora},
+            'pedidos': pedidos,
+        }
+
+    def restaurar_estado(self, estado):
+        """Vuelve la partida al estado dado por capturar_estado."""
+        ahora = self.reloj()
+        pedidos = estado['pedidos']
+        for pedido in pedidos:
+            if pedido.tiempo_recogido is not None:
+                pedido.tiempo_recogido += ahora
+
+        self.tiempo_inicio = ahora - estado['tiempo_transcurrido']
+        self.ultimo_check = ahora
+        # El estado guardado es de una partida en curso: se borran
+        # el final y los puntajes de una partida ya terminada.
+        self.juego_terminado = False
+        self.ganador = None
+        self.tiempo_final = None
+        self.puntaje_calculado_humano = None
+        self.puntaje_calculado_cpu = None
+        self.pedidos_vencidos = estado.get('pedidos_vencidos', 0)
+
+        self.cola_pedidos = ColaPedidos([])
+        for i in estado['cola_pedidos']:
+            self.cola_pedidos.agregar_pedido(pedidos[i])
+        self.pedidos_activos = PedidosActivos(
+            pedidos[i] for i in estado['pedidos_activos'])
+
+        por_liberar = [pedidos[i] for i in estado['por_liberar']]
+        self.por_liberar = {id(p) for p in por_liberar}
+        self.planificador = PlanificadorPedidos()
+        for tiempo, tipo, i in estado['eventos']:
+            self.planificador.programar(ahora + tiempo, tipo, pedidos[i])
+
+        vistos = estado['pedidos_vistos']
+        self.pedidos_vistos.en_juego = set(vistos['en_juego'])
+        self.pedidos_vistos.terminados = OrderedDict.fromkeys(
+            vistos.get('terminados', ()))
+        self.pedidos_vistos.recientes.clear()
+        for id_pedido, vence in vistos['recientes']:
+            self.pedidos_vistos.recientes[id_pedido] = ahora + vence
+
+        # Los pedidos del mapa y de los inventarios ocupan sus casillas.
+        self.indice_ocupacion = IndiceOcupacion(self.tiles, separacion=4)
+        self.flujo = self._crear_flujo()
+        self._compartir_con_cpus()
+        en_juego = list(self.pedidos_activos)
+        for clave in ('jugador', 'jugador_cpu'):
+            jugador = getattr(self, clave)
+            datos = estado[clave]
+            if jugador is None or datos is None:
+                continue
+            for campo in self.CAMPOS_JUGADOR:
+                setattr(jugador, campo, datos[campo])
+            jugador.inventario = Inventario(
+                pedidos[i] for i in datos['inventario'])
+            jugador.ultimo_recupero = ahora
+            en_juego.extend(jugador.inventario)
+            if hasattr(jugador, 'invalidar_ruta'):
+                jugador.invalidar_ruta()
+        for pedido in en_juego:
+            self._ocupar_casillas(pedido)
+        for pedido in en_juego[len(self.pedidos_activos):]:
+            self._pedido_recogido(pedido)
+
+        clima = self.sistema_clima
+        clima.estado_anterior = clima.estado_actual = \
+            estado['clima']['estado']
+        clima.intensidad_actual = estado['clima']['intensidad']
+        clima.tiempo_cambio = ahora + estado['clima']['tiempo_hasta_cambio']
+        clima.en_transicion = False
+        clima.actualizar(ahora)
+
+    def mover_jugador(self, dx, dy):
+        """Mueve al jugador principal aplicando el clima actual."""
+        clima_mult = self.sistema_clima.obtener_multiplicador_actual()
+        consumo_clima = self.sistema_clima.obtener_consumo_resistencia_extra()
+        return self.jugador.mover(dx, dy, self.tiles, clima_mult,
+                                  consumo_clima)
+
+    def _actualizar_cpus(self):
+        """Recupera al jugador principal y actualiza los CPU."""
+        clima_mult = self.sistema_clima.obtener_multiplicador_actual()
+        consumo_clima = self.sistema_clima.obtener_consumo_resistencia_extra()
+
+        if isinstance(self.jugador, JugadorCPU):
+            self.jugador.actualizar(
+                self.pedidos_activos, self.tiles, clima_mult, consumo_clima)
+        else:
+            self.jugador.recuperar()
+
+        if self.jugador_cpu:
+            self.jugador_cpu.actualizar(
+                self.pedidos_activos, self.tiles, clima_mult, consumo_clima)
+
+    def _verificar_fin(self, tiempo_transcurrido):
+        """Revisa las condiciones de victoria y derrota."""
+        jugador = self.jugador
+        jugador_cpu = self.jugador_cpu
+
+        # Victoria por meta
+        if jugador.puntaje >= self.meta_ingresos:
+            self.juego_terminado = True
+            self.ganador = 'humano'
+            self.tiempo_final = tiempo_transcurrido
+        elif jugador_cpu and jugador_cpu.puntaje >= self.meta_ingresos:
+            self.juego_terminado = True
+            self.ganador = 'cpu'
+            self.tiempo_final = tiempo_transcurrido
+        # Derrota por tiempo
+        elif tiempo_transcurrido >= self.duracion:
+            self.juego_terminado = True
+            # Ganador por más dinero
+            if jugador_cpu:
+                self.ganador = ('humano' if jugador.puntaje > jugador_cpu.puntaje
+                                else 'cpu')
+            else:
+                self.ganador = 'humano'
+            self.tiempo_final = self.duracion
+        # Derrota por reputación
+        elif jugador.reputacion <= 20:
+            self.juego_terminado = True
+            self.ganador = 'cpu' if jugador_cpu else None
+            self.tiempo_final = tiempo_transcurrido
+        elif jugador_cpu and jugador_cpu.reputacion <= 20:
+            self.juego_terminado = True
+            self.ganador = 'humano'
+            self.tiempo_final = tiempo_transcurrido
+
+        # Calcular puntajes finales
+        if self.juego_terminado and self.puntaje_calculado_humano is None:
+            self.puntaje_calculado_humano = \
+                self.sistema_persistencia.calcular_puntaje_final(
+                    jugador, self.tiempo_final, self.duracion,
+                    self.meta_ingresos)
+
+            if jugador_cpu:
+                self.puntaje_calculado_cpu = \
+                    self.sistema_persistencia.calcular_puntaje_final(
+                        jugador_cpu, self.tiempo_final, self.duracion,
+                        self.meta_ingresos)
+
+    def _buscar_nuevos_pedidos(self):
+        """Pide pedidos nuevos a la fuente y los agrega a la cola."""
+        if self.fuente_pedidos is None:
+            return
+
+        try:
+            resp = self.fuente_pedidos()
+        except Exception as e:
+            print("Error al obtener pedidos:", e)
+            resp = []
+
+        self.agregar_pedidos(resp)
+
+    def agregar_pedidos(self, resp):
+        """Ubica en el mapa los pedidos no vistos y los encola.
+
+        Acepta la respuesta de la API ({"data": [...]})
+        o directamente la lista de pedidos.
+        """
+        nuevos_pedidos_data = (resp.get("data", [])
+                               if isinstance(resp, dict) else resp)
+        jugador = self.jugador
+        jugador_cpu = self.jugador_cpu
+        ocupadas = self.indice_ocupacion
+        vistos = self.pedidos_vistos
+        ahora = self.reloj()
+
+        # Las posiciones de los jugadores se ocupan solo mientras
+        # se ubican los pedidos nuevos.
+        posiciones_jugadores = [(jugador.x, jugador.y)]
+        if jugador_cpu:
+            posiciones_jugadores.append((jugador_cpu.x, jugador_cpu.y))
+        for pos in posiciones_jugadores:
+            ocupadas.ocupar(pos)
+
+        for p in nuevos_pedidos_data:
+            pedido_id = p.get("id", f"{p['pickup']}-{p['dropoff']}")
+
+            if not vistos.visto(pedido_id, ahora):
+                pickup_pos = asignar_posicion_aleatoria(
+                    self.tiles, ocupadas, separacion=4)
+                if pickup_pos is None:
+                    vistos.marcar(pedido_id, ahora, en_juego=False)
+                    continue
+
+                dropoff_pos = asignar_posicion_aleatoria(
+                    self.tiles, ocupadas, separacion=4)
+
+                # Mientras está en la cola el pedido no ocupa casillas;
+                # las ocupa al aparecer en el mapa.
+                ocupadas.liberar(pickup_pos)
+                if dropoff_pos is None:
+                    vistos.marcar(pedido_id, ahora, en_juego=False)
+                    continue
+                ocupadas.liberar(dropoff_pos)
+
+                p["pickup"] = pickup_pos
+                p["dropoff"] = dropoff_pos
+
+                nuevo_pedido = Pedido.desde_dict(p)
+                nuevo_pedido.id = pedido_id
+
+                vistos.marcar(pedido_id, ahora)
+                self._programar_pedido(nuevo_pedido)
+
+        for pos in posiciones_jugadores:
+            ocupadas.liberar(pos)
+
+    def _pedido_recogido(self, pedido):
+        """Ya nadie va a la recogida del pedido: se suelta su campo."""
+        if self.flujo is not None:
+            self.flujo.soltar(pedido.pickup)
+
+    def _finalizar_pedido(self, pedido):
+        """Un pedido se entregó o canceló: libera casillas y su id."""
+        self._liberar_casillas(pedido, recogido=True)
+        self.pedidos_vistos.terminar(pedido.id, self.reloj())
+
+    def _ocupar_casillas(self, pedido):
+        """Ocupa las casillas de un pedido que aparece en el mapa."""
+        for pos in (pedido.pickup, pedido.dropoff):
+            self.indice_ocupacion.ocupar(pos)
+            if self.flujo is not None:
+                self.flujo.reservar(pos)
+
+    def _liberar_casillas(self, pedido, recogido):
+        """
+        Libera las casillas de un pedido que sale del juego.
+
+        Args:
+            pedido (Pedido): Pedido entregado, cancelado o vencido
+            recogido (bool): Si ya se recogió (su campo de recogida
+                se soltó en _pedido_recogido)
+        """
+        for pos in (pedido.pickup, pedido.dropoff):
+            self.indice_ocupacion.liberar(pos)
+        if self.flujo is not None:
+            if not recogido:
+                self.flujo.soltar(pedido.pickup)
+            self.flujo.soltar(pedido.dropoff)
+
+    def _programar_pedido(self, pedido):
+        """Programa cuándo el pedido aparece en el mapa y cuándo vence."""
+        liberacion = segundos_desde_inicio(pedido.release_time) or 0
+        self.por_liberar.add(id(pedido))
+        self.planificador.programar(
+            self.tiempo_inicio + liberacion, 'liberar', pedido)
+
+        vencimiento = segundos_desde_inicio(
+            pedido.deadline, self.inicio_partida)
+        if vencimiento is not None:
+            self.planificador.programar(
+                self.tiempo_inicio + vencimiento, 'vencer', pedido)
+
+    def _procesar_eventos(self, ahora):
+        """Aplica los eventos de pedidos que ya tocaron (O(eventos))."""
+        for tipo, pedido in self.planificador.eventos_hasta(ahora):
+            if tipo == 'liberar':
+                if id(pedido) in self.por_liberar:
+                    self.por_liberar.discard(id(pedido))
+                    if self._hay_espacio_en_mapa():
+                        self._poner_en_mapa(pedido)
+                    else:
+                        self.cola_pedidos.agregar_pedido(pedido)
+            elif tipo == 'vencer':
+                self._vencer_pedido(pedido)
+
+    def _vencer_pedido(self, pedido):
+        """Saca del juego un pedido vencido que nadie ha recogido."""
+        if id(pedido) in self.por_liberar:
+            self.por_liberar.discard(id(pedido))
+        elif self.cola_pedidos.quitar_pedido(pedido) is not None:
+            pass
+        elif pedido in self.pedidos_activos:
+            self.pedidos_activos.remove(pedido)
+            self._liberar_casillas(pedido, recogido=False)
+        else:
+            return  # Ya está en un inventario.
+        self.pedidos_vencidos += 1
+        self.pedidos_vistos.terminar(pedido.id, self.reloj())
+
+    def _hay_espacio_en_mapa(self):
+        """Indica si cabe otro pedido en el mapa."""
+        return (self.max_pedidos_activos is None or
+                len(self.pedidos_activos) < self.max_pedidos_activos)
+
+    def _poner_en_mapa(self, pedido):
+        """Hace aparecer un pedido en el mapa."""
+        self.pedidos_activos.append(pedido)
+        self._ocupar_casillas(pedido)
+
+    def _liberar_pedidos(self):
+        """Pasa al mapa los pedidos en espera mientras haya espacio."""
+        while self.cola_pedidos and self._hay_espacio_en_mapa():
+            self._poner_en_mapa(self.cola_pedidos.obtener_siguiente())
+
+    def _recoger_pedidos_jugador(self):
+        """Recoge los pedidos en la casilla del jugador principal."""
+        jugador = self.jugador
+        for pedido in list(self.pedidos_activos.pedidos_en(
+                (jugador.x, jugador.y))):
+            if jugador.recoger_pedido(pedido):
+                self.pedidos_activos.remove(pedido)
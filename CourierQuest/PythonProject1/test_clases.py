@@ -0,0 +1,132 @@
+"""
+test_clases.py.
+
+Pruebas de equivalencia de las colecciones de pedidos:
+se comparan contra versiones simples (listas ordenadas
+y totales recalculados desde cero) con operaciones al azar.
+
+Uso:
+    python -m unittest test_clases
+"""
+
+import random
+import unittest
+
+from clases import ColaPedidos, Inventario, Pedido, clave_deadline
+
+DEADLINES = [None, 50, 100, "2099-01-01T00:00:00", "no es fecha"]
+
+
+def _pedido_al_azar(rng, numero):
+    """Pedido con prioridad, peso, deadline y dropoff al azar."""
+    return Pedido((0, 0), (rng.randint(0, 3), 0),
+                  weight=rng.randint(1, 5), priority=rng.randint(0, 3),
+                  id=f"P-{numero}", deadline=rng.choice(DEADLINES))
+
+
+class TestColaPedidos(unittest.TestCase):
+    """El heap indexado saca lo mismo que una lista ordenada."""
+
+    def test_equivalente_a_lista_ordenada(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            cola = ColaPedidos([])
+            referencia = {}     # id -> [pedido, secuencia]
+            secuencia = 0
+
+            def siguiente_referencia():
+                return min(referencia.values(), key=lambda e: (
+                    -e[0].priority, clave_deadline(e[0].deadline), e[1]))
+
+            for numero in range(300):
+                operacion = rng.random()
+                if operacion < 0.4 or not referencia:
+                    # A veces se repite un id que ya está en la cola.
+                    ids = list(referencia) or [None]
+                    pedido = _pedido_al_azar(rng, numero)
+                    if rng.random() < 0.1 and ids[0] is not None:
+                        pedido.id = rng.choice(ids)
+                    agregado = pedido.id not in referencia
+                    self.assertEqual(cola.agregar_pedido(pedido), agregado)
+                    if agregado:
+                        secuencia += 1
+                        referencia[pedido.id] = [pedido, secuencia]
+                elif operacion < 0.6:
+                    esperado = siguiente_referencia()
+                    self.assertIs(cola.ver_siguiente(), esperado[0])
+                    self.assertIs(cola.obtener_siguiente(), esperado[0])
+                    del referencia[esperado[0].id]
+                elif operacion < 0.8:
+                    id_pedido = rng.choice(list(referencia))
+                    esperado = referencia.pop(id_pedido)[0]
+                    self.assertIs(cola.quitar(id_pedido), esperado)
+                    self.assertIsNone(cola.quitar(id_pedido))
+                else:
+                    id_pedido = rng.choice(list(referencia))
+                    self.assertTrue(cola.cambiar_prioridad(
+                        id_pedido, rng.randint(0, 3)))
+
+                self.assertEqual(len(cola), len(referencia))
+                self.assertEqual(set(cola.posiciones), set(referencia))
+
+            # Al vaciarla sale todo en el orden de la referencia.
+            while referencia:
+                esperado = siguiente_referencia()
+                self.assertIs(cola.obtener_siguiente(), esperado[0])
+                del referencia[esperado[0].id]
+            self.assertIsNone(cola.obtener_siguiente())
+
+    def test_quitar_pedido_solo_ese_objeto(self):
+        original = Pedido((0, 0), (1, 1), id="P-1")
+        otro = Pedido((0, 0), (1, 1), id="P-1")
+        cola = ColaPedidos([])
+        cola.agregar_pedido(original)
+        self.assertIsNone(cola.quitar_pedido(otro))
+        self.assertIs(cola.quitar_pedido(original), original)
+        self.assertEqual(len(cola), 0)
+
+
+class TestInventario(unittest.TestCase):
+    """Los totales del inventario coinciden con recalcularlos."""
+
+    def assertTotalesCorrectos(self, inventario, referencia):
+        self.assertEqual(list(inventario), referencia)
+        self.assertEqual(inventario.peso_total,
+                         sum(p.weight for p in referencia))
+        self.assertEqual(inventario.prioridad_maxima,
+                         max((p.priority for p in referencia), default=None))
+        conteo = {}
+        for p in referencia:
+            conteo[p.priority] = conteo.get(p.priority, 0) + 1
+        self.assertEqual(inventario.conteo_prioridades, conteo)
+
+        # Cada casilla: mayor prioridad primero, empates por llegada.
+        por_dropoff = {}
+        for p in sorted(referencia, key=lambda p: -p.priority):
+            por_dropoff.setdefault(p.dropoff, []).append(p)
+        self.assertEqual(inventario.por_dropoff, por_dropoff)
+
+    def test_equivalente_a_recalcular(self):
+        rng = random.Random(2)
+        inventario = Inventario()
+        referencia = []
+        for numero in range(2000):
+            operacion = rng.random()
+            if operacion < 0.5 or not referencia:
+                pedido = _pedido_al_azar(rng, numero)
+                inventario.append(pedido)
+                referencia.append(pedido)
+            elif operacion < 0.8:
+                pedido = rng.choice(referencia)
+                inventario.remove(pedido)
+                referencia.remove(pedido)
+            elif operacion < 0.95:
+                self.assertIs(inventario.pop(), referencia.pop())
+            else:
+                inventario.clear()
+                referencia.clear()
+            self.assertTotalesCorrectos(inventario, referencia)
+
+
+if __name__ == "__main__":
+    unittest.main()
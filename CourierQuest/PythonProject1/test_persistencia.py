@@ -0,0 +1,236 @@
+"""
+test_persistencia.py.
+
+Pruebas del formato binario de guardado y del historial
+de movimientos (deshacer) contra una versión simple que
+copia todo el estado en cada paso.
+
+Uso:
+    python -m unittest test_persistencia
+"""
+
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+
+from clases import Inventario, Pedido, PedidosActivos
+from persistencia import (ENCABEZADO, HistorialMovimientos,
+                          SistemaPersistencia, codificar_estado,
+                          decodificar_estado)
+
+
+def _normalizar(valor):
+    """Cambia los Pedido por tuplas para poder compararlos con ==."""
+    if isinstance(valor, Pedido):
+        return ("Pedido",) + tuple(getattr(valor, campo)
+                                   for campo in Pedido.__slots__)
+    if isinstance(valor, dict):
+        return {clave: _normalizar(v) for clave, v in valor.items()}
+    if isinstance(valor, list):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, tuple):
+        return tuple(_normalizar(v) for v in valor)
+    return valor
+
+
+def _estado_de_prueba():
+    """Estado con todos los tipos que sabe guardar el formato."""
+    pedido = Pedido((1, 2), (3, 4), 2, 1, 250.5, "P-1",
+                    "2025-09-01T12:30:00", 30)
+    pedido.tiempo_recogido = 12.25
+    return {
+        'jugador': {'x': 5, 'y': -3, 'resistencia': 87.5,
+                    'inventario': [pedido], 'exhausto': False},
+        'pedidos_activos': [Pedido((0, 0), (9, 9), id=None)],
+        'clima': {'actual': 'lluvia', 'intensidad': 0.75,
+                  'siguiente': None, 'activo': True},
+        'entero_grande': 2 ** 62,
+        'texto': "Dirección ñandú ☂",
+        'posiciones': [(1, 2), (3, 4)],
+        'vacio': {'lista': [], 'tupla': (), 'dict': {}},
+    }
+
+
+class TestFormatoGuardado(unittest.TestCase):
+    """Codificar y decodificar no pierde ni cambia nada."""
+
+    def test_ida_y_vuelta(self):
+        estado = _estado_de_prueba()
+        recuperado = decodificar_estado(codificar_estado(estado))
+        self.assertEqual(_normalizar(recuperado), _normalizar(estado))
+        # Las tuplas siguen siendo tuplas (pickup, dropoff, posiciones).
+        self.assertIsInstance(recuperado['posiciones'][0], tuple)
+        self.assertIsInstance(
+            recuperado['jugador']['inventario'][0].pickup, tuple)
+
+    def test_datos_sobrantes(self):
+        with self.assertRaises(ValueError):
+            decodificar_estado(codificar_estado({'a': 1}) + b"N")
+
+    def test_tipo_no_soportado(self):
+        with self.assertRaises(TypeError):
+            codificar_estado({'conjunto': {1, 2}})
+
+
+class TestArchivoGuardado(unittest.TestCase):
+    """Guardar y cargar un slot, y detectar un guardado dañado."""
+
+    def setUp(self):
+        self.directorio = os.getcwd()
+        self.temporal = tempfile.TemporaryDirectory()
+        os.chdir(self.temporal.name)
+        self.salida = contextlib.redirect_stdout(io.StringIO())
+        self.salida.__enter__()
+        self.persistencia = SistemaPersistencia()
+
+    def tearDown(self):
+        self.salida.__exit__(None, None, None)
+        os.chdir(self.directorio)
+        self.temporal.cleanup()
+
+    def test_ida_y_vuelta(self):
+        estado = _estado_de_prueba()
+        for comprimir in (True, False):
+            self.assertTrue(self.persistencia.guardar_juego(
+                estado, slot=2, comprimir=comprimir))
+            self.assertEqual(
+                _normalizar(self.persistencia.cargar_juego(slot=2)),
+                _normalizar(estado))
+
+    def test_crc_detecta_dano(self):
+        estado = _estado_de_prueba()
+        for comprimir in (True, False):
+            self.persistencia.guardar_juego(
+                estado, slot=3, comprimir=comprimir)
+            archivo = "saves/slot3.sav"
+            with open(archivo, 'r+b') as f:
+                f.seek(ENCABEZADO.size + 5)
+                byte = f.read(1)
+                f.seek(-1, os.SEEK_CUR)
+                f.write(bytes([byte[0] ^ 0xFF]))
+            self.assertIsNone(self.persistencia.cargar_juego(slot=3))
+
+    def test_archivo_truncado(self):
+        self.persistencia.guardar_juego(_estado_de_prueba(), slot=4)
+        archivo = "saves/slot4.sav"
+        with open(archivo, 'r+b') as f:
+            f.truncate(os.path.getsize(archivo) - 3)
+        self.assertIsNone(self.persistencia.cargar_juego(slot=4))
+
+
+class _Jugador:
+    """Lo mínimo del jugador que usa el historial."""
+
+    def __init__(self):
+        self.x = 0
+        self.y = 0
+        self.resistencia = 100
+        self.puntaje = 0
+        self.reputacion = 70
+        self.inventario = Inventario()
+
+
+class _HistorialCopias:
+    """Historial de referencia: copia todo el estado en cada paso."""
+
+    def __init__(self, max_pasos):
+        self.max_pasos = max_pasos
+        self.historial = []
+
+    def guardar_estado(self, jugador, pedidos_activos):
+        self.historial.append((
+            {campo: getattr(jugador, campo)
+             for campo in HistorialMovimientos.CAMPOS},
+            list(jugador.inventario), list(pedidos_activos)))
+        if len(self.historial) > self.max_pasos:
+            self.historial.pop(0)
+
+    def deshacer(self):
+        if len(self.historial) < 2:
+            return None
+        self.historial.pop()
+        return self.historial[-1]
+
+
+class TestHistorialMovimientos(unittest.TestCase):
+    """Deshacer deja lo mismo que la versión que copia todo."""
+
+    def assertMismoEstado(self, jugador, pedidos_activos, esperado):
+        campos, inventario, activos = esperado
+        for campo, valor in campos.items():
+            self.assertEqual(getattr(jugador, campo), valor)
+        self.assertEqual(list(jugador.inventario), inventario)
+        self.assertEqual(list(pedidos_activos), activos)
+        for pedido in activos:
+            self.assertIn(pedido,
+                          pedidos_activos.pedidos_en(pedido.pickup))
+
+    def _partida_al_azar(self, rng, max_pasos):
+        jugador = _Jugador()
+        siguiente = 0
+
+        def nuevo_pedido():
+            nonlocal siguiente
+            siguiente += 1
+            return Pedido((rng.randint(0, 3), 0), (1, 1), 1,
+                          rng.randint(0, 2), id=f"P-{siguiente}")
+
+        pedidos_activos = PedidosActivos(
+            [nuevo_pedido() for _ in range(6)])
+        historial = HistorialMovimientos(max_pasos=max_pasos)
+        referencia = _HistorialCopias(max_pasos)
+
+        def guardar():
+            historial.guardar_estado(jugador, pedidos_activos, 0)
+            referencia.guardar_estado(jugador, pedidos_activos)
+
+        guardar()
+        for _ in range(60):
+            operacion = rng.random()
+            if operacion < 0.2 and len(pedidos_activos):
+                # Recoger un pedido del mapa.
+                pedido = rng.choice(list(pedidos_activos))
+                pedidos_activos.remove(pedido)
+                jugador.inventario.append(pedido)
+            elif operacion < 0.3 and len(jugador.inventario):
+                # Entregar (o perder) un pedido del inventario.
+                jugador.inventario.remove(
+                    rng.choice(list(jugador.inventario)))
+                jugador.puntaje += 10
+            elif operacion < 0.4:
+                pedidos_activos.append(nuevo_pedido())
+            elif operacion < 0.5 and len(jugador.inventario) > 1:
+                # Ordenar el inventario cambia de objeto.
+                orden = list(jugador.inventario)
+                rng.shuffle(orden)
+                jugador.inventario = Inventario(orden)
+            elif operacion < 0.75:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    deshecho = historial.deshacer(jugador, pedidos_activos)
+                esperado = referencia.deshacer()
+                self.assertEqual(deshecho, esperado is not None)
+                if esperado is not None:
+                    self.assertMismoEstado(
+                        jugador, pedidos_activos, esperado)
+                continue
+            jugador.x += rng.choice((-1, 0, 1))
+            jugador.resistencia -= rng.random()
+            guardar()
+            self.assertEqual(len(historial), len(referencia.historial))
+
+    def test_equivalente_a_copiar_todo(self):
+        rng = random.Random(3)
+        for _ in range(100):
+            self._partida_al_azar(rng, max_pasos=2000)
+
+    def test_buffer_lleno(self):
+        rng = random.Random(4)
+        for _ in range(100):
+            self._partida_al_azar(rng, max_pasos=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+test_simulacion.py.
+
+Pruebas de guardar y restaurar una partida headless.
+
+Uso:
+    python -m unittest test_simulacion
+"""
+
+import contextlib
+import io
+import os
+import unittest
+
+from persistencia import codificar_estado, decodificar_estado
+from simulacion import RelojSimulado, Simulacion
+
+CARPETA = os.path.dirname(os.path.abspath(__file__))
+
+
+def _pedido(id_pedido, release_time, pickup, dropoff):
+    """Pedido de prueba con las casillas y el release_time dados."""
+    return {"id": id_pedido, "pickup": pickup, "dropoff": dropoff,
+            "payout": 100, "deadline": "2099-01-01T00:00:00",
+            "weight": 1, "priority": 0, "release_time": release_time}
+
+
+def _simulacion(pedidos, reloj, **kwargs):
+    """Partida sin CPU en un mapa de 30x30 solo con calles."""
+    tiles = [["C"] * 30 for _ in range(30)]
+    directorio = os.getcwd()
+    os.chdir(CARPETA)  # El clima lee data/clima.json.
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return Simulacion(tiles, pedidos, reloj=reloj,
+                              semilla_clima=1, **kwargs)
+    finally:
+        os.chdir(directorio)
+
+
+class TestGuardarRestaurar(unittest.TestCase):
+    """Capturar, codificar y restaurar una partida sin perder pedidos."""
+
+    def test_pedidos_por_liberar_sobreviven(self):
+        reloj = RelojSimulado()
+        original = _simulacion(
+            [_pedido("P-1", 0, [10, 10], [20, 10]),
+             _pedido("P-2", 30, [10, 20], [20, 20])], reloj)
+        original.paso([])
+        self.assertEqual([p.id for p in original.pedidos_activos], ["P-1"])
+
+        estado = decodificar_estado(
+            codificar_estado(original.capturar_estado()))
+        self.assertEqual(len(estado["por_liberar"]), 1)
+
+        reloj = RelojSimulado(100.0)
+        restaurada = _simulacion([], reloj)
+        restaurada.restaurar_estado(estado)
+        self.assertEqual(len(restaurada.por_liberar), 1)
+
+        reloj.avanzar(31)
+        restaurada.paso([])
+        self.assertEqual(sorted(p.id for p in restaurada.pedidos_activos),
+                         ["P-1", "P-2"])
+
+    def test_restaurar_despues_del_final(self):
+        reloj = RelojSimulado()
+        simulacion = _simulacion(
+            [_pedido("P-1", 0, [10, 10], [20, 10])], reloj, duracion=10)
+        simulacion.pedidos_vencidos = 3
+        estado = simulacion.capturar_estado()
+
+        reloj.avanzar(11)
+        simulacion.paso([])
+        self.assertTrue(simulacion.juego_terminado)
+        self.assertIsNotNone(simulacion.puntaje_calculado_humano)
+
+        simulacion.restaurar_estado(estado)
+        self.assertFalse(simulacion.juego_terminado)
+        self.assertIsNone(simulacion.tiempo_final)
+        self.assertIsNone(simulacion.puntaje_calculado_humano)
+        self.assertEqual(simulacion.pedidos_vencidos, 3)
+
+        reloj.avanzar(11)
+        simulacion.paso([])
+        self.assertTrue(simulacion.juego_terminado)
+        self.assertEqual(simulacion.tiempo_final, 10)
+
+
+class TestPedidosVistos(unittest.TestCase):
+    """Los pedidos terminados no se vuelven a aceptar."""
+
+    def test_repetir_lista_despues_del_ttl(self):
+        pedido = _pedido("P-1", 0, [10, 10], [20, 10])
+        pedido["deadline"] = "2025-01-01T00:00:05"
+        reloj = RelojSimulado()
+        simulacion = _simulacion(
+            [dict(pedido)], reloj, inicio_partida="2025-01-01T00:00:00")
+        simulacion.paso([])
+        self.assertEqual(len(simulacion.pedidos_activos), 1)
+
+        reloj.avanzar(6)
+        simulacion.paso([])
+        self.assertEqual(simulacion.pedidos_vencidos, 1)
+        self.assertEqual(len(simulacion.pedidos_activos), 0)
+
+        # La API vuelve a mandar la misma lista mucho después del ttl.
+        reloj.avanzar(10 * simulacion.pedidos_vistos.ttl)
+        simulacion.agregar_pedidos({"data": [dict(pedido)]})
+        self.assertFalse(simulacion.por_liberar)
+        simulacion.paso([])
+        self.assertEqual(simulacion.pedidos_vencidos, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+texto.py.
+
+Servicio compartido para dibujar texto con pygame.
+Las fuentes se cargan una sola vez y las superficies
+ya renderizadas se guardan en una caché LRU según
+(texto, tamaño, color), así el HUD no vuelve a
+renderizar los mismos textos en cada frame.
+"""
+
+from collections import OrderedDict
+import pygame
+
+MAX_TEXTOS_CACHE = 256
+
+_fuentes = {}
+
+
+def obtener_fuente(tamano, nombre=None):
+    """Retorna la fuente pedida, cargándola solo la primera vez."""
+    clave = (nombre, tamano)
+    fuente = _fuentes.get(clave)
+    if fuente is None:
+        fuente = pygame.font.SysFont(nombre, tamano)
+        _fuentes[clave] = fuente
+    return fuente
+
+
+class CacheTexto:
+    """Caché LRU de superficies de texto renderizadas."""
+
+    def __init__(self, max_textos=MAX_TEXTOS_CACHE):
+        """Construye la caché vacía."""
+        self.max_textos = max_textos
+        self.superficies = OrderedDict()
+
+    def renderizar(self, texto, tamano, color, nombre=None):
+        """Retorna la superficie del texto, renderizándola si no existe."""
+        clave = (texto, tamano, tuple(color), nombre)
+        superficie = self.superficies.get(clave)
+
+        if superficie is not None:
+            self.superficies.move_to_end(clave)
+            return superficie
+
+        superficie = obtener_fuente(tamano, nombre).render(texto, True, color)
+        self.superficies[clave] = superficie
+
+        if len(self.superficies) > self.max_textos:
+            self.superficies.popitem(last=False)  # Sale el menos usado.
+
+        return superficie
+
+    def limpiar(self):
+        """Vacía la caché."""
+        self.superficies.clear()
+
+
+_cache = CacheTexto()
+
+
+def renderizar_texto(texto, tamano, color, nombre=None):
+    """Renderiza un texto usando la caché compartida."""
+    return _cache.renderizar(texto, tamano, color, nombre)
@@ -0,0 +1,244 @@
+"""
+torneo.py.
+
+Corre muchas partidas CPU contra CPU sin pantalla
+y sin esperas de tiempo real, usando la Simulacion
+con un reloj simulado. Las partidas se reparten en
+varios procesos con ProcessPoolExecutor y al final
+se guardan las estadísticas en JSON o CSV.
+
+Uso:
+    python torneo.py --partidas 100 --salida resultados.json
+"""
+
+import argparse
+import contextlib
+import copy
+import csv
+import io
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from simulacion import Simulacion, RelojSimulado
+from distancias import construir_oraculo
+
+DIFICULTADES = ['facil', 'medio', 'dificil']
+
+# Oráculo del mapa del torneo, construido una vez en cada proceso.
+_oraculo_proceso = None
+
+
+def _extraer_datos(respuesta):
+    """Acepta tanto {"data": ...} como los datos directamente."""
+    if isinstance(respuesta, dict) and "data" in respuesta:
+        return respuesta["data"]
+    return respuesta
+
+
+def cargar_datos(ruta_mapa=None, ruta_pedidos=None):
+    """
+    Carga el mapa y los pedidos para el torneo.
+
+    Si no se indican archivos se usan los de la API
+    (que a su vez usa los archivos locales si falla).
+
+    Returns:
+        tuple: (tiles, lista de pedidos)
+    """
+    if ruta_mapa:
+        with open(ruta_mapa, "r") as f:
+            mapa = _extraer_datos(json.load(f))
+    else:
+        import api
+        mapa = _extraer_datos(api.obtener_mapa())
+
+    if ruta_pedidos:
+        with open(ruta_pedidos, "r") as f:
+            pedidos = _extraer_datos(json.load(f))
+    else:
+        import api
+        pedidos = _extraer_datos(api.obtener_pedidos())
+
+    return mapa["tiles"], pedidos
+
+
+def jugar_partida(tiles, pedidos_data, dificultad_a, dificultad_b,
+                  semilla, dt=0.05, duracion=10 * 60, meta_ingresos=5500,
+                  oraculo=None):
+    """
+    Juega una partida completa entre dos CPU.
+
+    El jugador A ocupa el lugar del humano (esquina superior
+    izquierda) y el B el lugar del CPU (esquina opuesta).
+    Si no se da el oráculo del mapa, la partida construye el suyo.
+
+    Returns:
+        dict: Resultado de la partida
+    """
+    random.seed(semilla)
+    reloj = RelojSimulado()
+
+    def fuente_pedidos():
+        return copy.deepcopy(pedidos_data)
+
+    # Los CPU imprimen cada acción, se descarta esa salida.
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulacion = Simulacion(
+            tiles, copy.deepcopy(pedidos_data),
+            dificultad_cpu=dificultad_b,
+            dificultad_jugador=dificultad_a,
+            reloj=reloj,
+            fuente_pedidos=fuente_pedidos,
+            meta_ingresos=meta_ingresos,
+            duracion=duracion,
+            semilla_clima=semilla,
+            oraculo=oraculo)
+        simulacion.ejecutar(dt=dt)
+
+    ganador = {'humano': 'a', 'cpu': 'b'}.get(simulacion.ganador)
+    a, b = simulacion.jugador, simulacion.jugador_cpu
+
+    return {
+        'semilla': semilla,
+        'dificultad_a': dificultad_a,
+        'dificultad_b': dificultad_b,
+        'ganador': ganador,
+        'tiempo_final': round(simulacion.tiempo_final, 2),
+        'puntaje_final_a':
+            simulacion.puntaje_calculado_humano['puntaje_final'],
+        'puntaje_final_b': simulacion.puntaje_calculado_cpu['puntaje_final'],
+        'dinero_a': a.puntaje,
+        'dinero_b': b.puntaje,
+        'entregas_a': a.entregas_completadas,
+        'entregas_b': b.entregas_completadas,
+        'reputacion_a': a.reputacion,
+        'reputacion_b': b.reputacion,
+    }
+
+
+def _iniciar_proceso(tiles):
+    """Construye el oráculo del mapa una sola vez por proceso."""
+    global _oraculo_proceso
+    _oraculo_proceso = construir_oraculo(tiles)
+
+
+def _jugar_partida_args(args):
+    """Adaptador para usar jugar_partida con executor.map."""
+    return jugar_partida(*args, oraculo=_oraculo_proceso)
+
+
+def generar_partidas(tiles, pedidos_data, partidas_por_cruce,
+                     semilla_base=0, dificultades=DIFICULTADES, dt=0.05):
+    """
+    Genera los argumentos de todas las partidas del torneo.
+
+    Cada pareja de dificultades juega en ambos lados del
+    mapa con las mismas semillas, para que la posición
+    inicial no favorezca a ninguna.
+    """
+    partidas = []
+    for dif_a, dif_b in itertools.permutations(dificultades, 2):
+        for i in range(partidas_por_cruce):
+            partidas.append((tiles, pedidos_data, dif_a, dif_b,
+                             semilla_base + i, dt))
+    return partidas
+
+
+def correr_torneo(tiles, pedidos_data, partidas_por_cruce,
+                  semilla_base=0, procesos=None, dt=0.05,
+                  dificultades=DIFICULTADES):
+    """Corre todas las partidas en paralelo y retorna sus resultados."""
+    partidas = generar_partidas(tiles, pedidos_data, partidas_por_cruce,
+                                semilla_base, dificultades, dt)
+
+    with ProcessPoolExecutor(max_workers=procesos,
+                             initializer=_iniciar_proceso,
+                             initargs=(tiles,)) as executor:
+        return list(executor.map(_jugar_partida_args, partidas,
+                                 chunksize=max(1, len(partidas) // 64)))
+
+
+def resumir(resultados):
+    """Calcula estadísticas agregadas por dificultad."""
+    resumen = {}
+
+    for r in resultados:
+        for lado, rival in (('a', 'b'), ('b', 'a')):
+            dif = r[f'dificultad_{lado}']
+            datos = resumen.setdefault(dif, {
+                'partidas': 0, 'victorias': 0, 'derrotas': 0,
+                'puntaje_final_total': 0, 'dinero_total': 0,
+                'entregas_total': 0})
+
+            datos['partidas'] += 1
+            if r['ganador'] == lado:
+                datos['victorias'] += 1
+            elif r['ganador'] == rival:
+                datos['derrotas'] += 1
+            datos['puntaje_final_total'] += r[f'puntaje_final_{lado}']
+            datos['dinero_total'] += r[f'dinero_{lado}']
+            datos['entregas_total'] += r[f'entregas_{lado}']
+
+    for datos in resumen.values():
+        n = max(1, datos['partidas'])
+        datos['porcentaje_victorias'] = round(datos['victorias'] / n, 4)
+        datos['puntaje_final_promedio'] = round(
+            datos.pop('puntaje_final_total') / n, 2)
+        datos['dinero_promedio'] = round(datos.pop('dinero_total') / n, 2)
+        datos['entregas_promedio'] = round(
+            datos.pop('entregas_total') / n, 2)
+
+    return resumen
+
+
+def guardar_resultados(resultados, ruta):
+    """Guarda en CSV (una fila por partida) o JSON (resumen y partidas)."""
+    if os.path.splitext(ruta)[1].lower() == ".csv":
+        with open(ruta, "w", newline="", encoding="utf-8") as f:
+            if resultados:
+                escritor = csv.DictWriter(f, fieldnames=list(resultados[0]))
+                escritor.writeheader()
+                escritor.writerows(resultados)
+        return
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({'resumen': resumir(resultados), 'partidas': resultados},
+                  f, indent=2, ensure_ascii=False)
+
+
+def main():
+    """Punto de entrada de la línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Torneo de CPU de Courier Quest sin pantalla")
+    parser.add_argument("--partidas", type=int, default=10,
+                        help="partidas por cada pareja de dificultades")
+    parser.add_argument("--semilla", type=int, default=0,
+                        help="semilla de la primera partida")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="procesos a usar (por defecto, uno por núcleo)")
+    parser.add_argument("--dt", type=float, default=0.05,
+                        help="segundos simulados por tick")
+    parser.add_argument("--mapa", default=None,
+                        help="archivo JSON del mapa (por defecto, la API)")
+    parser.add_argument("--pedidos", default=None,
+                        help="archivo JSON de pedidos (por defecto, la API)")
+    parser.add_argument("--salida", default="resultados_torneo.json",
+                        help="archivo .json o .csv de salida")
+    args = parser.parse_args()
+
+    tiles, pedidos_data = cargar_datos(args.mapa, args.pedidos)
+    resultados = correr_torneo(tiles, pedidos_data, args.partidas,
+                               args.semilla, args.procesos, args.dt)
+    guardar_resultados(resultados, args.salida)
+
+    for dif, datos in sorted(resumir(resultados).items()):
+        print(f"{dif}: {datos['victorias']}/{datos['partidas']} victorias,"
+              f" puntaje promedio {datos['puntaje_final_promedio']}")
+    print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()